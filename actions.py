@@ -0,0 +1,126 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import profiler
+import tracing
+
+
+@dataclass
+class Action:
+    """A side effect the dispatcher wants performed (launch, close, shutdown...).
+
+    `replies` maps the handler's result code (e.g. "OK", "NOT_FOUND") to a
+    follow-up utterance, so the dispatcher can describe failures up front
+    without running anything itself.
+
+    Actions that share a `resource` (e.g. "chrome") run one after another, in
+    order; the rest run concurrently.
+    """
+
+    kind: str
+    target: str | None = None
+    args: dict[str, Any] = field(default_factory=dict)
+    replies: dict[str, str] = field(default_factory=dict)
+    resource: str | None = None
+
+
+@dataclass
+class Response:
+    """Everything `brain.dispatch` decided for one command."""
+
+    intent: str = "unknown"
+    command: str = ""
+    utterances: list[str] = field(default_factory=list)
+    actions: list[Action] = field(default_factory=list)
+    # Intents of a compound command's parts, in order (intent is then "plan").
+    plan: list[str] = field(default_factory=list)
+    # Memory keys to update (pending_action, awake_until, last_command, ...).
+    state: dict[str, Any] = field(default_factory=dict)
+    # True when the assistant should exit after speaking.
+    exit: bool = False
+
+    def say(self, text: str) -> "Response":
+        self.utterances.append(str(text))
+        return self
+
+    def act(
+        self,
+        kind: str,
+        target: str | None = None,
+        replies: dict[str, str] | None = None,
+        resource: str | None = None,
+        **args: Any,
+    ) -> "Response":
+        self.actions.append(Action(kind=kind, target=target, args=dict(args), replies=dict(replies or {}), resource=resource))
+        return self
+
+    def set(self, **state: Any) -> "Response":
+        self.state.update(state)
+        return self
+
+
+ActionHandler = Callable[[Action], str]
+
+
+class ActionExecutor:
+    """Carries out a Response: speaks its utterances, then runs its actions.
+
+    Independent actions run concurrently on a small worker pool. Each action's
+    result code picks its follow-up reply, spoken in action order.
+    """
+
+    def __init__(self, handlers: dict[str, ActionHandler], max_workers: int = 4):
+        self.handlers = handlers
+        self.max_workers = max(1, int(max_workers))
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _run_one(self, action: Action) -> str:
+        handler = self.handlers.get(action.kind)
+        if handler is None:
+            return "UNSUPPORTED"
+        with tracing.span(f"action.{action.kind}") as sp:
+            try:
+                result = str(handler(action) or "OK")
+            except Exception as e:
+                print(f"[action error] {action.kind}: {e}")
+                result = "ERROR"
+            sp.set(result=result)
+            return result
+
+    def _run_chain(self, actions: list[tuple[int, Action]]) -> list[tuple[int, str]]:
+        return [(i, self._run_one(a)) for i, a in actions]
+
+    def run_actions(self, actions: list[Action]) -> list[str]:
+        chains: dict[Any, list[tuple[int, Action]]] = {}
+        for i, a in enumerate(actions):
+            chains.setdefault(a.resource or i, []).append((i, a))
+        if len(chains) <= 1 or self.max_workers == 1:
+            return [self._run_one(a) for a in actions]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="riva-action")
+        # Each chain runs in a copy of the caller's context, so the trace, the
+        # command's shell-out budget and a scoped profile follow it into the worker thread.
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, profiler.carry_scope, self._run_chain, c)
+            for c in chains.values()
+        ]
+        results = [""] * len(actions)
+        for f in futures:
+            for i, result in f.result():
+                results[i] = result
+        return results
+
+    def run(self, response: Response, say: Callable[[str], None]) -> list[str]:
+        for text in response.utterances:
+            say(text)
+        results = self.run_actions(response.actions)
+        said: set[str] = set()
+        for action, result in zip(response.actions, results):
+            follow_up = action.replies.get(result)
+            # Several closes in one plan answer "Done." once.
+            if follow_up and follow_up not in said:
+                said.add(follow_up)
+                say(follow_up)
+        return results
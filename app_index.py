@@ -0,0 +1,339 @@
+import os
+import re
+import shlex
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import cache
+from fuzzy import CommandMatcher
+
+
+# Installed applications Riva can open or close by name, read from launcher
+# entries: Start Menu .lnk shortcuts on Windows, .desktop files on Linux.
+#
+# The cache keeps, per launcher directory, its mtime, its subdirectories and the
+# entries parsed from it. Adding, removing or renaming a launcher bumps its
+# directory's mtime, so a refresh is one stat() per directory and only changed
+# directories are re-read. Lookups go through a fuzzy.CommandMatcher over the
+# app names, so "open spotfy" still finds Spotify.
+
+_INDEX_VERSION = 1
+_CACHE_FILE = "apps.json"
+_RECHECK_SEC = 30.0
+_MAX_DEPTH = 6
+
+_QUERY_PREFIX_RE = re.compile(r"^(?:open|launch|start|run|close|quit|exit)\s+")
+_FILLER = {"the", "my", "app", "application", "program", "please", "up"}
+# Start Menu folders are full of these next to the real app.
+_SKIP_NAME_RE = re.compile(r"\b(uninstall|uninstaller|readme|read me|release notes|license|documentation|help)\b", re.IGNORECASE)
+_LAUNCHABLE_EXTS = {".exe", ".com", ".bat", ".cmd", ".msc", ".cpl"}
+_FIELD_CODE_RE = re.compile(r"%[fFuUdDnNickvm]")
+
+
+@dataclass(frozen=True)
+class AppEntry:
+    name: str
+    launcher: str
+    command: tuple[str, ...] = ()
+    image: str = ""
+
+    @property
+    def stem(self) -> str:
+        return os.path.splitext(self.image)[0]
+
+
+@dataclass(frozen=True)
+class AppMatch:
+    app: AppEntry
+    score: float
+    verdict: str  # "direct" | "confirm"
+
+
+def default_roots() -> list[str]:
+    """Launcher directories for this OS, plus RIVA_APP_DIRS (os.pathsep separated)."""
+    roots: list[str] = []
+    extra = (os.environ.get("RIVA_APP_DIRS") or "").strip()
+    if extra:
+        roots.extend(p for p in extra.split(os.pathsep) if p.strip())
+    if os.name == "nt":
+        for var in ("APPDATA", "ProgramData"):
+            base = os.environ.get(var)
+            if base:
+                roots.append(os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"))
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+        for base in [data_home, *data_dirs, "/var/lib/flatpak/exports/share"]:
+            if base:
+                roots.append(os.path.join(base, "applications"))
+    return list(dict.fromkeys(os.path.normpath(r) for r in roots))
+
+
+def query_phrase(command: str) -> str:
+    """The app part of "open the spotify app" -> "spotify"."""
+    text = _QUERY_PREFIX_RE.sub("", (command or "").lower().strip())
+    return " ".join(t for t in re.findall(r"[a-z0-9]+", text.replace("'", "")) if t not in _FILLER)
+
+
+# --- launcher parsers -----------------------------------------------------------
+
+def _lnk_target(data: bytes) -> str | None:
+    """Local target path of a Windows shell link (MS-SHLLINK LinkInfo), if it has one."""
+    if len(data) < 0x4C or struct.unpack_from("<I", data, 0)[0] != 0x4C:
+        return None
+    flags = struct.unpack_from("<I", data, 0x14)[0]
+    pos = 0x4C
+    if flags & 0x01:  # HasLinkTargetIDList
+        pos += 2 + struct.unpack_from("<H", data, pos)[0]
+    if not flags & 0x02 or pos + 28 > len(data):  # HasLinkInfo
+        return None
+    info_flags = struct.unpack_from("<I", data, pos + 8)[0]
+    if not info_flags & 0x01:  # VolumeIDAndLocalBasePath
+        return None
+    header_size = struct.unpack_from("<I", data, pos + 4)[0]
+    if header_size >= 0x24 and pos + 32 <= len(data):
+        offset = struct.unpack_from("<I", data, pos + 28)[0]
+        if offset:
+            start = pos + offset
+            end = data.find(b"\x00\x00", start)
+            while end != -1 and (end - start) % 2:
+                end = data.find(b"\x00\x00", end + 1)
+            if end != -1:
+                return data[start:end].decode("utf-16-le", errors="ignore") or None
+    offset = struct.unpack_from("<I", data, pos + 16)[0]
+    start = pos + offset
+    end = data.find(b"\x00", start)
+    if end == -1:
+        return None
+    return data[start:end].decode("mbcs" if os.name == "nt" else "latin-1", errors="ignore") or None
+
+
+def parse_lnk(path: str) -> AppEntry | None:
+    name = os.path.splitext(os.path.basename(path))[0]
+    if _SKIP_NAME_RE.search(name):
+        return None
+    with open(path, "rb") as f:
+        data = f.read(64 * 1024)
+    image = ""
+    try:
+        target = _lnk_target(data)
+    except struct.error:
+        target = None
+    if target:
+        # Shortcuts to documents and web pages are not apps.
+        if os.path.splitext(target)[1].lower() not in _LAUNCHABLE_EXTS:
+            return None
+        image = os.path.basename(target.replace("\\", "/"))
+    return AppEntry(name=name, launcher=path, image=image)
+
+
+def parse_desktop_file(path: str) -> AppEntry | None:
+    fields: dict[str, str] = {}
+    section = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("["):
+                section = line
+                continue
+            if section == "[Desktop Entry]" and "=" in line:
+                key, value = line.split("=", 1)
+                fields.setdefault(key.strip(), value.strip())
+    if fields.get("Type", "Application") != "Application":
+        return None
+    if fields.get("NoDisplay", "").lower() == "true" or fields.get("Hidden", "").lower() == "true":
+        return None
+    name = fields.get("Name", "")
+    try:
+        argv = shlex.split(fields.get("Exec", ""))
+    except ValueError:
+        return None
+    argv = [a.replace("%%", "%") for a in argv if not _FIELD_CODE_RE.fullmatch(a)]
+    if not name or not argv or _SKIP_NAME_RE.search(name):
+        return None
+    return AppEntry(name=name, launcher=path, command=tuple(argv), image=os.path.basename(argv[0]))
+
+
+_PARSERS = {".lnk": parse_lnk, ".desktop": parse_desktop_file}
+
+
+def launch_argv(app: AppEntry) -> list[str]:
+    """Command line that starts `app` (the shell opens .lnk files itself)."""
+    if app.launcher.lower().endswith(".lnk"):
+        return ["explorer", app.launcher]
+    return list(app.command)
+
+
+# --- index ----------------------------------------------------------------------
+
+def _scan_dir(path: str) -> tuple[list[str], list[AppEntry]]:
+    subdirs: list[str] = []
+    entries: list[AppEntry] = []
+    with os.scandir(path) as it:
+        for e in it:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.name)
+                    continue
+                parser = _PARSERS.get(os.path.splitext(e.name)[1].lower())
+                if parser is not None:
+                    app = parser(e.path)
+                    if app is not None:
+                        entries.append(app)
+            except Exception:
+                continue
+    return sorted(subdirs), entries
+
+
+class AppIndex:
+    """Disk-cached launcher index with incremental (per-directory mtime) rescans."""
+
+    def __init__(self, roots: Iterable[str] | None = None):
+        self.roots = list(default_roots() if roots is None else roots)
+        # dir -> [mtime_ns, subdirs, entry rows]
+        self._dirs: dict[str, list[Any]] = {}
+        self._apps: list[AppEntry] = []
+        self._by_launcher: dict[str, AppEntry] = {}
+        self._matcher: CommandMatcher | None = None
+        self._loaded = False
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+    def _key(self) -> str:
+        return cache.make_key("apps", _INDEX_VERSION, self.roots)
+
+    def _load(self) -> None:
+        data = cache.load_json(_CACHE_FILE, key=self._key())
+        if isinstance(data, dict):
+            self._dirs = data
+
+    def refresh(self) -> bool:
+        """Re-read directories whose mtime changed; returns True if anything did."""
+        old = self._dirs
+        new: dict[str, list[Any]] = {}
+        changed = False
+        stack = [(root, 0) for root in reversed(self.roots)]
+        while stack:
+            path, depth = stack.pop()
+            if path in new:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = old.get(path)
+            if cached is not None and cached[0] == mtime:
+                new[path] = cached
+            else:
+                try:
+                    subdirs, entries = _scan_dir(path)
+                except OSError:
+                    continue
+                new[path] = [mtime, subdirs, [[a.name, a.launcher, list(a.command), a.image] for a in entries]]
+                changed = True
+            if depth < _MAX_DEPTH:
+                stack.extend((os.path.join(path, d), depth + 1) for d in reversed(new[path][1]))
+        changed = changed or set(new) != set(old)
+        if changed or not self._loaded:
+            self._install(new)
+        if changed:
+            cache.save_json(_CACHE_FILE, new, key=self._key())
+        return changed
+
+    def _install(self, dirs: dict[str, list[Any]]) -> None:
+        # Earlier roots win (per-user launchers shadow system-wide ones of the same name).
+        order = {path: i for i, path in enumerate(dirs)}
+        apps: dict[str, AppEntry] = {}
+        for path in sorted(dirs, key=order.__getitem__):
+            for row in dirs[path][2]:
+                app = AppEntry(str(row[0]), str(row[1]), tuple(row[2]), str(row[3]))
+                apps.setdefault(app.name.lower(), app)
+        vocabulary: list[tuple[str, str]] = []
+        for app in apps.values():
+            vocabulary.append((app.name, app.launcher))
+            if app.stem and app.stem.lower() != app.name.lower():
+                vocabulary.append((app.stem, app.launcher))
+        matcher = CommandMatcher(vocabulary)
+        with self._lock:
+            self._dirs = dirs
+            self._apps = list(apps.values())
+            self._by_launcher = {a.launcher: a for a in self._apps}
+            self._matcher = matcher
+            self._loaded = True
+
+    def _refresh_in_background(self) -> None:
+        def _run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[apps] rescan failed: {e}")
+            finally:
+                self._refreshing = False
+
+        self._refreshing = True
+        threading.Thread(target=_run, name="riva-app-index", daemon=True).start()
+
+    def _ensure(self) -> None:
+        now = time.monotonic()
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._load()
+                    self.refresh()
+                    self._checked = now
+        elif now - self._checked >= _RECHECK_SEC and not self._refreshing:
+            self._checked = now
+            self._refresh_in_background()
+
+    def apps(self) -> list[AppEntry]:
+        self._ensure()
+        return list(self._apps)
+
+    def get(self, launcher: str) -> AppEntry | None:
+        self._ensure()
+        return self._by_launcher.get(launcher)
+
+    def lookup(self, command: str) -> AppMatch | None:
+        phrase = query_phrase(command)
+        if not phrase:
+            return None
+        self._ensure()
+        matcher = self._matcher
+        if matcher is None or not len(matcher):
+            return None
+        verdict, match = matcher.classify(phrase)
+        if verdict == "none" or match is None:
+            return None
+        app = self._by_launcher.get(match.command)
+        if app is None:
+            return None
+        return AppMatch(app, match.score, verdict)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # python app_index.py            list indexed apps
+    # python app_index.py <name...>  resolve one name
+    index = AppIndex()
+    t0 = time.perf_counter()
+    found = index.apps()
+    print(f"[apps] {len(found)} apps from {len(index._dirs)} directories in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    t0 = time.perf_counter()
+    index.refresh()
+    print(f"[apps] incremental rescan: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    if len(sys.argv) > 1:
+        m = index.lookup("open " + " ".join(sys.argv[1:]))
+        print(json.dumps(None if m is None else {"name": m.app.name, "score": m.score, "verdict": m.verdict,
+                                                  "argv": launch_argv(m.app), "image": m.app.image}))
+    else:
+        for app in sorted(found, key=lambda a: a.name.lower()):
+            print(f"  {app.name:<40} {app.image}")
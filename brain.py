@@ -6,21 +6,41 @@ try:
 except Exception:  # pragma: no cover
     psutil = None
 import shutil
-import subprocess
 import re
 import time
 import sys
+import threading
+import contextvars
+from contextlib import contextmanager
 import urllib.request
 import urllib.error
 import urllib.parse
-from typing import Any
+from typing import Any, Callable
 from datetime import datetime
 
-from speech import speak
+from speech import speak as _speak_aloud
 from moods import get_mood
 from jokes import confused, greetings, random_reply
-
+from storage import MemoryStore
+from actions import Action, ActionExecutor, Response
+from fuzzy import CommandMatcher, tokenize
+from intent_classifier import BACKGROUND_INTENT, IntentClassifier
+from site_catalog import SiteCatalog
+from app_index import AppEntry, AppIndex, launch_argv
+from folder_index import FolderIndex, FolderMatch
+from debounce import Debouncer
+from launch_registry import Launch, LaunchRegistry
+from chrome_urls import ChromeUrlProvider, default_provider as _default_url_provider, find_tab
+import command_tables
+from command_tables import CommandTable
+import procexec
+from telemetry import Reading, Telemetry, describe_trend
+import tracing
+from tracing import traced
+
+# Legacy JSON memory; imported into MEMORY_DB on first run.
 MEMORY_FILE = "memory.json"
+MEMORY_DB = (os.environ.get("RIVA_MEMORY_DB") or "").strip() or "memory.db"
 WAKE_WORD = "riva"
 
 # Voice wake phrases. When require_wake_word=True, the command must start with
@@ -99,6 +119,23 @@ def _find_chrome_profile_dir_by_display_name(display_name: str, user_data_dir: s
     return None
 
 
+def _resolve_chrome_profile() -> tuple[str, str]:
+    """(user data dir override or "", profile directory) from the RIVA_CHROME_* settings."""
+    user_data_dir = (os.environ.get("RIVA_CHROME_USER_DATA_DIR") or "").strip()
+    profile_name = (os.environ.get("RIVA_CHROME_PROFILE_NAME") or "").strip()
+
+    resolved_profile_dir = None
+    if profile_name:
+        resolved_profile_dir = _find_chrome_profile_dir_by_display_name(profile_name, user_data_dir or None)
+
+    profile_dir = (
+        resolved_profile_dir
+        or (os.environ.get("RIVA_CHROME_PROFILE_DIR") or "").strip()
+        or _DEFAULT_CHROME_PROFILE_DIR
+    )
+    return user_data_dir, profile_dir
+
+
 _SITE_TARGETS: list[tuple[str, str, tuple[str, ...]]] = [
     ("Facebook", "https://www.facebook.com/", ("facebook", "face book", "fb")),
     ("YouTube", "https://www.youtube.com/", ("youtube", "you tube")),
@@ -110,6 +147,122 @@ _SITE_TARGETS: list[tuple[str, str, tuple[str, ...]]] = [
 ]
 
 
+# Canonical commands (as the literal router understands them) and other ways
+# people (or Whisper) say them. Feeds the fuzzy matcher for misheard commands.
+_COMMAND_VOCABULARY: dict[str, tuple[str, ...]] = {
+    "open vs code": ("open vscode", "open visual studio code", "open code editor", "launch vs code"),
+    "open chrome": ("open google chrome", "open browser", "launch chrome", "start chrome"),
+    "open your repo": ("open your repository", "open your github repo", "open project repo"),
+    "open whatsapp": ("open whatsapp app", "start whatsapp", "open whatsapp desktop"),
+    "open folder": ("open current folder", "open this folder", "open explorer"),
+    "battery": ("battery status", "battery level", "check battery"),
+    "system status": ("system info", "how is my computer doing", "check system"),
+    "cpu usage": ("what's using my cpu", "processor usage", "cpu load"),
+    "memory usage": ("ram usage", "how much memory is used", "check memory"),
+    "current time": ("what time is it", "tell me the time", "what's the time"),
+    "shutdown": ("shut down", "shutdown pc", "turn off the pc", "power off"),
+    "help": ("what can you do", "show commands", "list features"),
+    "who are you": ("introduce yourself", "what is your name"),
+    "close chrome": ("close google chrome", "close browser"),
+    "close vscode": ("close vs code", "close visual studio code"),
+    "close whatsapp": ("close whatsapp app",),
+    "close youtube": ("close you tube", "close youtube tab"),
+    "close facebook": ("close fb", "close facebook tab"),
+    "close gmail": ("close gmail tab", "close mail"),
+    "close repo": ("close github", "close github repo"),
+    "close folder": ("close current folder", "close explorer"),
+}
+
+
+def _command_vocabulary() -> list[tuple[str, str]]:
+    vocab: list[tuple[str, str]] = []
+    for command, phrasings in _COMMAND_VOCABULARY.items():
+        vocab.append((command, command))
+        vocab.extend((p, command) for p in phrasings)
+    for display_name, _url, patterns in _SITE_TARGETS:
+        command = f"open {patterns[0]}"
+        vocab.append((command, command))
+        vocab.append((f"open {display_name.lower()}", command))
+        vocab.extend((f"open {p}", command) for p in patterns[1:])
+    return vocab
+
+
+_COMMAND_MATCHER: CommandMatcher | None = None
+
+
+def _command_matcher() -> CommandMatcher:
+    global _COMMAND_MATCHER
+    if _COMMAND_MATCHER is None:
+        _COMMAND_MATCHER = CommandMatcher(_command_vocabulary())
+    return _COMMAND_MATCHER
+
+
+_COMMAND_TABLES: dict[str, CommandTable] | None = None
+
+
+def _command_tables() -> dict[str, CommandTable]:
+    """Other languages' phrasings of the commands (intents/languages/*.txt)."""
+    global _COMMAND_TABLES
+    if _COMMAND_TABLES is None:
+        _COMMAND_TABLES = command_tables.load_tables(_normalize_command)
+    return _COMMAND_TABLES
+
+
+_INTENT_CLASSIFIER: IntentClassifier | None = None
+_INTENT_CLASSIFIER_LOADED = False
+
+
+def _intent_classifier() -> IntentClassifier | None:
+    """Paraphrase classifier (None if numpy or the intents/ examples are missing)."""
+    global _INTENT_CLASSIFIER, _INTENT_CLASSIFIER_LOADED
+    if not _INTENT_CLASSIFIER_LOADED:
+        try:
+            _INTENT_CLASSIFIER = IntentClassifier.load()
+        except Exception as e:
+            print(f"[intent classifier unavailable] {e}")
+            _INTENT_CLASSIFIER = None
+        _INTENT_CLASSIFIER_LOADED = True
+    return _INTENT_CLASSIFIER
+
+
+_CHROME_IMAGES = ("chrome.exe",)
+_VSCODE_IMAGES = ("Code.exe",)
+_WHATSAPP_IMAGES = ("WhatsApp.exe", "WhatsAppApp.exe", "WhatsAppDesktop.exe")
+
+_LAUNCHES: LaunchRegistry | None = None
+_LAUNCHES_LOCK = threading.Lock()
+
+
+def _launches() -> LaunchRegistry:
+    """Processes and windows Riva started (see launch_registry.py)."""
+    global _LAUNCHES
+    if _LAUNCHES is None:
+        with _LAUNCHES_LOCK:
+            if _LAUNCHES is None:
+                _LAUNCHES = LaunchRegistry()
+    return _LAUNCHES
+
+
+def _record_launch(app: str, pid: int = 0, images: tuple[str, ...] = (), title: str = "") -> None:
+    try:
+        _launches().record(app, pid, images, title)
+    except Exception as e:
+        print(f"[launches] record failed: {e}")
+
+
+def _launch_key(target: str) -> str:
+    """Registry key for a close/open target ("vs code" -> "vscode")."""
+    t = (target or "").strip().lower()
+    if t in ("vscode", "vs code", "visual studio code", "code"):
+        return "vscode"
+    if t in ("whatsapp", "whatsapp desktop", "what's app", "what app"):
+        return "whatsapp"
+    if t in ("chrome", "google chrome"):
+        return "chrome"
+    return t
+
+
+@traced("shell.open_whatsapp")
 def _open_whatsapp_desktop() -> bool:
     """Open WhatsApp Desktop app on Windows.
 
@@ -121,25 +274,21 @@ def _open_whatsapp_desktop() -> bool:
     """
     # 1) Try protocol handler (best effort).
     try:
-        subprocess.Popen(
-            ["cmd", "/c", "start", "", "whatsapp:"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        pid = procexec.spawn(["cmd", "/c", "start", "", "whatsapp:"])
+        _record_launch("whatsapp", pid, _WHATSAPP_IMAGES)
         return True
     except Exception:
         pass
 
     # 2) Try common Microsoft Store AppUserModelId.
     try:
-        subprocess.Popen(
+        pid = procexec.spawn(
             [
                 "explorer.exe",
                 "shell:AppsFolder\\5319275A.WhatsAppDesktop_cv1g1gvanyjgm!App",
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+            ]
         )
+        _record_launch("whatsapp", pid, _WHATSAPP_IMAGES)
         return True
     except Exception:
         return False
@@ -173,26 +322,17 @@ def _find_chrome_exe() -> str | None:
     return None
 
 
-def _open_chrome(url: str | None = None) -> bool:
-    """Open Google Chrome (optionally a URL).
+@traced("shell.open_chrome")
+def _open_chrome(url: str | None = None, urls: list[str] | None = None) -> bool:
+    """Open Google Chrome (optionally a URL, or several in one launch).
 
     Returns True if Chrome was launched, False if we had to fall back.
     """
+    urls = [u for u in [url, *(urls or [])] if u]
     chrome = _find_chrome_exe()
     if chrome:
         # Pin a specific Chrome profile to avoid the profile picker UI.
-        user_data_dir = (os.environ.get("RIVA_CHROME_USER_DATA_DIR") or "").strip()
-        profile_name = (os.environ.get("RIVA_CHROME_PROFILE_NAME") or "").strip()
-
-        resolved_profile_dir = None
-        if profile_name:
-            resolved_profile_dir = _find_chrome_profile_dir_by_display_name(profile_name, user_data_dir or None)
-
-        profile_dir = (
-            resolved_profile_dir
-            or (os.environ.get("RIVA_CHROME_PROFILE_DIR") or "").strip()
-            or _DEFAULT_CHROME_PROFILE_DIR
-        )
+        user_data_dir, profile_dir = _resolve_chrome_profile()
 
         args = [chrome]
         if user_data_dir:
@@ -200,23 +340,204 @@ def _open_chrome(url: str | None = None) -> bool:
         if profile_dir:
             args.append(f"--profile-directory={profile_dir}")
 
-        if url:
-            # Passing a URL typically opens a new tab if Chrome is already running.
-            args.extend(["--new-tab", url])
-        subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if urls:
+            # Passing URLs typically opens new tabs if Chrome is already running.
+            args.append("--new-tab")
+            args.extend(urls)
+        pid = procexec.spawn(args)
+        _record_launch("chrome", pid, _CHROME_IMAGES)
         return True
 
-    # Fallback: open URL in default browser if present.
-    if url:
+    # Fallback: open URLs in default browser if present.
+    for u in urls:
         try:
-            os.startfile(url)  # type: ignore[attr-defined]
+            os.startfile(u)  # type: ignore[attr-defined]
         except Exception:
             return False
-        return False
-
     return False
 
 
+_SITE_CATALOG: SiteCatalog | None = None
+_SITE_CATALOG_LOCK = threading.Lock()
+
+# Minimum SiteIndex score for "open <name>" to launch a catalog site.
+_SITE_MATCH_MIN_SCORE = 0.7
+
+
+def _site_catalog() -> SiteCatalog:
+    """Built-in sites + RIVA_SITES_FILE + the Chrome profile's Bookmarks and History."""
+    global _SITE_CATALOG
+    if _SITE_CATALOG is None:
+        with _SITE_CATALOG_LOCK:
+            if _SITE_CATALOG is None:
+                user_data_dir, profile_dir = _resolve_chrome_profile()
+                profile_path = os.path.join(user_data_dir or _default_chrome_user_data_dir(), profile_dir)
+                _SITE_CATALOG = SiteCatalog(
+                    builtin=_SITE_TARGETS,
+                    bookmarks_path=os.path.join(profile_path, "Bookmarks"),
+                    history_path=os.path.join(profile_path, "History"),
+                    user_sites_path=(os.environ.get("RIVA_SITES_FILE") or "").strip() or "sites.json",
+                )
+    return _SITE_CATALOG
+
+
+def _match_catalog_site(command: str) -> tuple[str, str] | None:
+    """Best bookmark/history/user site for "open <name>", as (name, url)."""
+    try:
+        match = _site_catalog().lookup(command)
+    except Exception as e:
+        print(f"[sites] lookup failed: {e}")
+        return None
+    if match is None or match.score < _SITE_MATCH_MIN_SCORE:
+        return None
+    # Page titles like "Stack Overflow - Where Developers Learn" are long to say.
+    name = re.split(r"\s+[-|\u2013\u2014:]\s+", match.name, maxsplit=1)[0].strip() or match.name
+    return name, match.url
+
+
+_APP_INDEX: AppIndex | None = None
+_APP_INDEX_LOCK = threading.Lock()
+
+_APP_COMMAND_PREFIXES = ("open ", "launch ", "start ")
+
+
+def _app_index() -> AppIndex:
+    """Installed apps from Start Menu shortcuts / .desktop launchers (plus RIVA_APP_DIRS)."""
+    global _APP_INDEX
+    if _APP_INDEX is None:
+        with _APP_INDEX_LOCK:
+            if _APP_INDEX is None:
+                _APP_INDEX = AppIndex()
+    return _APP_INDEX
+
+
+def _match_app(command: str, verdict: str | None = None) -> AppEntry | None:
+    """Installed app named in "open <app>" / "close <app>" (only `verdict` matches, if given)."""
+    try:
+        match = _app_index().lookup(command)
+    except Exception as e:
+        print(f"[apps] lookup failed: {e}")
+        return None
+    if match is None or (verdict is not None and match.verdict != verdict):
+        return None
+    return match.app
+
+
+_FOLDER_INDEX: FolderIndex | None = None
+_FOLDER_INDEX_LOCK = threading.Lock()
+
+# Minimum score for "open <name> folder" to open an indexed folder.
+_FOLDER_MATCH_MIN_SCORE = 0.75
+
+
+def _folder_index() -> FolderIndex:
+    """Folders under RIVA_FOLDER_ROOTS (default: home), indexed in the background."""
+    global _FOLDER_INDEX
+    if _FOLDER_INDEX is None:
+        with _FOLDER_INDEX_LOCK:
+            if _FOLDER_INDEX is None:
+                _FOLDER_INDEX = FolderIndex()
+    return _FOLDER_INDEX
+
+
+def _match_folder(command: str, exact: bool = False) -> FolderMatch | None:
+    """Indexed folder named in the command (whole-name matches only with `exact`)."""
+    try:
+        match = _folder_index().lookup(command)
+    except Exception as e:
+        print(f"[folders] lookup failed: {e}")
+        return None
+    if match is None or match.score < _FOLDER_MATCH_MIN_SCORE or (exact and not match.exact):
+        return None
+    return match
+
+
+_TELEMETRY: Telemetry | None = None
+_TELEMETRY_LOCK = threading.Lock()
+
+
+def _telemetry() -> Telemetry:
+    """Battery/CPU/memory/disk readings, sampled every RIVA_TELEMETRY_SEC once warm_up() starts it."""
+    global _TELEMETRY
+    if _TELEMETRY is None:
+        with _TELEMETRY_LOCK:
+            if _TELEMETRY is None:
+                _TELEMETRY = Telemetry()
+    return _TELEMETRY
+
+
+def _system_reading() -> Reading | None:
+    try:
+        return _telemetry().latest()
+    except Exception as e:
+        print(f"[telemetry] read failed: {e}")
+        return None
+
+
+def _size_text(mb: float) -> str:
+    return f"{mb / 1024:.1f} gigabytes" if mb >= 1024 else f"{mb:.0f} megabytes"
+
+
+def _battery_text(reading: Reading) -> str:
+    if reading.battery_percent is None:
+        return "I couldn't read the battery status on this device."
+    text = f"Battery is {reading.battery_percent:.0f} percent"
+    if reading.plugged:
+        text += " and plugged in"
+    elif reading.battery_secs_left is not None:
+        hours, minutes = divmod(int(reading.battery_secs_left // 60), 60)
+        parts = ([f"{hours} hour{'s' if hours != 1 else ''}"] if hours else []) + ([f"{minutes} minutes"] if minutes else [])
+        if parts:
+            text += f", about {' '.join(parts)} left"
+    return text + describe_trend(_telemetry().trend("battery_percent")) + "."
+
+
+def _cpu_text(reading: Reading) -> str:
+    if reading.cpu_percent is None:
+        return "I couldn't read the CPU usage."
+    text = f"CPU is at {reading.cpu_percent:.0f} percent" + describe_trend(_telemetry().trend("cpu_percent")) + "."
+    busy = [(name, pct) for name, pct in reading.top_cpu if pct >= 1.0]
+    if busy:
+        text += " Busiest: " + ", ".join(f"{name} {pct:.0f} percent" for name, pct in busy) + "."
+    return text
+
+
+def _memory_text(reading: Reading) -> str:
+    if reading.memory_percent is None:
+        return "I couldn't read the memory usage."
+    text = f"Memory is {reading.memory_percent:.0f} percent used"
+    if reading.memory_used_gb is not None and reading.memory_total_gb:
+        text += f", {reading.memory_used_gb:.1f} of {reading.memory_total_gb:.1f} gigabytes"
+    text += describe_trend(_telemetry().trend("memory_percent")) + "."
+    if reading.top_memory:
+        text += " Biggest: " + ", ".join(f"{name} {_size_text(mb)}" for name, mb in reading.top_memory) + "."
+    return text
+
+
+def _disk_text(reading: Reading) -> str:
+    if reading.disk_percent is None:
+        return "I couldn't read the disk usage."
+    free = f", {reading.disk_free_gb:.0f} gigabytes free" if reading.disk_free_gb is not None else ""
+    return f"Disk is {reading.disk_percent:.0f} percent full{free}."
+
+
+def warm_up() -> threading.Thread:
+    """Load the site catalog, app index and folder index in the background so the first lookup is fast."""
+
+    def _run():
+        _telemetry().start()
+        _folder_index().start()
+        for load in (lambda: _site_catalog().index(), lambda: _app_index().apps()):
+            try:
+                load()
+            except Exception:
+                pass
+
+    t = threading.Thread(target=_run, name="riva-brain-warm-up", daemon=True)
+    t.start()
+    return t
+
+
 def _match_site_target(command: str) -> tuple[str, str] | None:
     t = (command or "").lower()
     for display_name, url, patterns in _SITE_TARGETS:
@@ -225,12 +546,13 @@ def _match_site_target(command: str) -> tuple[str, str] | None:
     return None
 
 
+@traced("ps.close_explorer_windows")
 def _close_explorer_windows() -> bool:
     """Best-effort: close all open File Explorer windows on Windows."""
     if not os.name == "nt":
         return False
     try:
-        subprocess.run(
+        r = procexec.run(
             [
                 "powershell",
                 "-NoProfile",
@@ -239,15 +561,14 @@ def _close_explorer_windows() -> bool:
                 "| Where-Object { $_.FullName -like '*\\explorer.exe' } "
                 "| ForEach-Object { $_.Quit() }",
             ],
-            check=False,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+            capture=False,
         )
-        return True
+        return not r.timed_out
     except Exception:
         return False
 
 
+@traced("ps.close_active_explorer_window")
 def _close_active_explorer_window() -> bool:
     """Close only the currently active File Explorer window (Windows best-effort)."""
     if not os.name == "nt":
@@ -268,55 +589,25 @@ def _close_active_explorer_window() -> bool:
             "$w=$wins | Where-Object { $_.FullName -like '*\\explorer.exe' -and $_.HWND -eq $hwnd } | Select-Object -First 1; "
             "if ($null -ne $w) { $w.Quit(); 'CLOSED' } else { 'NOACTIVE' }"
         )
-        out = subprocess.check_output(
+        out = procexec.check_output(
             ["powershell", "-NoProfile", "-Command", ps],
-            stderr=subprocess.DEVNULL,
-            text=True,
         ).strip()
         return out.upper() == "CLOSED"
     except Exception:
         return False
 
 
-def _taskkill(image_name: str) -> bool:
-    """Best-effort process close on Windows by image name (e.g., chrome.exe)."""
-    if not os.name == "nt":
-        return False
-
-    # First try without /F (slightly gentler), then force if needed.
-    try:
-        r = subprocess.run(
-            ["taskkill", "/IM", image_name, "/T"],
-            check=False,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        if r.returncode == 0:
-            return True
-    except Exception:
-        pass
-
-    try:
-        r = subprocess.run(
-            ["taskkill", "/F", "/IM", image_name, "/T"],
-            check=False,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return r.returncode == 0
-    except Exception:
-        return False
-
-
+@traced("ps.run")
 def _run_powershell(ps: str, *, sta: bool = False) -> str:
     """Run a PowerShell snippet and return stdout (best-effort)."""
     args = ["powershell"]
     if sta:
         args.append("-STA")
     args.extend(["-NoProfile", "-Command", ps])
-    return subprocess.check_output(args, stderr=subprocess.DEVNULL, text=True)
+    return procexec.check_output(args)
 
 
+@traced("ps.list_top_level_windows")
 def _list_top_level_windows() -> list[dict[str, Any]]:
     """Enumerate top-level windows (visible and background) on Windows.
 
@@ -387,189 +678,246 @@ def _is_chrome_window(w: dict[str, Any]) -> bool:
     return False
 
 
-def _activate_hwnd_and_get_active_chrome_url(hwnd: int) -> tuple[bool, str]:
-    """Bring a window to foreground, and if it's Chrome, read active tab URL.
+# Per-target results of _close_batch().
+_BATCH_CLOSED = ("CLOSED", "KILLED")
 
-    Returns: (is_chrome_window, url_or_empty)
-    """
-    if os.name != "nt" or not hwnd:
-        return False, ""
 
-    try:
-        ps = (
-            "Add-Type @'\n"
-            "using System;\n"
-            "using System.Runtime.InteropServices;\n"
-            "public class Win32X {\n"
-            "  [DllImport(\"user32.dll\")] public static extern bool SetForegroundWindow(IntPtr hWnd);\n"
-            "  [DllImport(\"user32.dll\")] public static extern bool ShowWindow(IntPtr hWnd, int nCmdShow);\n"
-            "  [DllImport(\"user32.dll\")] public static extern uint GetWindowThreadProcessId(IntPtr hWnd, out uint lpdwProcessId);\n"
-            "}\n"
-            "'@; "
-            "Add-Type -AssemblyName System.Windows.Forms; "
-            f"$h=[IntPtr]{int(hwnd)}; "
-            "[Win32X]::ShowWindow($h, 5) | Out-Null; "
-            "[Win32X]::SetForegroundWindow($h) | Out-Null; "
-            "Start-Sleep -Milliseconds 160; "
-            "$pid=0; [Win32X]::GetWindowThreadProcessId($h, [ref]$pid) | Out-Null; "
-            "if ($pid -le 0) { 'NOTCHROME'; exit } ; "
-            "$p=Get-Process -Id $pid -ErrorAction SilentlyContinue; "
-            "if ($null -eq $p) { 'NOTCHROME'; exit } ; "
-            "if ($p.ProcessName -ne 'chrome') { 'NOTCHROME'; exit } ; "
-            "[System.Windows.Forms.SendKeys]::SendWait('^l'); Start-Sleep -Milliseconds 120; "
-            "[System.Windows.Forms.SendKeys]::SendWait('^c'); Start-Sleep -Milliseconds 120; "
-            "$url=[System.Windows.Forms.Clipboard]::GetText(); "
-            "if ([string]::IsNullOrWhiteSpace($url)) { 'URL:'; exit } ; "
-            "'URL:' + $url"
-        )
-        out = subprocess.check_output(
-            ["powershell", "-STA", "-NoProfile", "-Command", ps],
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).strip()
-        if out.upper() == "NOTCHROME":
-            return False, ""
-        if out.startswith("URL:"):
-            return True, out[4:].strip()
-        return False, ""
-    except Exception:
-        return False, ""
+def _ps_list(values: Any) -> str:
+    return ",".join("'" + str(v).replace("'", "''") + "'" for v in values)
 
 
-def _detect_by_process_or_window(
-    *,
-    image_names: tuple[str, ...],
-    title_needles: tuple[str, ...],
-    process_name_needles: tuple[str, ...] = (),
-) -> tuple[bool, list[dict[str, Any]]]:
-    """Detection: scan running processes + scan windows.
+@traced("ps.close_batch")
+def _close_batch(
+    hwnds: Any = (),
+    images: Any = (),
+    pids: Any = (),
+    titles: Any = (),
+    grace_ms: int = 350,
+) -> dict[str, str]:
+    """Close windows and end processes in one PowerShell round trip (Windows).
 
-    Returns: (detected, matching_windows)
+    - hwnds, and visible windows whose title contains one of `titles`, get WM_CLOSE;
+    - processes named in `images` (e.g. "chrome.exe") or listed in `pids` have
+      their windows sent WM_CLOSE too, get `grace_ms` to exit, and are then
+      force-stopped.
+
+    Returns a result per target, keyed "hwnd:<h>", "title:<needle>",
+    "image:<name>" and "pid:<n>": CLOSED (exited on its own), KILLED (forced),
+    NOT_RUNNING / NOT_FOUND, or FAILED / OPEN. Empty if nothing could run.
     """
-    detected_proc = any(_is_process_running(n) for n in image_names if n)
-    wins = _list_top_level_windows()
+    hwnds = [int(h) for h in hwnds if h]
+    pids = [int(p) for p in pids if p]
+    images = [str(i) for i in images if i]
+    titles = [str(t) for t in titles if t]
+    if os.name != "nt" or not (hwnds or pids or images or titles):
+        return {}
+    ps = (
+        "Add-Type @'\n"
+        "using System;\n"
+        "using System.Text;\n"
+        "using System.Runtime.InteropServices;\n"
+        "public class RivaBatch {\n"
+        "  public delegate bool EnumWindowsProc(IntPtr hWnd, IntPtr lParam);\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool EnumWindows(EnumWindowsProc lpEnumFunc, IntPtr lParam);\n"
+        "  [DllImport(\"user32.dll\")] public static extern int GetWindowText(IntPtr hWnd, StringBuilder text, int count);\n"
+        "  [DllImport(\"user32.dll\")] public static extern uint GetWindowThreadProcessId(IntPtr hWnd, out uint lpdwProcessId);\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool IsWindow(IntPtr hWnd);\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool IsWindowVisible(IntPtr hWnd);\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool PostMessage(IntPtr hWnd, int Msg, IntPtr wParam, IntPtr lParam);\n"
+        "}\n"
+        "'@; "
+        f"$hwnds=@({','.join(str(h) for h in hwnds)}); $images=@({_ps_list(images)}); "
+        f"$procIds=@({','.join(str(p) for p in pids)}); $titles=@({_ps_list(titles)}); $graceMs={int(grace_ms)}; "
+        "$res=[ordered]@{}; $procs=[ordered]@{}; $owned=@{}; "
+        "foreach ($n in $images) { $procs['image:' + $n]="
+        "@(Get-Process -Name ([IO.Path]::GetFileNameWithoutExtension($n)) -ErrorAction SilentlyContinue) }; "
+        "foreach ($id in $procIds) { $procs['pid:' + $id]=@(Get-Process -Id $id -ErrorAction SilentlyContinue) }; "
+        "foreach ($k in $procs.Keys) { foreach ($p in $procs[$k]) { $owned[[uint32]$p.Id]=$true } }; "
+        "$targets=New-Object 'System.Collections.Generic.HashSet[int64]'; $hits=@{}; "
+        "foreach ($h in $hwnds) { if ([RivaBatch]::IsWindow([IntPtr]$h)) { [void]$targets.Add([int64]$h) } else { $res['hwnd:' + $h]='NOT_FOUND' } }; "
+        "[RivaBatch]::EnumWindows({ param($h,$l) "
+        "  $wp=0; [void][RivaBatch]::GetWindowThreadProcessId($h, [ref]$wp); "
+        "  if (-not [RivaBatch]::IsWindowVisible($h)) { return $true }; "
+        "  if ($owned.ContainsKey([uint32]$wp)) { [void]$targets.Add([int64]$h); return $true }; "
+        "  if ($titles.Count) { $sb=New-Object System.Text.StringBuilder 512; [void][RivaBatch]::GetWindowText($h, $sb, $sb.Capacity); "
+        "    $t=$sb.ToString().ToLower(); foreach ($n in $titles) { if ($t.Contains($n.ToLower())) { [void]$targets.Add([int64]$h); $hits[$n]=$true } } }; "
+        "  return $true "
+        "}, [IntPtr]::Zero) | Out-Null; "
+        "foreach ($h in $targets) { [void][RivaBatch]::PostMessage([IntPtr]$h, 0x0010, [IntPtr]::Zero, [IntPtr]::Zero) }; "
+        "$all=@($procs.Values | ForEach-Object { $_ }); "
+        "if ($targets.Count) { $deadline=(Get-Date).AddMilliseconds($graceMs); "
+        "  while ((Get-Date) -lt $deadline -and @($all | Where-Object { -not $_.HasExited }).Count) { Start-Sleep -Milliseconds 50 } }; "
+        "foreach ($k in $procs.Keys) { $ps=@($procs[$k]); "
+        "  if (-not $ps.Count) { $res[$k]='NOT_RUNNING'; continue }; "
+        "  $left=@($ps | Where-Object { -not $_.HasExited }); "
+        "  if (-not $left.Count) { $res[$k]='CLOSED'; continue }; "
+        "  $left | Stop-Process -Force -ErrorAction SilentlyContinue; "
+        "  $res[$k]='KILLED'; foreach ($p in $left) { if (-not $p.WaitForExit(1000)) { $res[$k]='FAILED' } } }; "
+        "foreach ($h in $hwnds) { if (-not $res.Contains('hwnd:' + $h)) { "
+        "  if ([RivaBatch]::IsWindow([IntPtr]$h)) { $res['hwnd:' + $h]='OPEN' } else { $res['hwnd:' + $h]='CLOSED' } } }; "
+        "foreach ($n in $titles) { if ($hits.ContainsKey($n)) { $res['title:' + $n]='CLOSED' } else { $res['title:' + $n]='NOT_FOUND' } }; "
+        "$res | ConvertTo-Json -Compress"
+    )
+    try:
+        data = json.loads((_run_powershell(ps) or "").strip() or "{}")
+        return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+    except Exception:
+        return {}
 
-    matched: list[dict[str, Any]] = []
-    for w in wins:
-        pname = (w.get("process") or "").lower()
-        title = (w.get("title") or "")
-        if process_name_needles and not any(n.lower() == pname or n.lower() in pname for n in process_name_needles):
-            continue
-        if title_needles and not _window_title_contains_any(title, title_needles):
-            continue
-        matched.append(w)
 
-    detected = detected_proc or bool(matched)
-    return detected, matched
+def _batch_closed_any(results: dict[str, str]) -> bool:
+    """True if a batch found anything to close (and closed or killed it)."""
+    return any(v in _BATCH_CLOSED for v in results.values())
 
 
-def _close_windows_hwnd(hwnds: list[int]) -> bool:
-    """Try graceful close (WM_CLOSE) for the provided HWNDs."""
-    if os.name != "nt" or not hwnds:
+@traced("shell.terminate_pids")
+def _terminate_pids(pids: list[int]) -> bool:
+    """End these processes (gently, then forced) where _close_batch is unavailable."""
+    if not pids or psutil is None:
         return False
+    procs = []
+    for pid in pids:
+        try:
+            p = psutil.Process(pid)
+            p.terminate()
+            procs.append(p)
+        except Exception:
+            pass
     try:
-        joined = ",".join(str(int(h)) for h in hwnds if h)
-        ps = (
-            "Add-Type @'\n"
-            "using System;\n"
-            "using System.Runtime.InteropServices;\n"
-            "public class Win32C {\n"
-            "  public const int WM_CLOSE = 0x0010;\n"
-            "  [DllImport(\"user32.dll\")] public static extern bool PostMessage(IntPtr hWnd, int Msg, IntPtr wParam, IntPtr lParam);\n"
-            "}\n"
-            "'@; "
-            f"$hwnds=@({joined}); "
-            "foreach ($h in $hwnds) { try { [Win32C]::PostMessage([IntPtr]$h, [Win32C]::WM_CLOSE, [IntPtr]::Zero, [IntPtr]::Zero) | Out-Null } catch { } }; "
-            "'OK'"
-        )
-        _run_powershell(ps)
-        return True
+        _, left = psutil.wait_procs(procs, timeout=1.0)
+        for p in left:
+            p.kill()
     except Exception:
+        pass
+    return bool(procs)
+
+
+@traced("close_launched")
+def _close_launched(entries: list[Launch]) -> bool:
+    """Close exactly the windows and processes of these launches, in one batch.
+
+    Returns True if any of them was still running. On Windows only launches that
+    own a window count: tracked helpers alone (a launch that handed off to an
+    instance the user already had open) are left for the image close.
+    """
+    if not entries:
         return False
+    registry = _launches()
+    windows = _list_top_level_windows() if os.name == "nt" else None
+    registry.resolve(entries, windows)
+    live = [e for e in entries if e.hwnds] if os.name == "nt" else [e for e in entries if e.pids]
+    if not live:
+        registry.forget(entries)
+        return False
+    hwnds = [h for e in live for h in e.hwnds]
+    pids = registry.alive_pids(live)
+    if os.name == "nt":
+        closed = _batch_closed_any(_close_batch(hwnds=hwnds, pids=pids))
+    else:
+        closed = _terminate_pids(pids)
+    registry.forget(entries)
+    return closed
 
 
-def _close_common_apps_opened_by_riva() -> None:
-    """Close common apps/sites Riva opens (best effort).
+def _close_common_apps_opened_by_riva() -> bool:
+    """Close everything Riva launched since boot (exit cleanup).
 
-    Note: Sites like YouTube/Facebook/Gmail/Repo are tabs in Chrome.
-    Closing Chrome closes those.
+    Only the processes and windows in the launch registry are touched, so apps
+    the user started themselves stay open.
     """
-    # Chrome covers YouTube/Facebook/Gmail/Repo tabs.
-    _taskkill("chrome.exe")
+    registry = _launches()
+    registry.prune()
+    return _close_launched(registry.entries())
+
+
+def _close_launched_app(target: str) -> bool:
+    """Close the instances of `target` Riva launched, if any are still running."""
+    registry = _launches()
+    registry.prune()
+    return _close_launched(registry.entries([_launch_key(target)]))
+
+
+# Shells and shared host processes. A shortcut can point at one ("File
+# Explorer", "Command Prompt", a script run by wscript), but the desktop or
+# other apps live in the same image, so these are never ended by name.
+_SHARED_HOST_IMAGES = frozenset({
+    "explorer.exe", "cmd.exe", "powershell.exe", "pwsh.exe", "conhost.exe", "svchost.exe",
+    "rundll32.exe", "dllhost.exe", "wscript.exe", "cscript.exe",
+    # .desktop launchers that wrap the real program
+    "sh", "bash", "env",
+})
+
+
+def _close_host_app_windows(image: str, name: str) -> bool:
+    """Close a shell/host-based app by its windows only: folder windows for Explorer, else windows titled like it."""
+    if image.lower() == "explorer.exe":
+        return _close_explorer_windows()
+    if os.name != "nt" or not name:
+        return False
+    return _close_batch(titles=(name,)).get(f"title:{name}") == "CLOSED"
 
-    # VS Code
-    _taskkill("Code.exe")
 
-    # WhatsApp Desktop variants
-    _taskkill("WhatsApp.exe")
-    _taskkill("WhatsAppApp.exe")
-    _taskkill("WhatsAppDesktop.exe")
+@traced("close_indexed_app")
+def _close_indexed_app(image: str, name: str = "") -> bool:
+    """Close an app from the launcher index by its executable name (best effort)."""
+    if not image:
+        return False
+    if image.lower() in _SHARED_HOST_IMAGES:
+        return _close_host_app_windows(image, name)
+    if os.name != "nt":
+        if psutil is None:
+            return False
+        # Linux truncates process names to 15 characters.
+        procs = [p for p in psutil.process_iter(["name"]) if (p.info.get("name") or "") == image[:15]]
+        for p in procs:
+            try:
+                p.terminate()
+            except Exception:
+                pass
+        return bool(procs)
+    return _batch_closed_any(_close_batch(images=(image,)))
 
 
-def _close_app_target(target: str) -> bool:
+@traced("close_app_target")
+def _close_app_target(target: str, image: str = "") -> bool:
     """Close a supported application target.
 
-    Detection-first policy:
-    - Scan processes
-    - Scan visible/background windows
-    Action:
-    - Try graceful close via WM_CLOSE
-    - Fallback to taskkill
+    Apps Riva launched are closed through the launch registry. Anything else is
+    closed by image name in one _close_batch round trip:
+    - WM_CLOSE to the app's windows (and windows titled like it)
+    - a short grace period, then force-stop what is left
 
-    Returns True if the target was detected (and we attempted to close it).
+    Returns True if the target was running (and we closed it).
     """
     t = (target or "").strip().lower()
 
-    if t in ("vscode", "vs code", "visual studio code", "code"):
-        detected, wins = _detect_by_process_or_window(
-            image_names=("Code.exe",),
-            title_needles=("visual studio code",),
-            process_name_needles=("code",),
-        )
-        if not detected:
-            return False
-        hwnds = [int(w.get("hwnd") or 0) for w in wins if w.get("hwnd")]
-        _close_windows_hwnd(hwnds)
-        time.sleep(0.35)
-        if _is_process_running("Code.exe"):
-            _taskkill("Code.exe")
+    # Riva's own launches first: those pids and windows, nothing else.
+    if _close_launched_app(t):
         return True
 
-    if t in ("whatsapp", "whatsapp desktop", "what's app", "what app"):
-        detected, wins = _detect_by_process_or_window(
-            image_names=("WhatsApp.exe", "WhatsAppApp.exe", "WhatsAppDesktop.exe"),
-            title_needles=("whatsapp",),
-            process_name_needles=(),
-        )
-        if not detected:
-            return False
-        hwnds = [int(w.get("hwnd") or 0) for w in wins if w.get("hwnd")]
-        _close_windows_hwnd(hwnds)
-        time.sleep(0.35)
-        if _is_process_running("WhatsApp.exe") or _is_process_running("WhatsAppApp.exe") or _is_process_running("WhatsAppDesktop.exe"):
-            _taskkill("WhatsApp.exe")
-            _taskkill("WhatsAppApp.exe")
-            _taskkill("WhatsAppDesktop.exe")
-        return True
+    key = _launch_key(t)
+    if key == "vscode":
+        return _batch_closed_any(_close_batch(images=_VSCODE_IMAGES))
+    if key == "whatsapp":
+        return _batch_closed_any(_close_batch(images=_WHATSAPP_IMAGES, titles=("whatsapp",)))
+    if key == "chrome":
+        return _batch_closed_any(_close_batch(images=_CHROME_IMAGES, grace_ms=250))
 
-    if t in ("chrome", "google chrome"):
-        detected, wins = _detect_by_process_or_window(
-            image_names=("chrome.exe",),
-            title_needles=(),
-            process_name_needles=("chrome",),
-        )
-        if not detected:
-            return False
-        hwnds = [int(w.get("hwnd") or 0) for w in wins if w.get("hwnd")]
-        _close_windows_hwnd(hwnds)
-        time.sleep(0.25)
-        if _is_process_running("chrome.exe"):
-            _taskkill("chrome.exe")
-        return True
+    return _close_indexed_app(image, target)
+
+
+_CHROME_URLS: ChromeUrlProvider | None = None
 
-    return False
 
+def _chrome_urls() -> ChromeUrlProvider:
+    """Bulk reader of Chrome windows' tab URLs (UI Automation on Windows; see chrome_urls.py)."""
+    global _CHROME_URLS
+    if _CHROME_URLS is None:
+        _CHROME_URLS = _default_url_provider()
+    return _CHROME_URLS
 
+
+@traced("cdp.list_pages")
 def _chrome_cdp_list_pages() -> list[dict[str, Any]]:
     """List Chrome pages via DevTools (if Chrome was launched with remote debugging)."""
     try:
@@ -583,6 +931,7 @@ def _chrome_cdp_list_pages() -> list[dict[str, Any]]:
         return []
 
 
+@traced("cdp.close_page")
 def _chrome_cdp_close_page(page_id: str) -> bool:
     try:
         if not page_id:
@@ -595,6 +944,7 @@ def _chrome_cdp_close_page(page_id: str) -> bool:
         return False
 
 
+@traced("ps.active_chrome_url")
 def _get_active_chrome_url_if_foreground() -> tuple[bool, str]:
     """Best-effort: read the active Chrome tab URL if Chrome is foreground.
 
@@ -626,10 +976,8 @@ def _get_active_chrome_url_if_foreground() -> tuple[bool, str]:
             "if ([string]::IsNullOrWhiteSpace($url)) { 'URL:'; exit } ; "
             "'URL:' + $url"
         )
-        out = subprocess.check_output(
+        out = procexec.check_output(
             ["powershell", "-STA", "-NoProfile", "-Command", ps],
-            stderr=subprocess.DEVNULL,
-            text=True,
         ).strip()
         if out.upper() == "NOTCHROME":
             return False, ""
@@ -640,6 +988,7 @@ def _get_active_chrome_url_if_foreground() -> tuple[bool, str]:
         return False, ""
 
 
+@traced("detect_chrome_tab")
 def _detect_chrome_tab_target(target: str) -> tuple[bool, str]:
     """Detect whether a target tab appears to be open.
 
@@ -688,23 +1037,15 @@ def _detect_chrome_tab_target(target: str) -> tuple[bool, str]:
         if _window_title_contains_any(title, title_patterns):
             return True, "WINDOW_TITLE"
 
-    # 4) URL scan across Chrome windows (best-effort, may briefly focus windows).
-    for w in wins:
-        if not _is_chrome_window(w):
-            continue
-        hwnd = int(w.get("hwnd") or 0)
-        if not hwnd:
-            continue
-        is_chrome, url = _activate_hwnd_and_get_active_chrome_url(hwnd)
-        if not is_chrome:
-            continue
-        u = (url or "").lower()
-        if any(pat in u for pat in url_patterns):
-            return True, "WINDOW_URL_SCAN"
+    # 4) URL scan across Chrome windows (one UI Automation read, no focus change).
+    hwnds = [int(w.get("hwnd") or 0) for w in wins if _is_chrome_window(w) and w.get("hwnd")]
+    if hwnds and find_tab(_chrome_urls(), url_patterns, hwnds) is not None:
+        return True, "WINDOW_URL_SCAN"
 
     return False, "NONE"
 
 
+@traced("close_chrome_tab")
 def _close_chrome_tab_target(target: str) -> str:
     """Close a Chrome tab target.
 
@@ -765,6 +1106,7 @@ def _close_chrome_tab_target(target: str) -> str:
     else:
         title_patterns = ("github",)
 
+    wins: list[dict[str, Any]] = []
     try:
         wins = _list_top_level_windows()
         chosen_hwnd = 0
@@ -776,34 +1118,13 @@ def _close_chrome_tab_target(target: str) -> str:
                 chosen_hwnd = int(w.get("hwnd") or 0)
                 break
 
-        if chosen_hwnd:
-            ps = (
-                "Add-Type @'\n"
-                "using System;\n"
-                "using System.Runtime.InteropServices;\n"
-                "public class Win32F {\n"
-                "  [DllImport(\"user32.dll\")] public static extern bool SetForegroundWindow(IntPtr hWnd);\n"
-                "  [DllImport(\"user32.dll\")] public static extern bool ShowWindow(IntPtr hWnd, int nCmdShow);\n"
-                "}\n"
-                "'@; "
-                "Add-Type -AssemblyName System.Windows.Forms; "
-                f"$h=[IntPtr]{chosen_hwnd}; "
-                "[Win32F]::ShowWindow($h, 5) | Out-Null; "  # SW_SHOW
-                "[Win32F]::SetForegroundWindow($h) | Out-Null; "
-                "Start-Sleep -Milliseconds 120; "
-                "[System.Windows.Forms.SendKeys]::SendWait('^w'); 'CLOSED'"
-            )
-            out = subprocess.check_output(
-                ["powershell", "-STA", "-NoProfile", "-Command", ps],
-                stderr=subprocess.DEVNULL,
-                text=True,
-            ).strip()
-            if (out or "").upper() == "CLOSED":
-                return "CLOSED"
+        if chosen_hwnd and _close_active_tab_in_window(chosen_hwnd):
+            return "CLOSED"
     except Exception:
         pass
 
-    # 4) URL scan close (best-effort): iterate Chrome windows, activate each, match URL, then Ctrl+W.
+    # 4) URL scan close (best-effort): read every Chrome window's URL in one UI
+    # Automation call, then focus only the matching window for Ctrl+W.
     try:
         if t == "youtube":
             url_patterns = ("youtube.com", "youtu.be")
@@ -814,38 +1135,44 @@ def _close_chrome_tab_target(target: str) -> str:
         else:
             url_patterns = ("github.com",)
 
-        wins = _list_top_level_windows()
-        for w in wins:
-            if not _is_chrome_window(w):
-                continue
-            hwnd = int(w.get("hwnd") or 0)
-            if not hwnd:
-                continue
-            is_chrome, url = _activate_hwnd_and_get_active_chrome_url(hwnd)
-            if not is_chrome:
-                continue
-            u = (url or "").lower()
-            if not any(pat in u for pat in url_patterns):
-                continue
-
-            # Close active tab
-            ps = (
-                "Add-Type -AssemblyName System.Windows.Forms; "
-                "[System.Windows.Forms.SendKeys]::SendWait('^w'); 'CLOSED'"
-            )
-            out = subprocess.check_output(
-                ["powershell", "-STA", "-NoProfile", "-Command", ps],
-                stderr=subprocess.DEVNULL,
-                text=True,
-            ).strip()
-            if (out or "").upper() == "CLOSED":
-                return "CLOSED"
+        hwnds = [int(w.get("hwnd") or 0) for w in wins if _is_chrome_window(w) and w.get("hwnd")]
+        found = find_tab(_chrome_urls(), url_patterns, hwnds) if hwnds else None
+        if found is not None and _close_active_tab_in_window(found[0]):
+            return "CLOSED"
     except Exception:
         pass
 
     return "TAB_NOT_FOUND"
 
 
+@traced("ps.close_tab_in_window")
+def _close_active_tab_in_window(hwnd: int) -> bool:
+    """Bring a Chrome window to the foreground and close its active tab (Ctrl+W)."""
+    if os.name != "nt" or not hwnd:
+        return False
+    ps = (
+        "Add-Type @'\n"
+        "using System;\n"
+        "using System.Runtime.InteropServices;\n"
+        "public class Win32F {\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool SetForegroundWindow(IntPtr hWnd);\n"
+        "  [DllImport(\"user32.dll\")] public static extern bool ShowWindow(IntPtr hWnd, int nCmdShow);\n"
+        "}\n"
+        "'@; "
+        "Add-Type -AssemblyName System.Windows.Forms; "
+        f"$h=[IntPtr]{int(hwnd)}; "
+        "[Win32F]::ShowWindow($h, 5) | Out-Null; "  # SW_SHOW
+        "[Win32F]::SetForegroundWindow($h) | Out-Null; "
+        "Start-Sleep -Milliseconds 120; "
+        "[System.Windows.Forms.SendKeys]::SendWait('^w'); 'CLOSED'"
+    )
+    out = procexec.check_output(
+        ["powershell", "-STA", "-NoProfile", "-Command", ps],
+    ).strip()
+    return (out or "").upper() == "CLOSED"
+
+
+@traced("shell.tasklist")
 def _is_process_running(image_name: str) -> bool:
     """Return True if a process with this image name appears to be running."""
     try:
@@ -859,10 +1186,8 @@ def _is_process_running(image_name: str) -> bool:
 
         # Fallback (Windows): tasklist
         if os.name == "nt" and target:
-            out = subprocess.check_output(
+            out = procexec.check_output(
                 ["tasklist", "/FI", f"IMAGENAME eq {target}"],
-                stderr=subprocess.DEVNULL,
-                text=True,
             )
             return target in out.lower()
     except Exception:
@@ -870,6 +1195,7 @@ def _is_process_running(image_name: str) -> bool:
     return False
 
 
+@traced("ps.close_active_chrome_tab")
 def _close_active_chrome_tab_for_target(target: str) -> str:
     """Best-effort: close the active Chrome tab if it matches target.
 
@@ -923,10 +1249,8 @@ def _close_active_chrome_tab_for_target(target: str) -> str:
             "if (-not $match) { 'NOTMATCH'; exit } ; "
             "[System.Windows.Forms.SendKeys]::SendWait('^w'); 'CLOSED'"
         )
-        out = subprocess.check_output(
+        out = procexec.check_output(
             ["powershell", "-STA", "-NoProfile", "-Command", ps],
-            stderr=subprocess.DEVNULL,
-            text=True,
         ).strip()
         out_u = out.upper()
         if out_u in ("CLOSED", "NOTCHROME", "NOURL", "NOTMATCH"):
@@ -956,33 +1280,281 @@ def _is_no(text: str) -> bool:
     t = (text or "").lower()
     return any(w in t for w in ("no", "nope", "cancel", "stop", "don't", "do not"))
 
+class Session:
+    """Per-client conversation state for front ends other than the local loop.
+
+    Holds its own memory (wake window, pending confirmation, ...) so concurrent
+    clients never see each other's state, and an `emit` callback that receives
+    Riva's replies instead of them being spoken aloud.
+    """
+
+    def __init__(self, session_id: str, emit: Callable[[str], None] | None = None):
+        self.id = session_id
+        self.emit = emit
+        self.memory: dict[str, Any] = {}
+        self.last_seen = time.monotonic()
+
+
+_CURRENT_SESSION: contextvars.ContextVar[Session | None] = contextvars.ContextVar("riva_session", default=None)
+
+
+@contextmanager
+def session_scope(session: Session):
+    """Route process()'s memory and replies through `session` in this context."""
+    token = _CURRENT_SESSION.set(session)
+    try:
+        yield session
+    finally:
+        _CURRENT_SESSION.reset(token)
+
+
+def speak(text):
+    session = _CURRENT_SESSION.get()
+    if session is not None and session.emit is not None:
+        session.emit(str(text))
+        return
+    _speak_aloud(text)
+
+
+_MEMORY_STORE: MemoryStore | None = None
+_MEMORY_STORE_LOCK = threading.Lock()
+
+
+def _memory_store() -> MemoryStore:
+    global _MEMORY_STORE
+    if _MEMORY_STORE is None:
+        with _MEMORY_STORE_LOCK:
+            if _MEMORY_STORE is None:
+                _MEMORY_STORE = MemoryStore(MEMORY_DB, legacy_json_path=MEMORY_FILE)
+    return _MEMORY_STORE
+
+
 def load_memory():
-    with open(MEMORY_FILE, "r") as f:
-        data = json.load(f)
-        # Backward-compatible defaults
-        data.setdefault("pending_action", None)
-        data.setdefault("pending_url", None)
-        data.setdefault("awake_until", 0.0)
-        data.setdefault("wake_reminder_until", 0.0)
-        return data
+    session = _CURRENT_SESSION.get()
+    if session is not None:
+        data = dict(session.memory)
+    else:
+        data = _memory_store().load()
+    # Backward-compatible defaults
+    data.setdefault("pending_action", None)
+    data.setdefault("pending_url", None)
+    data.setdefault("awake_until", 0.0)
+    data.setdefault("wake_reminder_until", 0.0)
+    return data
 
 def save_memory(data):
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    session = _CURRENT_SESSION.get()
+    if session is not None:
+        session.memory = dict(data)
+        return
+    _memory_store().save(data)
 
-def process(command, require_wake_word: bool = True):
-    # Normalize
+
+def command_history(since: float | None = None, intent: str | None = None, limit: int = 50) -> list[dict[str, Any]]:
+    """Recent commands (newest first), optionally filtered by time and intent."""
+    return _memory_store().history(since=since, intent=intent, limit=limit)
+
+
+def _normalize_command(command) -> str:
     command = (command or "").lower().strip()
     # Whisper often returns trailing punctuation like "time." or "go to sleep.".
     # Normalize by stripping most punctuation and collapsing whitespace.
     try:
         # Normalize smart quotes
         command = command.replace("’", "'").replace("‘", "'")
-        # Keep letters/numbers/underscore/whitespace/apostrophe; drop the rest.
-        command = re.sub(r"[^\w\s']+", " ", command)
+        # Keep letters/numbers/underscore/whitespace/apostrophe (and Bangla vowel
+        # signs, which \w misses); drop the rest, including the danda.
+        command = re.sub(r"[^\w\s'\u0980-\u09ff]+|[\u0964\u0965]+", " ", command)
         command = re.sub(r"\s+", " ", command).strip()
     except Exception:
         pass
+    return command
+
+
+@traced("shell.open_folder")
+def _open_folder(path: str = ".") -> None:
+    procexec.spawn(["explorer", path or "."])
+    # Folder windows belong to the shared explorer.exe; track them by title.
+    _record_launch("folder", images=("explorer.exe",), title=os.path.basename(os.path.abspath(path or ".")) or path)
+
+
+def _do_launch_vscode(action: Action) -> str:
+    with tracing.span("shell.launch_vscode"):
+        procexec.shell("code")
+    # code.cmd exits once Code.exe is up; the registry adopts Code.exe by image.
+    _record_launch("vscode", images=_VSCODE_IMAGES)
+    return "OK"
+
+
+def _do_open_folder(action: Action) -> str:
+    _open_folder(action.target or ".")
+    return "OK"
+
+
+def _do_launch_chrome(action: Action) -> str:
+    return "OK" if _open_chrome(url=action.target, urls=action.args.get("urls")) else "NOT_FOUND"
+
+
+def _do_open_whatsapp(action: Action) -> str:
+    if _open_whatsapp_desktop():
+        return "OK"
+    _open_chrome(url="https://web.whatsapp.com/")
+    return "FALLBACK_WEB"
+
+
+def _do_close_app(action: Action) -> str:
+    return "CLOSED" if _close_app_target(action.target or "", image=action.args.get("image") or "") else "NOT_OPEN"
+
+
+@traced("shell.launch_app")
+def _launch_app(launcher: str) -> bool:
+    app = _app_index().get(launcher)
+    argv = launch_argv(app) if app is not None else []
+    if not argv:
+        return False
+    try:
+        pid = procexec.spawn(argv)
+    except Exception:
+        return False
+    # A shared host's other processes are never adopted; only the one spawned here is Riva's.
+    shared = app.image.lower() in _SHARED_HOST_IMAGES
+    _record_launch(_launch_key(app.name), pid, (app.image,) if app.image and not shared else ())
+    return True
+
+
+def _do_launch_app(action: Action) -> str:
+    return "OK" if _launch_app(action.target or "") else "NOT_FOUND"
+
+
+def _do_close_tab(action: Action) -> str:
+    return _close_chrome_tab_target(action.target or "")
+
+
+def _do_close_folder(action: Action) -> str:
+    return "CLOSED" if _close_active_explorer_window() else "NOT_ACTIVE"
+
+
+def _do_close_launched(action: Action) -> str:
+    return "CLOSED" if _close_common_apps_opened_by_riva() else "NOT_OPEN"
+
+
+def _do_shutdown(action: Action) -> str:
+    with tracing.span("shell.shutdown"):
+        procexec.run(["shutdown", "/s", "/t", "5"], capture=False)
+    return "OK"
+
+
+_ACTION_HANDLERS: dict[str, Callable[[Action], str]] = {
+    "launch_vscode": _do_launch_vscode,
+    "open_folder": _do_open_folder,
+    "launch_chrome": _do_launch_chrome,
+    "launch_app": _do_launch_app,
+    "open_whatsapp": _do_open_whatsapp,
+    "close_app": _do_close_app,
+    "close_tab": _do_close_tab,
+    "close_folder": _do_close_folder,
+    "close_launched": _do_close_launched,
+    "shutdown": _do_shutdown,
+}
+
+# Opening something twice in a row is never wanted, and neither is closing all
+# of an app twice. Closing a tab or the active folder window again closes the
+# next one, and shutdown is left alone.
+_OPEN_ACTIONS = frozenset({"launch_vscode", "open_folder", "launch_chrome", "launch_app", "open_whatsapp"})
+_IDEMPOTENT_ACTIONS = _OPEN_ACTIONS | {"close_app"}
+# The clock is looked up on each call so the simulation's clock applies.
+_DEBOUNCER = Debouncer(
+    _IDEMPOTENT_ACTIONS,
+    clock=lambda: time.monotonic(),
+    resource=lambda a: a.resource or _action_resource(a) or a.kind,
+    repeatable=_OPEN_ACTIONS,
+)
+
+
+def _debounced(handler: Callable[[Action], str]) -> Callable[[Action], str]:
+    return lambda action: _DEBOUNCER.run_action(action, handler)
+
+
+_EXECUTOR = ActionExecutor({kind: _debounced(h) for kind, h in _ACTION_HANDLERS.items()})
+
+
+def debounce_stats() -> dict[str, Any]:
+    """Repeated commands and actions suppressed so far (see debounce.py)."""
+    return _DEBOUNCER.stats()
+
+_CHROME_NOT_FOUND = "I couldn't find Chrome on this PC."
+_CHROME_FALLBACK = "I couldn't find Chrome, so I opened it in your default browser."
+
+
+def execute(response: Response, say: Callable[[str], None] | None = None) -> list[str]:
+    """Speak a Response's utterances and carry out its actions."""
+    return _EXECUTOR.run(response, say or speak)
+
+
+@traced("process")
+def process(command, require_wake_word: bool = True, language: str | None = None, confidence: float = 0.0) -> str:
+    """Handle one command: dispatch, persist state changes, then execute.
+
+    `language` / `confidence` are what speech recognition detected (see
+    speech.heard_language()); they pick the command table for a non-English
+    command. Logs the command (with intent and latency) to the history and
+    returns the resolved intent name.
+    """
+    started = time.perf_counter()
+    with tracing.span("process.normalize"):
+        normalized = _normalize_command(command)
+        normalized, _ = command_tables.translate(_command_tables(), normalized, language, confidence)
+    intent = "error"
+    try:
+        with tracing.span("process.load_memory"):
+            memory = load_memory()
+        with tracing.span("process.dispatch") as sp:
+            response = dispatch(normalized, require_wake_word, memory)
+            sp.set(intent=response.intent)
+        intent = response.intent
+        session = _CURRENT_SESSION.get()
+        scope = session.id if session is not None else ""
+        said = response.command or normalized
+        # Typed commands aren't heard twice; only voice input is checked for repeats.
+        if require_wake_word and not _DEBOUNCER.begin_command(scope, said, response):
+            print(f"[debounce] ignored repeat: {said}")
+            intent = "duplicate"
+            return intent
+        try:
+            if response.state:
+                with tracing.span("process.save_memory"):
+                    memory.update(response.state)
+                    save_memory(memory)
+            # Shell-outs made while executing share one budget (RIVA_COMMAND_BUDGET_SEC).
+            with tracing.span("process.execute", actions=len(response.actions)), procexec.command_budget():
+                execute(response)
+        finally:
+            _DEBOUNCER.end_command(scope, said, response)
+        if response.exit:
+            raise SystemExit(0)
+        return intent
+    finally:
+        try:
+            _memory_store().log_command(
+                raw=command or "",
+                command=normalized,
+                intent=intent,
+                latency_ms=(time.perf_counter() - started) * 1000.0,
+            )
+        except Exception:
+            pass
+
+
+def dispatch(command, require_wake_word: bool = True, memory: dict[str, Any] | None = None) -> Response:
+    """Decide how to handle a command without performing any side effects.
+
+    Returns a Response with the utterances to speak, the actions to run, and the
+    memory changes to apply. `memory` is the current assistant memory (as from
+    load_memory()); it is not modified.
+    """
+    command = _normalize_command(command)
+    memory = memory or {}
+    r = Response(command=command)
 
     # EXIT COMMAND (hard stop)
     # User request: when they say "now,Leave" (normalized to "now leave"), say goodbye and exit.
@@ -998,65 +1570,56 @@ def process(command, require_wake_word: bool = True):
         or "leavenow" in c_compact
         or "nowleave" in c_compact
     ):
-        speak("Okay. Goodbye! See you next time.")
-        raise SystemExit(0)
-
-    memory = load_memory()
+        r.intent = "exit"
+        r.say("Okay. Goodbye! See you next time.")
+        if (os.environ.get("RIVA_CLOSE_ON_EXIT") or "").strip().lower() in ("1", "true", "yes", "on"):
+            # Close what Riva opened this session (and earlier ones since boot).
+            r.act("close_launched")
+        r.exit = True
+        return r
 
     # Handle confirmations first (e.g., shutdown confirmation)
     pending = memory.get("pending_action")
     if pending:
         if _is_yes(command):
+            r.set(pending_action=None, pending_url=None, pending_command=None)
+            if pending == "run_command" and memory.get("pending_command"):
+                # Confirmed a fuzzy "did you mean" suggestion: run it as if it was said.
+                follow = dispatch(str(memory.get("pending_command")), require_wake_word=False, memory={})
+                follow.state = {**r.state, **follow.state}
+                return follow
             if pending == "shutdown":
-                speak("Confirmed. Shutting down now.")
-                memory["pending_action"] = None
-                memory["pending_url"] = None
-                save_memory(memory)
-                os.system("shutdown /s /t 5")
-                return
+                r.intent = "confirm_shutdown"
+                r.say("Confirmed. Shutting down now.")
+                r.act("shutdown")
             elif pending == "open_vscode":
-                speak("Okay. Opening VS Code.")
-                memory["pending_action"] = None
-                memory["pending_url"] = None
-                save_memory(memory)
-                os.system("code")
-                return
+                r.intent = "confirm_open_vscode"
+                r.say("Okay. Opening VS Code.")
+                r.act("launch_vscode")
             elif pending == "open_folder":
-                speak("Okay. Opening the current folder.")
-                memory["pending_action"] = None
-                memory["pending_url"] = None
-                save_memory(memory)
-                os.system("explorer .")
-                return
+                r.intent = "confirm_open_folder"
+                r.say("Okay. Opening the current folder.")
+                r.act("open_folder", ".")
             elif pending == "open_chrome":
-                speak("Okay. Opening Chrome.")
+                r.intent = "confirm_open_chrome"
+                r.say("Okay. Opening Chrome.")
                 url = memory.get("pending_url")
-                memory["pending_action"] = None
-                memory["pending_url"] = None
-                save_memory(memory)
-                launched = _open_chrome(url=url)
-                if not launched and not url:
-                    speak("I couldn't find Chrome on this PC.")
-                elif not launched and url:
-                    speak("I couldn't find Chrome, so I opened it in your default browser.")
-                return
-
-            # Unknown pending action
-            speak("Confirmed.")
-            memory["pending_action"] = None
-            memory["pending_url"] = None
-            save_memory(memory)
-            return
+                r.act("launch_chrome", url, replies={"NOT_FOUND": _CHROME_FALLBACK if url else _CHROME_NOT_FOUND})
+            else:
+                # Unknown pending action
+                r.intent = "confirm"
+                r.say("Confirmed.")
+            return r
 
         if _is_no(command):
-            speak("Okay, cancelled.")
-            memory["pending_action"] = None
-            memory["pending_url"] = None
-            save_memory(memory)
-            return
+            r.intent = "cancel"
+            r.say("Okay, cancelled.")
+            r.set(pending_action=None, pending_url=None, pending_command=None)
+            return r
 
-        speak("Please say yes to confirm, or say cancel.")
-        return
+        r.intent = "confirm_prompt"
+        r.say("Please say yes to confirm, or say cancel.")
+        return r
 
     # Wake gating.
     # In voice mode (require_wake_word=True), Riva only responds after:
@@ -1078,12 +1641,11 @@ def process(command, require_wake_word: bool = True):
             except Exception:
                 window = int(_DEFAULT_AWAKE_WINDOW_SEC)
 
-            memory["awake_until"] = now + max(3, window)
-            memory["wake_reminder_until"] = 0.0
-            save_memory(memory)
+            r.set(awake_until=now + max(3, window), wake_reminder_until=0.0)
         elif not is_awake:
             # Strict sleep/idle behavior: stay silent until wake phrase is used.
-            return
+            r.intent = "asleep"
+            return r
     else:
         # In text mode, wake word is optional. If 'riva' appears anywhere, strip it.
         if WAKE_WORD in command:
@@ -1095,18 +1657,196 @@ def process(command, require_wake_word: bool = True):
         command = command.replace(WAKE_WORD, "").strip()
 
     mood = get_mood()
-    memory["last_command"] = command
-    save_memory(memory)
+    r.command = command
+    r.set(last_command=command)
 
     # If user just woke you up (e.g., "hi riva") with no extra command,
     # keep it simple and don't read out a long "Try: ..." script.
     if woke and not command:
-        speak(_intro_text())
-        return
+        r.intent = "wake"
+        r.say(_intro_text())
+        return r
+
+
+    planned = _dispatch_plan(command, r, require_wake_word, mood)
+    if planned is not None:
+        return planned
+    return _route_with_fallback(command, r, require_wake_word, mood)
+
+
+def _route_with_fallback(command: str, r: Response, require_wake_word: bool, mood: str) -> Response:
+    """Route one command; returns `r` or a corrected Response."""
+    base_state = dict(r.state)
+    _route_command(command, r, require_wake_word, mood)
+
+    # Misheard or paraphrased command? Ask the fuzzy matcher, then the intent
+    # classifier, before giving up or asking "did you mean". Confident matches
+    # run directly; close calls get confirmed.
+    if r.intent == "unknown" or r.intent.startswith("suggest_") or r.intent == "close_unknown":
+        verdict, fallback = _fallback_command(command, allow_paraphrase=not r.intent.startswith("suggest_"))
+        if verdict == "direct" and fallback != command:
+            fixed = Response(command=fallback)
+            fixed.set(**base_state)
+            fixed.set(last_command=fallback)
+            _route_command(fallback, fixed, require_wake_word, mood)
+            if fixed.intent not in ("unknown", "close_unknown") and not fixed.intent.startswith("suggest_"):
+                return fixed
+        elif verdict == "confirm":
+            r.intent = "suggest_command"
+            r.utterances = [f"Did you mean '{fallback}'?"]
+            r.actions = []
+            r.set(pending_action="run_command", pending_url=None, pending_command=fallback)
+
+    return r
+
+
+# "open chrome and youtube and check battery" -> three commands.
+_PLAN_SPLIT_RE = re.compile(r"\s*\b(?:and then|and also|then|and|also|plus)\b\s*")
+_PLAN_VERBS = ("open", "close", "launch", "start")
+_PLAN_MAX_STEPS = 6
+_OPENING_RE = re.compile(r"^Opening (.+?)\.$")
+
+
+def _action_resource(action: Action) -> str | None:
+    """What an action touches, so a plan doesn't close a tab while killing Chrome."""
+    if action.kind in ("launch_chrome", "close_tab", "open_whatsapp") or (action.kind == "close_app" and action.target == "chrome"):
+        return "chrome"
+    if action.kind in ("open_folder", "close_folder"):
+        return "explorer"
+    if action.kind == "close_app":
+        return f"app:{action.target}"
+    if action.kind in ("launch_vscode", "launch_app"):
+        return f"launch:{action.target or action.kind}"
+    return None
+
+
+def _is_resolved(intent: str) -> bool:
+    return intent not in ("unknown", "close_unknown", "asleep", "exit") and not intent.startswith("suggest_")
+
 
+def _join_names(names: list[str]) -> str:
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " and " + names[-1]
+
+
+def _dispatch_plan(command: str, r: Response, require_wake_word: bool, mood: str) -> Response | None:
+    """Handle a compound command as an ordered plan, or return None to route it whole.
+
+    Every part has to resolve on its own (a bare part like "youtube" borrows the
+    previous part's verb); otherwise "and" is assumed to belong to one command.
+    """
+    parts = [p for p in _PLAN_SPLIT_RE.split(command) if p]
+    if len(parts) < 2 or len(parts) > _PLAN_MAX_STEPS:
+        return None
 
+    steps: list[Response] = []
+    verb = ""
+    for part in parts:
+        first = part.split(" ", 1)[0]
+        if first in _PLAN_VERBS:
+            verb = first
+        candidates = [part]
+        if verb and first not in _PLAN_VERBS:
+            # "close youtube and chrome" means close both; "open chrome and battery" doesn't open the battery.
+            candidates.insert(0 if verb == "close" else 1, f"{verb} {part}")
+        for candidate in candidates:
+            step = _route_with_fallback(candidate, Response(command=candidate), require_wake_word, mood)
+            if _is_resolved(step.intent):
+                steps.append(step)
+                break
+        else:
+            return None
+
+    r.intent = "plan"
+    r.plan = [s.intent for s in steps]
+
+    # One summary: "Opening Chrome and YouTube." plus everything else that was said.
+    opened: list[str] = []
+    other: list[str] = []
+    for step in steps:
+        for text in step.utterances:
+            m = _OPENING_RE.match(text)
+            if m:
+                opened.append(m.group(1))
+            elif text not in other:
+                other.append(text)
+    r.utterances = ([f"Opening {_join_names(opened)}."] if opened else []) + other
+
+    # Independent actions run concurrently, ones on the same app in order;
+    # Chrome tabs go out in one launch.
+    chrome = [a for s in steps for a in s.actions if a.kind == "launch_chrome"]
+    for step in steps:
+        for action in step.actions:
+            if action.kind != "launch_chrome" or len(chrome) < 2:
+                action.resource = action.resource or _action_resource(action)
+                r.actions.append(action)
+            elif action is chrome[0]:
+                urls = [a.target for a in chrome if a.target]
+                replies = next((a.replies for a in chrome if a.target), action.replies)
+                r.act("launch_chrome", replies=replies, resource="chrome", urls=urls)
+
+    for step in steps:
+        r.set(**step.state)
+    r.set(last_command=command)
+    return r
+
+
+# Commands a fallback guess must not reach loosely, with the words that may
+# accompany them. A fuzzy hit runs only when it accounts for every other word
+# ("shut dawn", "shut it down", not "power off the tv"), and only the
+# classifier (never a loose word match) may offer them as "did you mean".
+_GUARDED_COMMANDS = {
+    "shutdown": {"it", "now", "please", "the", "my", "this", "pc", "computer", "laptop", "system", "machine"},
+}
+
+
+def _fallback_command(command: str, allow_paraphrase: bool = True) -> tuple[str, str]:
+    """Resolve a command the literal router missed.
+
+    Returns ("direct" | "confirm" | "none", canonical_command).
+    """
+    with tracing.span("fallback.fuzzy"):
+        verdict, match = _command_matcher().classify(command)
+    guarded = match is not None and match.command in _GUARDED_COMMANDS
+    if verdict == "direct" and match is not None and not guarded:
+        return "direct", match.command
+    if guarded and verdict == "direct":
+        words, phrase = tokenize(command), match.phrase.split()
+        allowed = _GUARDED_COMMANDS[match.command]
+        if len(words) - len(phrase) > sum(1 for w in words if w in allowed and w not in phrase):
+            verdict = "none"  # words left over: up to the classifier
+
+    p_verdict, prediction = "none", None
+    if allow_paraphrase or guarded:
+        classifier = _intent_classifier()
+        if classifier is not None:
+            with tracing.span("fallback.classifier"):
+                p_verdict, prediction = classifier.classify(command)
+    if prediction is not None and prediction.intent == BACKGROUND_INTENT:
+        # Something Riva can't do ("turn off the lights"): don't let a loose
+        # word match ("turn off the pc") guess a command for it.
+        return "none", ""
+    if verdict == "direct" and match is not None:
+        return "direct", match.command
+    if not allow_paraphrase or p_verdict == "none":
+        prediction = None
+    elif p_verdict == "direct" and prediction is not None:
+        return "direct", prediction.command
+
+    if guarded:
+        match = None
+    if verdict == "confirm" and match is not None:
+        if prediction is None or match.score >= prediction.score:
+            return "confirm", match.command
+    if prediction is not None:
+        return "confirm", prediction.command
+    return "none", ""
+
+
+def _route_command(command: str, r: Response, require_wake_word: bool, mood: str) -> None:
+    """Literal keyword router: fills `r` for a normalized, wake-stripped command."""
     if "hello" in command or "hi" in command:
-        speak(random_reply(greetings))
+        r.intent = "greeting"
+        r.say(random_reply(greetings))
 
     elif (
         "help" in command
@@ -1115,28 +1855,30 @@ def process(command, require_wake_word: bool = True):
         or "features" in command
         or "capabilities" in command
     ):
-        speak("Here is what I can do right now.")
-        speak("Open VS Code: say open vs code.")
-        speak("Open Chrome: say open chrome.")
-        speak("Open a site in Chrome: say open youtube or open facebook.")
-        speak("Open this project's GitHub repo: say open your repo.")
-        speak("Open WhatsApp app: say open whatsapp.")
-        speak("Open WhatsApp Web in Chrome: say open whatsapp web.")
-        speak("Open current folder: say open folder.")
-        speak("Close folder windows: say exit folder.")
-        speak("Check battery: say battery.")
-        speak("Shutdown PC: say shutdown (I will ask you to confirm).")
-        speak("Exit: say now leave.")
-        speak("Close apps: say close chrome / close vscode / close whatsapp.")
-        speak("Close tabs (best effort): close youtube / close facebook / close gmail / close repo.")
-        speak("Close current folder window: close folder.")
+        r.intent = "help"
+        r.say("Here is what I can do right now.")
+        r.say("Open VS Code: say open vs code.")
+        r.say("Open Chrome: say open chrome.")
+        r.say("Open a site in Chrome: say open youtube or open facebook.")
+        r.say("Open this project's GitHub repo: say open your repo.")
+        r.say("Open WhatsApp app: say open whatsapp.")
+        r.say("Open WhatsApp Web in Chrome: say open whatsapp web.")
+        r.say("Open current folder: say open folder.")
+        r.say("Close folder windows: say exit folder.")
+        r.say("Check battery: say battery.")
+        r.say("Check the computer: say system status, cpu usage or memory usage.")
+        r.say("Shutdown PC: say shutdown (I will ask you to confirm).")
+        r.say("Exit: say now leave.")
+        r.say("Close apps: say close chrome / close vscode / close whatsapp.")
+        r.say("Close tabs (best effort): close youtube / close facebook / close gmail / close repo.")
+        r.say("Close current folder window: close folder.")
 
         # Mention wake behavior.
         if require_wake_word:
-            speak("Voice mode wake phrase: say 'hi riva' or 'hey riva'.")
-            speak("After waking once, you can talk normally until you exit.")
+            r.say("Voice mode wake phrase: say 'hi riva' or 'hey riva'.")
+            r.say("After waking once, you can talk normally until you exit.")
         else:
-            speak("Text mode: wake phrase is optional.")
+            r.say("Text mode: wake phrase is optional.")
 
     elif (
         "who are you" in command
@@ -1144,9 +1886,11 @@ def process(command, require_wake_word: bool = True):
         or "introduce yourself" in command
         or "your name" in command
     ):
-        speak(_intro_text())
+        r.intent = "identity"
+        r.say(_intro_text())
 
     elif "who am i" in command or "do you know me" in command:
+        r.intent = "whoami"
         whoami = [
             "You are my favorite human. Probably.",
             "You are the boss of this PC.",
@@ -1154,7 +1898,7 @@ def process(command, require_wake_word: bool = True):
             "You are the one who keeps giving me tasks. And I respect that.",
             "You are the reason my code exists.",
         ]
-        speak(random.choice(whoami))
+        r.say(random.choice(whoami))
 
     # Fuzzy matching for 'open vs code' to handle mis-transcriptions
     elif (
@@ -1164,15 +1908,15 @@ def process(command, require_wake_word: bool = True):
         or "open base code" in command  # another possible mis-transcription
         or "open best code" in command
     ):
-        speak("Opening VS Code. Programmer mode on 🤓")
-        os.system("code")
+        r.intent = "open_vscode"
+        r.say("Opening VS Code. Programmer mode on 🤓")
+        r.act("launch_vscode")
 
     # If it's close to the intent, confirm instead of doing the wrong thing.
     elif "open" in command and "code" in command:
-        speak("Did you mean 'open VS Code'?")
-        memory["pending_action"] = "open_vscode"
-        memory["pending_url"] = None
-        save_memory(memory)
+        r.intent = "suggest_open_vscode"
+        r.say("Did you mean 'open VS Code'?")
+        r.set(pending_action="open_vscode", pending_url=None)
 
     # Chrome / website shortcuts
     elif (
@@ -1180,10 +1924,9 @@ def process(command, require_wake_word: bool = True):
         or "open google chrome" in command
         or command.strip() == "chrome"
     ):
-        speak("Opening Chrome.")
-        launched = _open_chrome()
-        if not launched:
-            speak("I couldn't find Chrome on this PC.")
+        r.intent = "open_chrome"
+        r.say("Opening Chrome.")
+        r.act("launch_chrome", replies={"NOT_FOUND": _CHROME_NOT_FOUND})
 
     elif (
         "open your repo" in command
@@ -1191,10 +1934,9 @@ def process(command, require_wake_word: bool = True):
         or ("open" in command and "your" in command and "github" in command and "repo" in command)
         or ("open" in command and "your" in command and "github" in command and "repository" in command)
     ):
-        speak("Opening the project repository on GitHub.")
-        launched = _open_chrome(url=PROJECT_REPO_URL)
-        if not launched:
-            speak("I couldn't find Chrome, so I opened it in your default browser.")
+        r.intent = "open_repo"
+        r.say("Opening the project repository on GitHub.")
+        r.act("launch_chrome", PROJECT_REPO_URL, replies={"NOT_FOUND": _CHROME_FALLBACK})
 
     # WhatsApp Desktop (prefer app over web)
     elif (
@@ -1202,49 +1944,122 @@ def process(command, require_wake_word: bool = True):
         and ("whatsapp" in command or "what's app" in command or "what app" in command)
         and "web" not in command
     ):
-        speak("Opening WhatsApp app.")
-        ok = _open_whatsapp_desktop()
-        if not ok:
-            speak("I couldn't open the WhatsApp app. Opening WhatsApp Web instead.")
-            _open_chrome(url="https://web.whatsapp.com/")
+        r.intent = "open_whatsapp"
+        r.say("Opening WhatsApp app.")
+        r.act(
+            "open_whatsapp",
+            replies={"FALLBACK_WEB": "I couldn't open the WhatsApp app. Opening WhatsApp Web instead."},
+        )
 
     elif (
         ("open" in command or "new tab" in command or "open tab" in command)
         and _match_site_target(command) is not None
     ):
+        r.intent = "open_site"
         site = _match_site_target(command)
         assert site is not None
         site_name, url = site
-        speak(f"Opening {site_name}.")
-        launched = _open_chrome(url=url)
-        if not launched:
-            speak("I couldn't find Chrome, so I opened it in your default browser.")
+        r.say(f"Opening {site_name}.")
+        r.act("launch_chrome", url, replies={"NOT_FOUND": _CHROME_FALLBACK})
 
     elif "open" in command and ("chrome" in command or "crome" in command or "chrom" in command):
-        speak("Did you mean 'open chrome'?")
-        memory["pending_action"] = "open_chrome"
-        memory["pending_url"] = None
-        save_memory(memory)
+        r.intent = "suggest_open_chrome"
+        r.say("Did you mean 'open chrome'?")
+        r.set(pending_action="open_chrome", pending_url=None)
+
+    elif "open" in command and "folder" in command and _match_folder(command) is not None:
+        r.intent = "open_named_folder"
+        folder = _match_folder(command)
+        assert folder is not None
+        r.say(f"Opening {folder.name}.")
+        r.act("open_folder", folder.path)
 
     elif "open folder" in command:
-        speak("Opening current folder.")
-        os.system("explorer .")
+        r.intent = "open_folder"
+        r.say("Opening current folder.")
+        r.act("open_folder", ".")
 
     elif "open" in command and "folder" in command:
-        speak("Did you mean 'open folder'?")
-        memory["pending_action"] = "open_folder"
-        memory["pending_url"] = None
-        save_memory(memory)
+        r.intent = "suggest_open_folder"
+        r.say("Did you mean 'open folder'?")
+        r.set(pending_action="open_folder", pending_url=None)
+
+    # Installed apps (Start Menu shortcuts / .desktop launchers).
+    elif command.startswith(_APP_COMMAND_PREFIXES) and _match_app(command, "direct") is not None:
+        r.intent = "open_app"
+        app = _match_app(command, "direct")
+        assert app is not None
+        r.say(f"Opening {app.name}.")
+        r.act("launch_app", app.launcher, replies={"NOT_FOUND": f"I couldn't start {app.name}."})
+
+    # Anything else in the bookmarks, history or the user's site file.
+    elif (
+        command.startswith(("open ", "new tab ", "open tab ", "go to "))
+        and _match_catalog_site(command) is not None
+    ):
+        r.intent = "open_bookmark"
+        site = _match_catalog_site(command)
+        assert site is not None
+        site_name, url = site
+        r.say(f"Opening {site_name}.")
+        r.act("launch_chrome", url, replies={"NOT_FOUND": _CHROME_FALLBACK})
+
+    # "open downloads": a folder whose whole name was said.
+    elif command.startswith("open ") and _match_folder(command, exact=True) is not None:
+        r.intent = "open_named_folder"
+        folder = _match_folder(command, exact=True)
+        assert folder is not None
+        r.say(f"Opening {folder.name}.")
+        r.act("open_folder", folder.path)
+
+    elif command.startswith(_APP_COMMAND_PREFIXES) and _match_app(command) is not None:
+        r.intent = "suggest_open_app"
+        app = _match_app(command)
+        assert app is not None
+        r.say(f"Did you mean 'open {app.name}'?")
+        r.set(pending_action="run_command", pending_url=None, pending_command=f"open {app.name}")
+
+    # System readings come from the telemetry ring, not a psutil call here.
+    elif (
+        "system status" in command
+        or "system info" in command
+        or "check system" in command
+        or "how is my computer" in command
+    ):
+        r.intent = "system_status"
+        reading = _system_reading()
+        if reading is None:
+            r.say("System status is unavailable because the 'psutil' package is not installed.")
+        else:
+            r.say(_cpu_text(reading))
+            r.say(_memory_text(reading))
+            r.say(_disk_text(reading))
+            if reading.battery_percent is not None:
+                r.say(_battery_text(reading))
+
+    elif re.search(r"\b(cpu|processor)\b", command):
+        r.intent = "cpu_usage"
+        reading = _system_reading()
+        if reading is None:
+            r.say("CPU usage is unavailable because the 'psutil' package is not installed.")
+        else:
+            r.say(_cpu_text(reading))
+
+    elif re.search(r"\b(memory|ram)\b", command) and not command.startswith(("open ", "close ")):
+        r.intent = "memory_usage"
+        reading = _system_reading()
+        if reading is None:
+            r.say("Memory usage is unavailable because the 'psutil' package is not installed.")
+        else:
+            r.say(_memory_text(reading))
 
     elif "battery" in command:
-        if psutil is None:
-            speak("Battery status is unavailable because the 'psutil' package is not installed.")
+        r.intent = "battery"
+        reading = _system_reading()
+        if reading is None:
+            r.say("Battery status is unavailable because the 'psutil' package is not installed.")
         else:
-            battery = psutil.sensors_battery()
-            if battery is None:
-                speak("I couldn't read the battery status on this device.")
-            else:
-                speak(f"Battery is {battery.percent} percent.")
+            r.say(_battery_text(reading))
 
     elif (
         "time" == command
@@ -1252,92 +2067,133 @@ def process(command, require_wake_word: bool = True):
         or "what time" in command
         or "tell me the time" in command
     ):
+        r.intent = "time"
         now = datetime.now()
         # Example: 09:05 PM
-        speak(f"It's {now.strftime('%I:%M %p')}.".lstrip("0"))
+        r.say(f"It's {now.strftime('%I:%M %p')}.".lstrip("0"))
 
     elif "shutdown" in command:
+        r.intent = "shutdown_prompt"
         if mood == "happy":
-            speak("You did great today.")
+            r.say("You did great today.")
         elif mood == "sleepy":
-            speak("Finally… good night.")
+            r.say("Finally… good night.")
 
-        speak("Do you want me to shut down the PC? Please say yes to confirm, or say cancel.")
-        memory["pending_action"] = "shutdown"
-        memory["pending_url"] = None
-        save_memory(memory)
+        r.say("Do you want me to shut down the PC? Please say yes to confirm, or say cancel.")
+        r.set(pending_action="shutdown", pending_url=None)
 
     # CLOSE COMMANDS
     elif command.startswith("close "):
-        target = command[len("close "):].strip()
-        if not target:
-            speak("Please say close and then the target.")
-            return
-
-        # Normalize target for more robust matching (Whisper often inserts extra words/spaces).
-        t = target.lower().strip()
-        t_compact = t.replace("'", "").replace(" ", "")
-
-        # Folder: close ONLY the active explorer window
-        if ("folder" in t) or ("currentfolder" in t_compact):
-            closed = _close_active_explorer_window()
-            if closed:
-                speak("Done.")
-            else:
-                speak("No folder window is currently active.")
-            return
-
-        # Applications
-        if (
-            ("vscode" in t_compact)
-            or ("visualstudiocode" in t_compact)
-            or ("whatsapp" in t_compact)
-            or ("whatsapp" in t_compact)
-            or ("whatapp" in t_compact)
-            or ("chrome" in t_compact)
-        ):
-            # Choose a canonical app target for the closer.
-            if "chrome" in t_compact:
-                app_target = "chrome"
-            elif "vscode" in t_compact or "visualstudiocode" in t_compact:
-                app_target = "vscode"
-            else:
-                app_target = "whatsapp"
+        _dispatch_close(command[len("close "):].strip(), r)
 
-            attempted = _close_app_target(app_target)
-            if attempted:
-                speak("Done.")
-            else:
-                speak("That is not currently open.")
-            return
-
-        # Website tabs: best-effort only.
-        if (
-            ("youtube" in t_compact) or ("youtu" in t_compact) or ("youtub" in t_compact)
-            or ("facebook" in t_compact) or ("fb" == t_compact)
-            or ("gmail" in t_compact) or ("mailgoogle" in t_compact)
-            or ("repo" in t_compact) or ("github" in t_compact) or ("githu" in t_compact)
-        ):
-            if ("youtube" in t_compact) or ("youtu" in t_compact):
-                web_target = "youtube"
-            elif ("facebook" in t_compact) or (t_compact == "fb"):
-                web_target = "facebook"
-            elif ("gmail" in t_compact) or ("mailgoogle" in t_compact):
-                web_target = "gmail"
-            else:
-                web_target = "repo"
+    else:
+        r.intent = "unknown"
+        r.say(random_reply(confused))
 
-            result = _close_chrome_tab_target(web_target)
-            if result == "CHROME_NOT_RUNNING":
-                speak("Chrome is not currently running.")
-            elif result == "CLOSED":
-                speak("Done.")
-            else:
-                speak("The tab is not currently open.")
-            return
 
-        speak("I can't close that target.")
+def _dispatch_close(target: str, r: Response) -> None:
+    if not target:
+        r.intent = "close_prompt"
+        r.say("Please say close and then the target.")
         return
 
-    else:
-        speak(random_reply(confused))
+    # Normalize target for more robust matching (Whisper often inserts extra words/spaces).
+    t = target.lower().strip()
+    t_compact = t.replace("'", "").replace(" ", "")
+
+    # Folder: close ONLY the active explorer window
+    if ("folder" in t) or ("currentfolder" in t_compact):
+        r.intent = "close_folder"
+        r.act("close_folder", replies={"CLOSED": "Done.", "NOT_ACTIVE": "No folder window is currently active."})
+        return
+
+    # Applications
+    if (
+        ("vscode" in t_compact)
+        or ("visualstudiocode" in t_compact)
+        or ("whatsapp" in t_compact)
+        or ("whatsapp" in t_compact)
+        or ("whatapp" in t_compact)
+        or ("chrome" in t_compact)
+    ):
+        # Choose a canonical app target for the closer.
+        if "chrome" in t_compact:
+            app_target = "chrome"
+        elif "vscode" in t_compact or "visualstudiocode" in t_compact:
+            app_target = "vscode"
+        else:
+            app_target = "whatsapp"
+
+        r.intent = "close_app"
+        r.act("close_app", app_target, replies={"CLOSED": "Done.", "NOT_OPEN": "That is not currently open."})
+        return
+
+    # Website tabs: best-effort only.
+    if (
+        ("youtube" in t_compact) or ("youtu" in t_compact) or ("youtub" in t_compact)
+        or ("facebook" in t_compact) or ("fb" == t_compact)
+        or ("gmail" in t_compact) or ("mailgoogle" in t_compact)
+        or ("repo" in t_compact) or ("github" in t_compact) or ("githu" in t_compact)
+    ):
+        if ("youtube" in t_compact) or ("youtu" in t_compact):
+            web_target = "youtube"
+        elif ("facebook" in t_compact) or (t_compact == "fb"):
+            web_target = "facebook"
+        elif ("gmail" in t_compact) or ("mailgoogle" in t_compact):
+            web_target = "gmail"
+        else:
+            web_target = "repo"
+
+        r.intent = "close_tab"
+        r.act(
+            "close_tab",
+            web_target,
+            replies={
+                "CHROME_NOT_RUNNING": "Chrome is not currently running.",
+                "CLOSED": "Done.",
+                "TAB_NOT_FOUND": "The tab is not currently open.",
+            },
+        )
+        return
+
+    # Anything else with a launcher entry.
+    app = _match_app(f"close {t}", "direct")
+    if app is not None and app.image:
+        r.intent = "close_app"
+        r.act("close_app", app.name, image=app.image, replies={"CLOSED": "Done.", "NOT_OPEN": "That is not currently open."})
+        return
+
+    r.intent = "close_unknown"
+    r.say("I can't close that target.")
+
+
+def _bench_dispatch(rounds: int = 2000) -> None:
+    """Time dispatch() alone: no audio, no subprocesses, no disk writes."""
+    from latency_stats import format_summary, summarize
+
+    commands = [
+        "hi riva open youtube",
+        "open chrome",
+        "open crome",
+        "close whatsapp",
+        "close youtube",
+        "what time is it",
+        "battery",
+        "system status",
+        "who am i",
+        "something unknown",
+    ]
+    memory = {"awake_until": time.time() + 3600}
+    _telemetry().start()  # status commands read the cached reading, as after warm_up()
+    samples: list[float] = []
+    for _ in range(rounds):
+        for c in commands:
+            t0 = time.perf_counter()
+            dispatch(c, require_wake_word=True, memory=memory)
+            samples.append((time.perf_counter() - t0) * 1_000_000.0)
+    print(format_summary("dispatch", summarize(samples), unit="us"))
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv[1:]:
+        _bench_dispatch()
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any
+
+
+# Where Riva keeps small machine-local caches (voice choice, indexes, ...).
+# Override with RIVA_CACHE_DIR.
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".riva", "cache")
+
+
+def cache_dir() -> str:
+    """Return the cache directory, creating it if needed (best-effort)."""
+    d = (os.environ.get("RIVA_CACHE_DIR") or "").strip() or _DEFAULT_CACHE_DIR
+    try:
+        os.makedirs(d, exist_ok=True)
+    except Exception:
+        pass
+    return d
+
+
+def cache_path(name: str) -> str:
+    return os.path.join(cache_dir(), name)
+
+
+def make_key(*parts: Any) -> str:
+    """Build a short invalidation key from JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def load_json(name: str, key: str | None = None) -> Any:
+    """Load a cached JSON payload.
+
+    Returns None if the file is missing, unreadable, or was written with a
+    different invalidation key.
+    """
+    try:
+        with open(cache_path(name), "r", encoding="utf-8") as f:
+            wrapper = json.load(f)
+        if not isinstance(wrapper, dict):
+            return None
+        if key is not None and wrapper.get("key") != key:
+            return None
+        return wrapper.get("data")
+    except Exception:
+        return None
+
+
+def save_json(name: str, data: Any, key: str | None = None) -> bool:
+    """Atomically write a JSON payload to the cache (best-effort)."""
+    path = cache_path(name)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "data": data}, f)
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        if tmp:
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+        return False
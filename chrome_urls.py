@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Iterable
+
+import procexec
+
+
+# Active-tab URLs of every Chrome window, read without touching focus or the
+# clipboard.
+#
+# On Windows, UIAutomationProvider reads the omnibox (the toolbar's Edit
+# control) of all Chrome windows through UI Automation in one PowerShell run,
+# instead of focusing each window and copying its address bar. Providers are
+# pluggable so the scan logic runs anywhere: FakeProvider serves fixed URLs, and
+# the base ChromeUrlProvider (the default off Windows) finds nothing.
+#
+# Chrome shows URLs without "https://" and sometimes without "www.", so match
+# them with substrings such as "youtube.com".
+
+
+class ChromeUrlProvider:
+    """Reads the active-tab URL of Chrome windows; this base one knows none."""
+
+    name = "none"
+
+    def read_urls(self, hwnds: Iterable[int] | None = None) -> dict[int, str]:
+        """hwnd -> omnibox text for every Chrome window (only `hwnds`, if given)."""
+        return {}
+
+
+class UIAutomationProvider(ChromeUrlProvider):
+    name = "uia"
+
+    def read_urls(self, hwnds: Iterable[int] | None = None) -> dict[int, str]:
+        if os.name != "nt":
+            return {}
+        wanted = ",".join(str(int(h)) for h in (hwnds or ()) if h)
+        ps = (
+            "Add-Type -AssemblyName UIAutomationClient; Add-Type -AssemblyName UIAutomationTypes; "
+            f"$hwnds=@({wanted}); "
+            "$AE=[System.Windows.Automation.AutomationElement]; "
+            "$chrome=New-Object System.Windows.Automation.PropertyCondition($AE::ClassNameProperty, 'Chrome_WidgetWin_1'); "
+            "$edit=New-Object System.Windows.Automation.PropertyCondition($AE::ControlTypeProperty, "
+            "[System.Windows.Automation.ControlType]::Edit); "
+            "$out=New-Object System.Collections.Generic.List[object]; "
+            "foreach ($w in $AE::RootElement.FindAll([System.Windows.Automation.TreeScope]::Children, $chrome)) { "
+            "  try { "
+            "    $h=[int64]$w.Current.NativeWindowHandle; "
+            "    if ($hwnds.Count -and -not ($hwnds -contains $h)) { continue }; "
+            "    $p=Get-Process -Id $w.Current.ProcessId -ErrorAction SilentlyContinue; "
+            "    if ($null -eq $p -or $p.ProcessName -ne 'chrome') { continue }; "
+            "    $url=''; $e=$w.FindFirst([System.Windows.Automation.TreeScope]::Descendants, $edit); "
+            "    if ($null -ne $e) { $vp=$null; "
+            "      if ($e.TryGetCurrentPattern([System.Windows.Automation.ValuePattern]::Pattern, [ref]$vp)) { $url=$vp.Current.Value } }; "
+            "    $out.Add([pscustomobject]@{ hwnd=$h; url=$url }) | Out-Null "
+            "  } catch { } "
+            "}; "
+            "ConvertTo-Json -Compress -InputObject @($out)"
+        )
+        try:
+            out = (procexec.check_output(["powershell", "-NoProfile", "-Command", ps]) or "").strip()
+            data = json.loads(out) if out else []
+        except Exception:
+            return {}
+        if isinstance(data, dict):
+            data = [data]
+        urls: dict[int, str] = {}
+        for row in data if isinstance(data, list) else []:
+            if isinstance(row, dict) and row.get("hwnd"):
+                urls[int(row["hwnd"])] = str(row.get("url") or "")
+        return urls
+
+
+class FakeProvider(ChromeUrlProvider):
+    """Fixed hwnd -> URL map; counts reads."""
+
+    name = "fake"
+
+    def __init__(self, urls: dict[int, str] | None = None):
+        self.urls = dict(urls or {})
+        self.reads = 0
+
+    def read_urls(self, hwnds: Iterable[int] | None = None) -> dict[int, str]:
+        self.reads += 1
+        wanted = None if hwnds is None else {int(h) for h in hwnds}
+        return {h: u for h, u in self.urls.items() if wanted is None or h in wanted}
+
+
+def default_provider() -> ChromeUrlProvider:
+    return UIAutomationProvider() if os.name == "nt" else ChromeUrlProvider()
+
+
+def find_tab(
+    provider: ChromeUrlProvider,
+    patterns: Iterable[str],
+    hwnds: Iterable[int] | None = None,
+) -> tuple[int, str] | None:
+    """First Chrome window whose active tab URL contains one of `patterns`, as (hwnd, url)."""
+    patterns = [p.lower() for p in patterns if p]
+    if not patterns:
+        return None
+    for hwnd, url in provider.read_urls(hwnds).items():
+        u = (url or "").lower()
+        if any(p in u for p in patterns):
+            return hwnd, url
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # python chrome_urls.py [pattern]: list Chrome windows' URLs (or the first match).
+    provider = default_provider()
+    t0 = time.perf_counter()
+    if len(sys.argv) > 1:
+        print(json.dumps(find_tab(provider, sys.argv[1:])))
+    else:
+        print(json.dumps(provider.read_urls(), indent=2))
+    print(f"[chrome-urls] {provider.name}: {(time.perf_counter() - t0) * 1000:.1f} ms")
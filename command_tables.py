@@ -0,0 +1,85 @@
+import os
+import re
+from typing import Callable
+
+
+# Per-language command tables: phrasings in another language mapped to the
+# English commands the router understands.
+#
+# Tables live in intents/languages/<code>.txt (Whisper's language codes: bn,
+# hi, ...), one "phrase = command" per line. When the speech layer knows the
+# language of an utterance with enough confidence, only that language's table
+# is applied; English needs none. Without a language (text mode, the server,
+# or a shaky detection) every table is tried in turn until one matches.
+
+# Next to the intent examples, but without importing the classifier (and numpy).
+LANGUAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents", "languages")
+# Below this language confidence, don't trust the detection to pick one table.
+MIN_CONFIDENCE = 0.6
+
+
+class CommandTable:
+    """Rewrites known phrases of one language into English commands, longest phrase first."""
+
+    def __init__(self, language: str, phrases: dict[str, str]):
+        self.language = language
+        self.phrases = dict(phrases)
+        ordered = sorted(self.phrases, key=len, reverse=True)
+        self._re = re.compile(
+            r"(?<![\wঀ-৿])(?:" + "|".join(re.escape(p) for p in ordered) + r")(?![\wঀ-৿])"
+        ) if ordered else None
+
+    def translate(self, command: str) -> str | None:
+        """`command` with every known phrase replaced, or None if none occurs."""
+        if self._re is None or not command:
+            return None
+        out, n = self._re.subn(lambda m: self.phrases[m.group(0)], command)
+        if not n:
+            return None
+        return re.sub(r"\s+", " ", out).strip()
+
+
+def load_tables(normalize: Callable[[str], str], directory: str = LANGUAGES_DIR) -> dict[str, CommandTable]:
+    """language -> CommandTable; phrases go through `normalize` so they match normalized commands."""
+    tables: dict[str, CommandTable] = {}
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".txt"))
+    except Exception:
+        return tables
+    for name in names:
+        language = name[:-4].lower()
+        phrases: dict[str, str] = {}
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#") or "=" not in line:
+                        continue
+                    phrase, command = (part.strip() for part in line.split("=", 1))
+                    phrase = normalize(phrase)
+                    if phrase and command:
+                        phrases[phrase] = command
+        except Exception as e:
+            print(f"[command tables] skipped {name}: {e}")
+            continue
+        if phrases:
+            tables[language] = CommandTable(language, phrases)
+    return tables
+
+
+def translate(
+    tables: dict[str, CommandTable],
+    command: str,
+    language: str | None = None,
+    confidence: float = 0.0,
+) -> tuple[str, str]:
+    """(command in English, language of the table used or "")."""
+    if language and confidence >= MIN_CONFIDENCE:
+        table = tables.get(language)
+        fixed = table.translate(command) if table is not None else None
+        return (fixed, language) if fixed is not None else (command, "")
+    for lang, table in tables.items():
+        fixed = table.translate(command)
+        if fixed is not None:
+            return fixed, lang
+    return command, ""
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Hashable
+
+from actions import Action, Response
+
+
+# Repeat suppression between listen() and the desktop.
+#
+# Whisper sometimes hears one command twice from overlapping captures, and
+# people repeat themselves while Riva is still busy. Two layers catch that:
+#   - commands: a spoken command that repeats the previous one of its session
+#     (same normalized text, same intent) while it still runs or within
+#     RIVA_DEBOUNCE_SEC of it finishing is dropped before anything is said or
+#     done. Only commands that just open things qualify: a question ("what time
+#     is it", "battery"), a prompt or its answer, or anything with another
+#     action always gets its reply;
+#   - actions: an idempotent action (open/close something) identical to one in
+#     flight joins it and reuses its result; one that finished within the window
+#     reuses the result without running again. Any other action on the same
+#     resource (say, "close chrome" after "open chrome") ends that reuse.
+# Counters of everything suppressed are kept (see stats()).
+#
+# The default window covers one 7-second listen cycle plus transcription.
+
+_DEFAULT_WINDOW_SEC = 10.0
+_MAX_JOIN_WAIT_SEC = 15.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "finished", "resource")
+
+    def __init__(self, resource: Hashable):
+        self.done = threading.Event()
+        self.result = ""
+        self.finished = 0.0
+        self.resource = resource
+
+
+class Debouncer:
+    def __init__(
+        self,
+        idempotent: set[str] | frozenset[str] = frozenset(),
+        window_sec: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        resource: Callable[[Action], Hashable] | None = None,
+        repeatable: set[str] | frozenset[str] | None = None,
+    ):
+        self.idempotent = frozenset(idempotent)
+        # Action kinds a dropped repeat command may consist of (default: the idempotent ones).
+        self.repeatable = self.idempotent if repeatable is None else frozenset(repeatable)
+        self.resource = resource or (lambda a: a.resource or a.kind)
+        self.window = _env_float("RIVA_DEBOUNCE_SEC", _DEFAULT_WINDOW_SEC) if window_sec is None else window_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+        # scope -> (command, intent, finish time or None while running)
+        self._last: dict[str, tuple[str, str, float | None]] = {}
+        self._actions: dict[Hashable, _InFlight] = {}
+        self.suppressed_commands: Counter[str] = Counter()
+        self.merged_actions: Counter[str] = Counter()
+        self.reused_results: Counter[str] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _prune(self, now: float) -> None:
+        horizon = now - self.window
+        for k, e in list(self._actions.items()):
+            if e.done.is_set() and e.finished < horizon:
+                del self._actions[k]
+
+    # --- commands
+
+    def _repeatable(self, response: Response) -> bool:
+        # Setting or clearing pending_action means a prompt or an answer to one.
+        return (
+            bool(response.actions)
+            and all(a.kind in self.repeatable for a in response.actions)
+            and "pending_action" not in response.state
+        )
+
+    def begin_command(self, scope: str, command: str, response: Response) -> bool:
+        """Register a dispatched command; False if it repeats one still running or just finished."""
+        if not self.enabled or not command or response.exit or not (response.utterances or response.actions):
+            return True
+        with self._lock:
+            now = self.clock()
+            last = self._last.get(scope)
+            if last is not None and last[:2] == (command, response.intent) and self._repeatable(response):
+                finished = last[2]
+                if finished is None or now - finished < self.window:
+                    self.suppressed_commands[response.intent] += 1
+                    return False
+            self._last[scope] = (command, response.intent, None)
+            return True
+
+    def end_command(self, scope: str, command: str, response: Response) -> None:
+        with self._lock:
+            last = self._last.get(scope)
+            if last is not None and last[:2] == (command, response.intent):
+                self._last[scope] = (command, response.intent, self.clock())
+
+    # --- actions
+
+    def action_key(self, action: Action) -> Hashable | None:
+        if action.kind not in self.idempotent:
+            return None
+        urls = tuple(action.args.get("urls") or ())
+        return (action.kind, action.target, urls)
+
+    def run_action(self, action: Action, run: Callable[[Action], str]) -> str:
+        """Run `action`, or merge it into an identical one running or just finished."""
+        key = self.action_key(action) if self.enabled else None
+        if key is None:
+            return run(action)
+        resource = self.resource(action)
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            entry = self._actions.get(key)
+            if entry is None:
+                for k, e in list(self._actions.items()):
+                    if e.resource == resource and e.done.is_set():
+                        del self._actions[k]
+                mine = self._actions[key] = _InFlight(resource)
+            else:
+                mine = None
+                if entry.done.is_set():
+                    self.reused_results[action.kind] += 1
+                else:
+                    self.merged_actions[action.kind] += 1
+        if mine is None:
+            assert entry is not None
+            entry.done.wait(_MAX_JOIN_WAIT_SEC)
+            return entry.result or "OK"
+        try:
+            mine.result = run(action)
+            return mine.result
+        finally:
+            with self._lock:
+                mine.finished = self.clock()
+            mine.done.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "window_sec": self.window,
+                "suppressed_commands": dict(self.suppressed_commands),
+                "merged_actions": dict(self.merged_actions),
+                "reused_results": dict(self.reused_results),
+            }
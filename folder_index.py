@@ -0,0 +1,412 @@
+import bisect
+import fnmatch
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import cache
+from fuzzy import levenshtein
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except Exception:  # pragma: no cover
+    FileSystemEventHandler = object  # type: ignore[assignment,misc]
+    Observer = None
+
+
+# Folders Riva can open by name ("open my project folder", "open downloads").
+#
+# A background thread walks the configured roots (RIVA_FOLDER_ROOTS, default the
+# home folder) down to RIVA_FOLDER_MAX_DEPTH, skipping hidden folders and
+# RIVA_FOLDER_EXCLUDE patterns. Each scanned folder's mtime and subfolder names
+# are kept, so a refresh is one stat() per folder and only changed folders are
+# listed again. Refreshes run every few minutes, or shortly after a change when
+# the optional `watchdog` package is installed.
+#
+# The tree is cached on disk as [parent row, name, mtime] rows. Queries go
+# through a sorted token index (prefix ranges via bisect, edit-distance
+# fallback for misheard words), so they never touch the disk.
+
+_INDEX_VERSION = 1
+_CACHE_FILE = "folders.json"
+_DEFAULT_MAX_DEPTH = 5
+_MAX_FOLDERS = 200_000
+_RESCAN_SEC = 300.0
+_WATCH_DEBOUNCE_SEC = 2.0
+# How long a lookup waits for the cached index to load (or the first scan) at startup.
+_READY_WAIT_SEC = 1.0
+_DEFAULT_EXCLUDE = (
+    "node_modules", "__pycache__", "site-packages", "venv", "AppData", "Application Data",
+    "$Recycle.Bin", "Library", "snap", "go", "Temp", "tmp",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_QUERY_PREFIX_RE = re.compile(r"^(?:open|show|go to|browse)\s+")
+_FILLER = {
+    "the", "my", "a", "folder", "folders", "directory", "dir", "please", "called", "named",
+    "in", "explorer", "file", "files", "current", "this", "me", "up",
+}
+
+
+def tokenize(name: str) -> list[str]:
+    return _TOKEN_RE.findall(_CAMEL_RE.sub(r"\1 \2", name or "").lower().replace("'", ""))
+
+
+def query_phrase(command: str) -> str:
+    """The folder part of "open my project folder" -> "project"."""
+    text = _QUERY_PREFIX_RE.sub("", (command or "").lower().strip())
+    return " ".join(t for t in tokenize(text) if t not in _FILLER)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return int(raw) if raw else default
+    except Exception:
+        return default
+
+
+def default_roots() -> list[str]:
+    raw = (os.environ.get("RIVA_FOLDER_ROOTS") or "").strip()
+    roots = [p for p in raw.split(os.pathsep) if p.strip()] if raw else [os.path.expanduser("~")]
+    return list(dict.fromkeys(os.path.normpath(os.path.expanduser(r)) for r in roots))
+
+
+def default_excludes() -> list[str]:
+    raw = (os.environ.get("RIVA_FOLDER_EXCLUDE") or "").strip()
+    return list(_DEFAULT_EXCLUDE) + [p.strip() for p in raw.split(",") if p.strip()]
+
+
+@dataclass(frozen=True)
+class FolderMatch:
+    name: str
+    path: str
+    score: float
+    # Every query word matched a whole word of the folder name, and nothing else is in it.
+    exact: bool
+
+
+class _Tree:
+    """Folder names and paths with a token prefix index over the names."""
+
+    def __init__(self, dirs: dict[str, list[Any]]):
+        paths: list[str] = []
+        depths: list[int] = []
+        seen: set[str] = set()
+        for path, (_, subdirs, depth) in dirs.items():
+            for p, d in [(path, depth)] + [(os.path.join(path, s), depth + 1) for s in subdirs]:
+                if p not in seen:
+                    seen.add(p)
+                    paths.append(p)
+                    depths.append(d)
+        self.paths = paths
+        self.depths = depths
+        self.names = [os.path.basename(p.rstrip("\\/")) or p for p in paths]
+        self.name_tokens = [tuple(dict.fromkeys(tokenize(n))) for n in self.names]
+        postings: dict[str, list[int]] = {}
+        for fid, toks in enumerate(self.name_tokens):
+            for tok in toks:
+                postings.setdefault(tok, []).append(fid)
+        self.tokens = sorted(postings)
+        self.postings = [postings[t] for t in self.tokens]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _matches(self, qtok: str) -> dict[int, float]:
+        """folder id -> quality of the best name token matching `qtok`."""
+        out: dict[int, float] = {}
+        lo = bisect.bisect_left(self.tokens, qtok)
+        if len(qtok) < 2:
+            hi = lo + 1 if lo < len(self.tokens) and self.tokens[lo] == qtok else lo
+        else:
+            hi = bisect.bisect_left(self.tokens, qtok + "\uffff", lo)
+        hits = [(i, 1.0 if self.tokens[i] == qtok else 0.5 + 0.4 * len(qtok) / len(self.tokens[i]))
+                for i in range(lo, hi)]
+        if not hits and len(qtok) >= 4:
+            # Misheard word: same first letter, within 1-2 edits.
+            limit = 1 if len(qtok) <= 5 else 2
+            lo = bisect.bisect_left(self.tokens, qtok[0])
+            hi = bisect.bisect_left(self.tokens, qtok[0] + "\uffff", lo)
+            for i in range(lo, hi):
+                tok = self.tokens[i]
+                if abs(len(tok) - len(qtok)) <= limit:
+                    dist = levenshtein(qtok, tok, limit=limit)
+                    if dist <= limit:
+                        hits.append((i, 0.75 - 0.1 * dist))
+        for i, quality in hits:
+            for fid in self.postings[i]:
+                if quality > out.get(fid, 0.0):
+                    out[fid] = quality
+        return out
+
+    def search(self, phrase: str, limit: int = 3) -> list[FolderMatch]:
+        qtoks = list(dict.fromkeys(tokenize(phrase)))
+        if not qtoks or not self.tokens:
+            return []
+        per_token = sorted((self._matches(t) for t in qtoks), key=len)
+        scored: list[tuple[float, bool, int]] = []
+        for fid, q0 in per_token[0].items():
+            qualities = [q0]
+            for m in per_token[1:]:
+                q = m.get(fid)
+                if q is None:
+                    break
+                qualities.append(q)
+            else:
+                coverage = len(qtoks) / max(len(self.name_tokens[fid]), 1)
+                exact = min(qualities) == 1.0 and coverage >= 1.0
+                score = sum(qualities) / len(qualities) + 0.2 * min(1.0, coverage) - 0.02 * self.depths[fid]
+                scored.append((score, exact, fid))
+        scored.sort(key=lambda x: (-x[0], len(self.paths[x[2]])))
+        return [FolderMatch(self.names[fid], self.paths[fid], round(score, 4), exact) for score, exact, fid in scored[:limit]]
+
+
+class _ChangeHandler(FileSystemEventHandler):  # type: ignore[misc,valid-type]
+    def __init__(self, index: "FolderIndex"):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event: Any) -> None:
+        if not getattr(event, "is_directory", False):
+            return
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if any(p and self.index._watched(os.fsdecode(p)) for p in paths):
+            self.index._changed.set()
+
+
+class FolderIndex:
+    """Background-built, disk-cached index of folder names under the configured roots."""
+
+    def __init__(
+        self,
+        roots: Iterable[str] | None = None,
+        excludes: Iterable[str] | None = None,
+        max_depth: int | None = None,
+        cache_file: str | None = _CACHE_FILE,
+    ):
+        self.roots = list(default_roots() if roots is None else roots)
+        self.excludes = list(default_excludes() if excludes is None else excludes)
+        self.max_depth = _env_int("RIVA_FOLDER_MAX_DEPTH", _DEFAULT_MAX_DEPTH) if max_depth is None else max_depth
+        self.cache_file = cache_file
+        # scanned folder -> [mtime_ns, subfolder names, depth]
+        self._dirs: dict[str, list[Any]] = {}
+        self._tree: _Tree | None = None
+        self._thread: threading.Thread | None = None
+        self._changed = threading.Event()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._observer: Any = None
+        self.last_refresh_ms = 0.0
+
+    def _key(self) -> str:
+        return cache.make_key("folders", _INDEX_VERSION, self.roots, self.excludes, self.max_depth)
+
+    def _excluded(self, name: str) -> bool:
+        if name.startswith("."):
+            return True
+        return any(fnmatch.fnmatch(name, pat) for pat in self.excludes)
+
+    def _watched(self, path: str) -> bool:
+        """Whether a change at `path` can alter the index: under a root, within
+        max_depth, and with no hidden or excluded folder on the way."""
+        path = os.path.normpath(path)
+        for root in self.roots:
+            try:
+                rel = os.path.relpath(path, root)
+            except ValueError:  # another drive
+                continue
+            if rel == os.curdir:
+                return True
+            parts = rel.split(os.sep)
+            if parts[0] == os.pardir:
+                continue
+            if len(parts) <= self.max_depth and not any(self._excluded(p) for p in parts):
+                return True
+        return False
+
+    def _list_subdirs(self, path: str) -> list[str]:
+        subdirs: list[str] = []
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False) and not self._excluded(e.name):
+                        subdirs.append(e.name)
+                except OSError:
+                    continue
+        return sorted(subdirs)
+
+    # --- persistence
+
+    def _encode(self) -> list[list[Any]]:
+        rows: list[list[Any]] = []
+        row_of: dict[str, int] = {}
+        for path, (mtime, subdirs, depth) in self._dirs.items():
+            if path not in row_of:
+                parent = os.path.dirname(path)
+                row_of[path] = len(rows)
+                rows.append([row_of.get(parent, -1), path if parent not in row_of else os.path.basename(path), mtime])
+            else:
+                rows[row_of[path]][2] = mtime
+            for name in subdirs:
+                child = os.path.join(path, name)
+                if child not in row_of:
+                    row_of[child] = len(rows)
+                    rows.append([row_of[path], name, None])
+        return rows
+
+    def _decode(self, rows: list[list[Any]]) -> dict[str, list[Any]]:
+        paths: list[str] = []
+        depths: list[int] = []
+        dirs: dict[str, list[Any]] = {}
+        for parent, name, mtime in rows:
+            path = name if parent < 0 else os.path.join(paths[parent], name)
+            depth = 0 if parent < 0 else depths[parent] + 1
+            paths.append(path)
+            depths.append(depth)
+            if mtime is not None:
+                dirs[path] = [mtime, [], depth]
+            if parent >= 0 and paths[parent] in dirs:
+                dirs[paths[parent]][1].append(name)
+        return dirs
+
+    def _load(self) -> None:
+        if self.cache_file is None:
+            return
+        rows = cache.load_json(self.cache_file, key=self._key())
+        if isinstance(rows, list):
+            try:
+                self._dirs = self._decode(rows)
+                self._tree = _Tree(self._dirs)
+            except Exception:
+                self._dirs = {}
+
+    # --- scanning
+
+    def refresh(self) -> bool:
+        """Re-list folders whose mtime changed; returns True if anything did."""
+        started = time.perf_counter()
+        old = self._dirs
+        new: dict[str, list[Any]] = {}
+        changed = False
+        stack = [(root, 0) for root in reversed(self.roots)]
+        while stack and len(new) < _MAX_FOLDERS:
+            path, depth = stack.pop()
+            if path in new or depth >= self.max_depth:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = old.get(path)
+            if cached is not None and cached[0] == mtime:
+                subdirs = cached[1]
+            else:
+                try:
+                    subdirs = self._list_subdirs(path)
+                except OSError:
+                    continue
+                changed = True
+            new[path] = [mtime, subdirs, depth]
+            stack.extend((os.path.join(path, d), depth + 1) for d in reversed(subdirs))
+        changed = changed or set(new) != set(old)
+        if changed or self._tree is None:
+            self._dirs = new
+            self._tree = _Tree(new)
+            if changed and self.cache_file is not None:
+                cache.save_json(self.cache_file, self._encode(), key=self._key())
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000.0
+        return changed
+
+    def _watch(self) -> None:
+        if Observer is None:
+            return
+        try:
+            observer = Observer()
+            handler = _ChangeHandler(self)
+            for root in self.roots:
+                if os.path.isdir(root):
+                    observer.schedule(handler, root, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            print(f"[folders] change notifications unavailable: {e}")
+
+    def _run(self) -> None:
+        self._load()
+        if self._tree is not None:
+            self._ready.set()
+        self._watch()
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[folders] rescan failed: {e}")
+            self._ready.set()
+            self._changed.wait(_RESCAN_SEC)
+            if self._changed.is_set():
+                # Let a burst of changes (unzip, git checkout) settle first.
+                self._stop.wait(_WATCH_DEBOUNCE_SEC)
+                self._changed.clear()
+
+    def start(self) -> "FolderIndex":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="riva-folder-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._changed.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+
+    def ready(self) -> bool:
+        return self._tree is not None
+
+    def __len__(self) -> int:
+        tree = self._tree
+        return len(tree) if tree is not None else 0
+
+    def lookup(self, command: str) -> FolderMatch | None:
+        """Best folder for the command; None while a first scan (no cache yet) is still running."""
+        self.start()
+        self._ready.wait(_READY_WAIT_SEC)
+        tree = self._tree
+        phrase = query_phrase(command)
+        if tree is None or not phrase:
+            return None
+        matches = tree.search(phrase, limit=1)
+        return matches[0] if matches else None
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # python folder_index.py [name...]: build/refresh the index and resolve a name.
+    index = FolderIndex()
+    t0 = time.perf_counter()
+    index._load()
+    load_ms = (time.perf_counter() - t0) * 1000.0
+    changed = index.refresh()
+    print(f"[folders] {len(index)} folders; cache load {load_ms:.0f} ms, refresh {index.last_refresh_ms:.0f} ms"
+          f" ({'changed' if changed else 'unchanged'})")
+    index.refresh()
+    print(f"[folders] incremental refresh: {index.last_refresh_ms:.0f} ms")
+    if len(sys.argv) > 1:
+        tree = index._tree
+        assert tree is not None
+        t0 = time.perf_counter()
+        found = tree.search(query_phrase("open " + " ".join(sys.argv[1:])), limit=5)
+        print(f"[folders] query: {(time.perf_counter() - t0) * 1000:.2f} ms")
+        print(json.dumps([m.__dict__ for m in found], indent=2))
@@ -0,0 +1,303 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+
+# Confidence bands for CommandMatcher.classify().
+DIRECT_SCORE = 0.80
+DIRECT_MARGIN = 0.10
+CONFIRM_SCORE = 0.55
+
+# Deletion-neighbourhood depth per token length (SymSpell-style).
+_MAX_EDITS_SHORT = 1
+_MAX_EDITS_LONG = 2
+_LONG_TOKEN_LEN = 5
+
+# Tokens shared by more than ~2*sqrt(N) phrases (like "open") are skipped for
+# candidate generation (they still count when scoring), unless nothing rarer matched.
+_COMMON_TOKEN_FACTOR = 2.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower().replace("'", ""))
+
+
+def phonetic_key(word: str) -> str:
+    """Small Metaphone-like key so "crome"/"chrome" or "fone"/"phone" collide."""
+    w = re.sub(r"[^a-z]", "", (word or "").lower())
+    if not w:
+        return ""
+    for src, dst in (
+        ("tch", "x"), ("sch", "sk"), ("ph", "f"), ("ck", "k"), ("chr", "kr"),
+        ("ch", "x"), ("sh", "x"), ("gh", "g"), ("wh", "w"), ("th", "0"),
+        ("qu", "kw"), ("q", "k"), ("x", "ks"), ("z", "s"), ("c", "k"), ("v", "f"),
+    ):
+        w = w.replace(src, dst)
+    first, rest = w[0], w[1:]
+    rest = re.sub(r"[aeiouyhw]", "", rest)
+    out = [first]
+    for ch in rest:
+        if ch != out[-1]:
+            out.append(ch)
+    return "".join(out)
+
+
+def levenshtein(a: str, b: str, limit: int | None = None) -> int:
+    """Edit distance; stops early (returning limit + 1) once it exceeds `limit`."""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(v)
+            if v < best:
+                best = v
+        if limit is not None and best > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def _deletes(word: str, depth: int) -> set[str]:
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        nxt: set[str] = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def _max_edits(word: str) -> int:
+    return _MAX_EDITS_LONG if len(word) >= _LONG_TOKEN_LEN else _MAX_EDITS_SHORT
+
+
+@dataclass(frozen=True)
+class Match:
+    command: str
+    phrase: str
+    score: float
+    margin: float
+
+
+class CommandMatcher:
+    """Map a noisy transcript to the closest canonical command.
+
+    Built once from (phrase, command) pairs into:
+    - a token deletion-neighbourhood index (edit-distance candidates in O(1) lookups),
+    - a phonetic-key index per token,
+    - token -> phrase postings.
+
+    A query corrects each of its tokens (and adjacent pairs, for "you tube" /
+    "vs code" style splits) against the token index, then scores only the
+    phrases that share a reasonably rare token.
+    """
+
+    def __init__(self, vocabulary: Iterable[tuple[str, str]]):
+        self.phrases: list[tuple[str, ...]] = []
+        self._phrase_tids: list[tuple[int, ...]] = []
+        self.commands: list[str] = []
+        self.phrase_text: list[str] = []
+        self._token_ids: dict[str, int] = {}
+        self._tokens: list[str] = []
+        self._postings: list[list[int]] = []
+        seen: set[tuple[tuple[str, ...], str]] = set()
+
+        for phrase, command in vocabulary:
+            toks = tuple(tokenize(phrase))
+            if not toks or (toks, command) in seen:
+                continue
+            seen.add((toks, command))
+            pid = len(self.phrases)
+            self.phrases.append(toks)
+            self.commands.append(command)
+            self.phrase_text.append(" ".join(toks))
+            for tok in set(toks):
+                tid = self._token_ids.get(tok)
+                if tid is None:
+                    tid = len(self._tokens)
+                    self._token_ids[tok] = tid
+                    self._tokens.append(tok)
+                    self._postings.append([])
+                self._postings[tid].append(pid)
+
+        self._phrase_tids = [tuple(self._token_ids[t] for t in toks) for toks in self.phrases]
+
+        self._deletes: dict[str, list[int]] = {}
+        self._phonetic: dict[str, list[int]] = {}
+        for tid, tok in enumerate(self._tokens):
+            for d in _deletes(tok, _max_edits(tok)):
+                self._deletes.setdefault(d, []).append(tid)
+            key = phonetic_key(tok)
+            if key:
+                self._phonetic.setdefault(key, []).append(tid)
+
+        self._common_limit = max(16, int(math.sqrt(len(self.phrases)) * _COMMON_TOKEN_FACTOR))
+        self._correction_cache: dict[tuple[str, int | None], tuple[tuple[int, float], ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _correct(self, word: str, max_edits: int | None = None) -> tuple[tuple[int, float], ...]:
+        """Vocabulary tokens close to `word`, with similarity in 0..1 (memoized)."""
+        cache_key = (word, max_edits)
+        cached = self._correction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        exact = self._token_ids.get(word)
+        if exact is not None:
+            result: tuple[tuple[int, float], ...] = ((exact, 1.0),)
+        else:
+            if max_edits is None:
+                max_edits = _max_edits(word)
+            candidates: set[int] = set()
+            for d in _deletes(word, max_edits):
+                candidates.update(self._deletes.get(d, ()))
+            key = phonetic_key(word)
+            phonetic_hits = set(self._phonetic.get(key, ())) if key else set()
+            candidates |= phonetic_hits
+
+            scored: list[tuple[int, float]] = []
+            for tid in candidates:
+                tok = self._tokens[tid]
+                dist = levenshtein(word, tok, limit=max_edits + 1)
+                sim = 1.0 - dist / max(len(word), len(tok))
+                if tid in phonetic_hits:
+                    sim = max(sim, 0.0) * 0.5 + 0.5
+                if sim >= 0.5:
+                    scored.append((tid, round(sim, 4)))
+            scored.sort(key=lambda x: -x[1])
+            result = tuple(scored[:4])
+
+        if len(self._correction_cache) > 4096:
+            self._correction_cache.clear()
+        self._correction_cache[cache_key] = result
+        return result
+
+    def search(self, text: str, limit: int = 3) -> list[Match]:
+        """Best matches (one per command), highest score first."""
+        qtoks = tokenize(text)
+        if not qtoks:
+            return []
+
+        matched: dict[int, float] = {}
+        for w in qtoks:
+            for tid, sim in self._correct(w):
+                if sim > matched.get(tid, 0.0):
+                    matched[tid] = sim
+        # Let "you tube" match "youtube" and "vs code" match "vscode" (one edit at most).
+        for a, b in zip(qtoks, qtoks[1:]):
+            for tid, sim in self._correct(a + b, max_edits=1):
+                if sim > matched.get(tid, 0.0):
+                    matched[tid] = sim
+        if not matched:
+            return []
+
+        rare = [tid for tid in matched if len(self._postings[tid]) <= self._common_limit]
+        seeds = rare or list(matched)
+        candidates: set[int] = set()
+        for tid in seeds:
+            candidates.update(self._postings[tid])
+
+        get = matched.get
+        best: dict[str, tuple[float, int]] = {}
+        qlen = len(qtoks)
+        for pid in candidates:
+            tids = self._phrase_tids[pid]
+            hit = 0.0
+            for tid in tids:
+                hit += get(tid, 0.0)
+            recall = hit / len(tids)
+            precision = min(1.0, hit / qlen)
+            score = 0.75 * recall + 0.25 * precision
+            cmd = self.commands[pid]
+            if score > best.get(cmd, (0.0, -1))[0]:
+                best[cmd] = (score, pid)
+
+        ranked = sorted(best.items(), key=lambda kv: -kv[1][0])[: max(1, limit) + 1]
+        out: list[Match] = []
+        for i, (cmd, (score, pid)) in enumerate(ranked[:limit]):
+            runner_up = ranked[i + 1][1][0] if i + 1 < len(ranked) else 0.0
+            out.append(Match(command=cmd, phrase=self.phrase_text[pid], score=round(score, 4), margin=round(score - runner_up, 4)))
+        return out
+
+    def classify(self, text: str) -> tuple[str, Match | None]:
+        """Return ("direct" | "confirm" | "none", best_match)."""
+        matches = self.search(text, limit=1)
+        if not matches:
+            return "none", None
+        m = matches[0]
+        if m.score >= DIRECT_SCORE and m.margin >= DIRECT_MARGIN:
+            return "direct", m
+        if m.score >= CONFIRM_SCORE:
+            return "confirm", m
+        return "none", m
+
+
+def _bench(n_phrasings: int = 5000, queries: int = 20000) -> None:
+    """python fuzzy.py [n_phrasings]: build a large synthetic index and time lookups."""
+    import random
+    import time
+
+    from latency_stats import format_summary, summarize
+
+    rng = random.Random(7)
+    verbs = ["open", "close", "start", "launch", "show", "check", "play", "find"]
+    objects = [f"{rng.choice('bcdfghklmnprstvz')}{rng.choice('aeiou')}{rng.choice('bcdfgklmnprst')}"
+               f"{rng.choice('aeiou')}{rng.choice('bcdfgklmnprstz')}{i}" for i in range(n_phrasings // 4)]
+    fillers = ["", "please", "the", "my", "now", "for me"]
+    vocab = []
+    while len(vocab) < n_phrasings:
+        obj = rng.choice(objects)
+        verb = rng.choice(verbs)
+        vocab.append((f"{verb} {rng.choice(fillers)} {obj}".strip(), f"{verb} {obj}"))
+
+    t0 = time.perf_counter()
+    matcher = CommandMatcher(vocab)
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    def noisy(phrase: str) -> str:
+        chars = list(phrase)
+        for _ in range(rng.randint(0, 2)):
+            i = rng.randrange(len(chars))
+            op = rng.random()
+            if op < 0.33:
+                del chars[i]
+            elif op < 0.66:
+                chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            else:
+                chars.insert(i, rng.choice("aeiou"))
+        return "".join(chars)
+
+    samples: list[float] = []
+    correct = 0
+    for _ in range(queries):
+        phrase, cmd = rng.choice(vocab)
+        q = noisy(phrase)
+        t = time.perf_counter()
+        res = matcher.search(q, limit=1)
+        samples.append((time.perf_counter() - t) * 1_000_000.0)
+        if res and res[0].command == cmd:
+            correct += 1
+    print(f"[fuzzy] {len(matcher)} phrasings indexed in {build_ms:.0f} ms; top-1 accuracy {correct / queries:.1%}")
+    print(format_summary("[fuzzy] lookup", summarize(samples), unit="us"))
+
+
+if __name__ == "__main__":
+    import sys
+
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,109 @@
+import sys
+import threading
+import time
+from typing import Any
+
+
+class ImportProfiler:
+    """Record how long each module takes to import (like `python -X importtime`).
+
+    Installs a meta path finder that wraps each module loader's `exec_module`,
+    so both `import x` statements and `importlib.import_module()` calls are seen.
+    Times are tracked per thread so background warm-up imports don't skew the
+    main thread's numbers.
+    """
+
+    def __init__(self):
+        self.records: list[dict[str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._installed = False
+
+    # --- meta path hook -------------------------------------------------
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            try:
+                spec = finder.find_spec(fullname, path, target)
+            except Exception:
+                continue
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Only wrap per-module loader instances (source/extension files).
+            # Class-level loaders like BuiltinImporter are shared and fast.
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, "__dict__"):
+                self._wrap(loader, fullname)
+            return spec
+        return None
+
+    def _wrap(self, loader, fullname: str) -> None:
+        original = loader.exec_module
+        if getattr(original, "_riva_profiled", False):
+            return
+
+        def exec_module(module):
+            stack = self._stack()
+            stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                original(module)
+            finally:
+                total = time.perf_counter() - t0
+                children = stack.pop()
+                if stack:
+                    stack[-1] += total
+                with self._lock:
+                    self.records.append(
+                        {
+                            "module": fullname,
+                            "self_ms": (total - children) * 1000.0,
+                            "cumulative_ms": total * 1000.0,
+                            "depth": len(stack),
+                            "thread": threading.current_thread().name,
+                        }
+                    )
+
+        exec_module._riva_profiled = True  # type: ignore[attr-defined]
+        loader.exec_module = exec_module
+
+    def _stack(self) -> list[float]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    # --- lifecycle ------------------------------------------------------
+    def install(self) -> "ImportProfiler":
+        if not self._installed:
+            sys.meta_path.insert(0, self)
+            self._installed = True
+        return self
+
+    def uninstall(self) -> None:
+        if self._installed:
+            try:
+                sys.meta_path.remove(self)
+            except ValueError:
+                pass
+            self._installed = False
+
+    def report(self, top: int = 25, file=None) -> None:
+        """Print the slowest imports (by self time) and top-level totals."""
+        out = file or sys.stderr
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            print("[import-profile] no imports recorded", file=out)
+            return
+
+        top_level = [r for r in records if r["depth"] == 0]
+        total_ms = sum(r["cumulative_ms"] for r in top_level)
+        print(f"[import-profile] {len(records)} modules, {total_ms:.1f} ms total", file=out)
+        print(f"{'self ms':>10} {'cumul ms':>10}  module", file=out)
+        for r in sorted(records, key=lambda r: r["self_ms"], reverse=True)[:top]:
+            indent = "  " * min(r["depth"], 8)
+            thread = "" if r["thread"] == "MainThread" else f"  [{r['thread']}]"
+            print(f"{r['self_ms']:>10.1f} {r['cumulative_ms']:>10.1f}  {indent}{r['module']}{thread}", file=out)
@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+import cache
+
+
+# Examples live in intents/<intent>.txt: one phrasing per line, plus a
+# "# command: <canonical command>" header naming what the literal router runs.
+#
+# intents/none.txt is the background class: requests Riva can't do that look
+# like ones it can ("turn off the lights", "what is the date"). Its phrasings
+# share no theme, so instead of one averaged centroid each is its own row, and
+# its score is the mean of its _BACKGROUND_K best rows (a k-nearest-neighbour
+# reject: one near-identical sentence alone doesn't outvote an intent). When it
+# scores highest, nothing runs.
+INTENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents")
+BACKGROUND_INTENT = "none"
+
+_MODEL_VERSION = 2
+_BACKGROUND_K = 3
+_DIMS = 1 << 12
+_NGRAM_SIZES = (2, 3, 4)
+
+# Cosine-similarity bands against the intent centroids (IDF-weighted, so lower
+# than raw n-gram cosines). Set from the leave-one-out run in _bench()
+# (`python intent_classifier.py`): no held-out example goes to a wrong intent,
+# and at most one background example gets through. Below DIRECT_MARGIN, a
+# match is only confirmed.
+DIRECT_SCORE = 0.50
+DIRECT_MARGIN = 0.10
+CONFIRM_SCORE = 0.50
+
+_COMMAND_RE = re.compile(r"^#\s*command\s*:\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def _numpy() -> Any:
+    """numpy, imported on first use (importing brain shouldn't pay for it), or None."""
+    try:
+        import numpy  # type: ignore
+
+        return numpy
+    except Exception:  # pragma: no cover
+        return None
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    intent: str
+    command: str
+    score: float
+    margin: float
+
+
+def _features(text: str) -> list[int]:
+    """Hashed character n-grams of each word (padded with spaces)."""
+    words = re.findall(r"[a-z0-9']+", (text or "").lower())
+    idx: list[int] = []
+    for w in words:
+        padded = f" {w} "
+        for n in _NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                idx.append(zlib.crc32(padded[i:i + n].encode("utf-8")) & (_DIMS - 1))
+        # Whole words too, so exact vocabulary carries extra weight.
+        idx.append(zlib.crc32(f"w:{w}".encode("utf-8")) & (_DIMS - 1))
+    return idx
+
+
+def _counts(texts: list[str]):
+    np = _numpy()
+    out = np.zeros((len(texts), _DIMS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        idx = _features(text)
+        if idx:
+            out[row] = np.bincount(idx, minlength=_DIMS)
+    return out
+
+
+def idf_weights(texts: list[str]):
+    """Smoothed inverse document frequency of each feature over `texts`.
+
+    N-grams every intent shares ("what", "the", "my") would otherwise dominate
+    the cosine and make unrelated sentences look alike.
+    """
+    np = _numpy()
+    df = (_counts(texts) > 0).sum(axis=0)
+    return (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def vectorize(texts: list[str], weights=None):
+    """(len(texts), _DIMS) float32 matrix of L2-normalized, log-scaled (and weighted) n-gram counts."""
+    np = _numpy()
+    out = _counts(texts)
+    np.log1p(out, out=out)
+    if weights is not None:
+        out *= weights
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out /= norms
+    return out
+
+
+def load_examples(directory: str = INTENTS_DIR) -> dict[str, tuple[str, list[str]]]:
+    """intent -> (canonical command, example phrasings)."""
+    examples: dict[str, tuple[str, list[str]]] = {}
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".txt"))
+    except Exception:
+        return examples
+    for name in names:
+        intent = name[:-4]
+        command = intent.replace("_", " ")
+        lines: list[str] = []
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            for raw in f:
+                line = raw.strip()
+                if not line:
+                    continue
+                m = _COMMAND_RE.match(line)
+                if m:
+                    command = m.group(1).strip().lower()
+                    continue
+                if line.startswith("#"):
+                    continue
+                lines.append(line.lower())
+        if lines:
+            examples[intent] = (command, lines)
+    return examples
+
+
+class IntentClassifier:
+    """Nearest-centroid paraphrase classifier over hashed character n-grams.
+
+    Features are weighted by inverse document frequency over all examples.
+    Training averages each intent's example vectors into one row of a compact
+    (n_rows x 4096) float32 matrix (background examples get a row each), which
+    is cached on disk and memory-mapped on load. Prediction is one
+    vectorization plus one matrix-vector product.
+    """
+
+    def __init__(self, labels: list[str], commands: list[str], centroids, weights=None):
+        self.labels = labels
+        self.commands = commands
+        self.centroids = centroids
+        self.weights = weights
+        self._background = [i for i, label in enumerate(labels) if label == BACKGROUND_INTENT]
+
+    @classmethod
+    def train(cls, examples: dict[str, tuple[str, list[str]]]) -> "IntentClassifier":
+        np = _numpy()
+        weights = idf_weights([line for _, lines in examples.values() for line in lines])
+        labels: list[str] = []
+        commands: list[str] = []
+        rows = []
+        for label in sorted(examples):
+            command, lines = examples[label]
+            vectors = vectorize(lines, weights)
+            if label != BACKGROUND_INTENT:
+                centroid = vectors.mean(axis=0)
+                norm = float(np.linalg.norm(centroid))
+                vectors = (centroid / norm if norm else centroid)[None, :]
+            labels += [label] * len(vectors)
+            commands += [command] * len(vectors)
+            rows.append(vectors)
+        centroids = np.concatenate(rows).astype(np.float32) if rows else np.zeros((0, _DIMS), dtype=np.float32)
+        return cls(labels, commands, centroids, weights)
+
+    @classmethod
+    def load(cls, directory: str = INTENTS_DIR) -> "IntentClassifier | None":
+        """Load the cached model (memory-mapped), retraining if the examples changed."""
+        np = _numpy()
+        if np is None:
+            return None
+        examples = load_examples(directory)
+        if not examples:
+            return None
+
+        key = cache.make_key("intents", _MODEL_VERSION, _DIMS, _NGRAM_SIZES, sorted(examples.items()))
+        meta = cache.load_json("intent_model.json", key=key)
+        matrix_path = cache.cache_path(f"intent_model-{key}.npy")
+        weights_path = cache.cache_path(f"intent_model-{key}-idf.npy")
+        if isinstance(meta, dict) and os.path.exists(matrix_path) and os.path.exists(weights_path):
+            try:
+                centroids = np.load(matrix_path, mmap_mode="r")
+                return cls(list(meta["labels"]), list(meta["commands"]), centroids, np.load(weights_path))
+            except Exception:
+                pass
+
+        model = cls.train(examples)
+        try:
+            # Drop matrices trained from older versions of the examples.
+            for name in os.listdir(cache.cache_dir()):
+                if name.startswith("intent_model-") and name.endswith(".npy"):
+                    os.remove(cache.cache_path(name))
+            np.save(matrix_path, model.centroids)
+            np.save(weights_path, model.weights)
+            cache.save_json("intent_model.json", {"labels": model.labels, "commands": model.commands}, key=key)
+            model.centroids = np.load(matrix_path, mmap_mode="r")
+        except Exception:
+            pass
+        return model
+
+    def scores(self, texts: list[str]):
+        """(len(texts), n_intents) cosine similarities, in one batched product."""
+        return vectorize(texts, self.weights) @ _numpy().asarray(self.centroids).T
+
+    def predict(self, text: str) -> IntentPrediction | None:
+        if not self.labels:
+            return None
+        np = _numpy()
+        row = self.scores([text])[0]
+        if self._background:
+            # One score for the background class, on its first row.
+            top = np.sort(row[self._background])[-_BACKGROUND_K:]
+            row[self._background] = -1.0
+            row[self._background[0]] = float(top.mean())
+        order = np.argsort(row)[::-1]
+        best = int(order[0])
+        runner_up = float(row[order[1]]) if len(order) > 1 else 0.0
+        score = float(row[best])
+        return IntentPrediction(
+            intent=self.labels[best],
+            command=self.commands[best],
+            score=round(score, 4),
+            margin=round(score - runner_up, 4),
+        )
+
+    def classify(self, text: str) -> tuple[str, IntentPrediction | None]:
+        """Return ("direct" | "confirm" | "none", prediction); a background match is "none"."""
+        p = self.predict(text)
+        if p is None or p.intent == BACKGROUND_INTENT:
+            return "none", p
+        if p.score >= DIRECT_SCORE and p.margin >= DIRECT_MARGIN:
+            return "direct", p
+        if p.score >= CONFIRM_SCORE:
+            return "confirm", p
+        return "none", p
+
+
+def _bench(rounds: int = 2000) -> dict[str, Any]:
+    """python intent_classifier.py: leave-one-out accuracy and per-prediction latency."""
+    import time
+
+    from latency_stats import format_summary, summarize
+
+    examples = load_examples()
+    correct = total = 0
+    # Leave-one-out verdicts: in-domain (verdict -> right, wrong) and background (verdict -> count).
+    bands = {v: [0, 0] for v in ("direct", "confirm", "none")}
+    rejected = {v: 0 for v in bands}
+    for intent, (command, lines) in examples.items():
+        for i, line in enumerate(lines):
+            held_out = {k: (c, [x for j, x in enumerate(ls) if not (k == intent and j == i)]) for k, (c, ls) in examples.items()}
+            verdict, p = IntentClassifier.train(held_out).classify(line)
+            if intent == BACKGROUND_INTENT:
+                rejected[verdict] += 1
+                continue
+            right = p is not None and p.intent == intent
+            bands[verdict][0 if right else 1] += 1
+            correct += right
+            total += 1
+
+    model = IntentClassifier.load()
+    assert model is not None
+    queries = [line for _, lines in examples.values() for line in lines]
+    samples: list[float] = []
+    for i in range(rounds):
+        q = queries[i % len(queries)]
+        t0 = time.perf_counter()
+        model.predict(q)
+        samples.append((time.perf_counter() - t0) * 1_000_000.0)
+    summary = summarize(samples)
+    print(f"[intents] {len(examples)} intents, leave-one-out accuracy {correct / max(1, total):.1%}")
+    print("[intents] in-domain (right/wrong): " + ", ".join(f"{v} {r}/{w}" for v, (r, w) in bands.items()))
+    print("[intents] background: " + ", ".join(f"{v} {n}" for v, n in rejected.items()))
+    print(format_summary("[intents] predict", summary, unit="us"))
+    return {"accuracy": correct / max(1, total), "latency_us": summary}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if _numpy() is None:
+        print("numpy is required for the intent classifier.")
+        sys.exit(1)
+    if len(sys.argv) > 1:
+        clf = IntentClassifier.load()
+        assert clf is not None
+        print(json.dumps(clf.classify(" ".join(sys.argv[1:]))[1].__dict__))
+    else:
+        _bench()
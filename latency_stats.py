@@ -0,0 +1,34 @@
+import math
+from typing import Iterable
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already-sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(math.ceil(q / 100.0 * len(sorted_values))))
+    return float(sorted_values[min(rank, len(sorted_values)) - 1])
+
+
+def summarize(values: Iterable[float]) -> dict[str, float]:
+    """count/mean/p50/p90/p95/p99/max for a batch of latency samples."""
+    data = sorted(float(v) for v in values)
+    if not data:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(data),
+        "mean": sum(data) / len(data),
+        "p50": percentile(data, 50),
+        "p90": percentile(data, 90),
+        "p95": percentile(data, 95),
+        "p99": percentile(data, 99),
+        "max": data[-1],
+    }
+
+
+def format_summary(name: str, summary: dict[str, float], unit: str = "ms") -> str:
+    return (
+        f"{name}: n={int(summary['count'])} mean={summary['mean']:.2f}{unit} "
+        f"p50={summary['p50']:.2f}{unit} p90={summary['p90']:.2f}{unit} "
+        f"p95={summary['p95']:.2f}{unit} p99={summary['p99']:.2f}{unit} max={summary['max']:.2f}{unit}"
+    )
@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import cache
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+# Everything Riva starts, so that closing it (or cleaning up on exit) can target
+# exactly those processes and windows instead of every instance of an image.
+#
+# A launch is recorded with the pid procexec.spawn returned. Launchers often hand
+# off and exit (cmd /c start, explorer, a second chrome.exe that passes its URLs
+# to the running one), so resolve() also adopts processes of the app's images
+# created within _ADOPT_WINDOW_SEC of the launch, adds their child trees, and
+# keeps the titled top-level windows they own. Only the root of a new process
+# tree (its parent isn't a process of the same app), or a process that owns a
+# top-level window, is adopted: when the app was already running, the handoff
+# only adds helpers (renderers, extension hosts) under the existing instance,
+# and those belong to it, not to Riva. Apps that live in a shared process (File
+# Explorer folders) are tracked by window title only, and never by pid.
+#
+# Every pid is stored with its create_time, so a pid the OS handed to something
+# else never matches. Pruning is one create_time() per tracked pid; entries with
+# nothing left alive, or from before the last boot, are dropped.
+
+_REGISTRY_VERSION = 1
+_CACHE_FILE = "launches.json"
+# Processes of the app's images created this long before/after the launch are its own.
+_ADOPT_SLACK_SEC = 2.0
+_ADOPT_WINDOW_SEC = 15.0
+# Window-only entries can't be checked without a window list; forget them after this.
+_MAX_AGE_SEC = 12 * 3600.0
+
+
+@dataclass
+class Launch:
+    id: int
+    app: str
+    started: float
+    images: tuple[str, ...] = ()
+    title: str = ""
+    # pid -> create_time
+    pids: dict[int, float] = field(default_factory=dict)
+    hwnds: list[int] = field(default_factory=list)
+    settled: bool = False
+
+    @property
+    def window_only(self) -> bool:
+        return bool(self.title)
+
+    def to_row(self) -> dict[str, Any]:
+        return {
+            "id": self.id, "app": self.app, "started": self.started, "images": list(self.images),
+            "title": self.title, "pids": [[p, t] for p, t in self.pids.items()], "hwnds": list(self.hwnds),
+            "settled": self.settled,
+        }
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "Launch":
+        return cls(
+            id=int(row["id"]),
+            app=str(row["app"]),
+            started=float(row["started"]),
+            images=tuple(str(i) for i in row.get("images") or ()),
+            title=str(row.get("title") or ""),
+            pids={int(p): float(t) for p, t in row.get("pids") or ()},
+            hwnds=[int(h) for h in row.get("hwnds") or ()],
+            settled=bool(row.get("settled")),
+        )
+
+
+def _create_time(pid: int) -> float | None:
+    if psutil is None or pid <= 0:
+        return None
+    try:
+        return float(psutil.Process(pid).create_time())
+    except Exception:
+        return None
+
+
+def _alive(pid: int, created: float) -> bool:
+    t = _create_time(pid)
+    return t is not None and abs(t - created) < 1.0
+
+
+def _image_matches(name: str, images: set[str]) -> bool:
+    # Linux truncates process names to 15 characters.
+    name = (name or "").lower()
+    return bool(name) and any(name == i or name == i[:15] for i in images)
+
+
+def _window_owners(windows: list[dict[str, Any]] | None) -> set[int]:
+    # Untitled top-level windows are mostly hidden message windows, which helpers own too.
+    return {int(w.get("pid") or 0) for w in windows or () if (w.get("title") or "").strip()}
+
+
+class LaunchRegistry:
+    """Persistent record of the processes and windows Riva launched."""
+
+    def __init__(self, cache_file: str | None = _CACHE_FILE):
+        self.cache_file = cache_file
+        self._entries: list[Launch] = []
+        self._next_id = 1
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _key(self) -> str:
+        return cache.make_key("launches", _REGISTRY_VERSION)
+
+    def _ensure(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.cache_file is None:
+            return
+        data = cache.load_json(self.cache_file, key=self._key())
+        if not isinstance(data, list):
+            return
+        boot = 0.0
+        if psutil is not None:
+            try:
+                boot = float(psutil.boot_time())
+            except Exception:
+                pass
+        for row in data:
+            try:
+                e = Launch.from_row(row)
+            except Exception:
+                continue
+            if e.started >= boot:
+                self._entries.append(e)
+        self._next_id = max([e.id for e in self._entries], default=0) + 1
+
+    def _save(self) -> None:
+        if self.cache_file is not None:
+            cache.save_json(self.cache_file, [e.to_row() for e in self._entries], key=self._key())
+
+    def record(self, app: str, pid: int = 0, images: Iterable[str] = (), title: str = "") -> Launch:
+        """Register a launch; call right after spawning (pid 0 when the launcher gave none)."""
+        with self._lock:
+            self._ensure()
+            e = Launch(self._next_id, app, time.time(), tuple(images), title)
+            self._next_id += 1
+            if not e.window_only:
+                created = _create_time(pid)
+                if created is not None:
+                    e.pids[pid] = created
+            self._entries.append(e)
+            self._save()
+            return e
+
+    def resolve(self, entries: Iterable[Launch], windows: list[dict[str, Any]] | None = None) -> None:
+        """Adopt handed-off processes, child trees and owned windows into `entries`.
+
+        `windows` is a top-level window list (hwnd, pid, process, title); without
+        it the recorded window handles are kept as they are.
+        """
+        if psutil is None:
+            return
+        entries = list(entries)
+        with self._lock:
+            now = time.time()
+            pending = [e for e in entries if not e.settled and not e.window_only and e.images]
+            if pending:
+                wanted = {i.lower() for e in pending for i in e.images}
+                found: list[tuple[str, int, float, int]] = []
+                try:
+                    for p in psutil.process_iter(["name", "create_time", "ppid"]):
+                        name = p.info.get("name") or ""
+                        created = p.info.get("create_time")
+                        if created is not None and _image_matches(name, wanted):
+                            found.append((name.lower(), int(p.pid), float(created), int(p.info.get("ppid") or 0)))
+                except Exception:
+                    found = []
+                owners = _window_owners(windows)
+                for e in pending:
+                    images = {i.lower() for i in e.images}
+                    app_pids = {pid for name, pid, _, _ in found if _image_matches(name, images)}
+                    for name, pid, created, ppid in found:
+                        if not (e.started - _ADOPT_SLACK_SEC <= created <= e.started + _ADOPT_WINDOW_SEC
+                                and _image_matches(name, images)):
+                            continue
+                        # A helper under an instance that was already running isn't ours.
+                        if ppid not in app_pids or pid in owners:
+                            e.pids.setdefault(pid, created)
+                    if now > e.started + _ADOPT_WINDOW_SEC:
+                        e.settled = True
+            for e in entries:
+                for pid, created in list(e.pids.items()):
+                    try:
+                        proc = psutil.Process(pid)
+                        if abs(float(proc.create_time()) - created) >= 1.0:
+                            continue
+                        for c in proc.children(recursive=True):
+                            e.pids.setdefault(int(c.pid), float(c.create_time()))
+                    except Exception:
+                        continue
+            if windows is not None:
+                self._assign_windows(entries, windows)
+            self._save()
+
+    def _assign_windows(self, entries: list[Launch], windows: list[dict[str, Any]]) -> None:
+        by_hwnd = {int(w.get("hwnd") or 0): w for w in windows if w.get("hwnd")}
+        claimed = {h for e in self._entries for h in e.hwnds if h in by_hwnd}
+        for e in entries:
+            e.hwnds = [h for h in e.hwnds if h in by_hwnd]
+            if e.window_only:
+                if e.hwnds:
+                    continue
+                stems = {os.path.splitext(i)[0].lower() for i in e.images}
+                needle = e.title.lower()
+                for h, w in by_hwnd.items():
+                    if h in claimed or (stems and (w.get("process") or "").lower() not in stems):
+                        continue
+                    if needle in (w.get("title") or "").lower():
+                        e.hwnds.append(h)
+                        claimed.add(h)
+                        break
+            else:
+                for h, w in by_hwnd.items():
+                    if int(w.get("pid") or 0) in e.pids and (w.get("title") or "").strip() and h not in e.hwnds:
+                        e.hwnds.append(h)
+                        claimed.add(h)
+
+    def prune(self, windows: list[dict[str, Any]] | None = None) -> int:
+        """Drop dead pids and entries with nothing left; returns how many entries went."""
+        with self._lock:
+            self._ensure()
+            now = time.time()
+            hwnds = None if windows is None else {int(w.get("hwnd") or 0) for w in windows}
+            keep: list[Launch] = []
+            changed = False
+            for e in self._entries:
+                pids = {p: t for p, t in e.pids.items() if _alive(p, t)}
+                live_hwnds = e.hwnds if hwnds is None else [h for h in e.hwnds if h in hwnds]
+                changed = changed or len(pids) != len(e.pids) or len(live_hwnds) != len(e.hwnds)
+                e.pids, e.hwnds = pids, live_hwnds
+                if e.pids or e.hwnds:
+                    keep.append(e)
+                elif not e.settled and not e.window_only and now <= e.started + _ADOPT_WINDOW_SEC:
+                    keep.append(e)  # its process may not have started yet
+                elif e.window_only and hwnds is None and now - e.started < _MAX_AGE_SEC:
+                    keep.append(e)
+            dropped = len(self._entries) - len(keep)
+            if dropped or changed:
+                self._entries = keep
+                self._save()
+            return dropped
+
+    def entries(self, apps: Iterable[str] | None = None) -> list[Launch]:
+        """Tracked launches (of `apps`, if given), oldest first."""
+        with self._lock:
+            self._ensure()
+            wanted = None if apps is None else set(apps)
+            return [e for e in self._entries if wanted is None or e.app in wanted]
+
+    def alive_pids(self, entries: Iterable[Launch]) -> list[int]:
+        return [p for e in entries for p, t in e.pids.items() if _alive(p, t)]
+
+    def forget(self, entries: Iterable[Launch]) -> None:
+        ids = {e.id for e in entries}
+        if not ids:
+            return
+        with self._lock:
+            self._ensure()
+            self._entries = [e for e in self._entries if e.id not in ids]
+            self._save()
+
+
+if __name__ == "__main__":
+    import json
+
+    # python launch_registry.py: list what Riva launched and what is still alive.
+    registry = LaunchRegistry()
+    t0 = time.perf_counter()
+    registry.resolve(registry.entries())
+    dropped = registry.prune()
+    print(f"[launches] resolved and pruned in {(time.perf_counter() - t0) * 1000:.1f} ms ({dropped} stale)")
+    print(json.dumps([e.to_row() for e in registry.entries()], indent=2))
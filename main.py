@@ -1,19 +1,43 @@
 import sys
+import time
 
-from speech import listen, speak
-from brain import process
 
+def run_voice_mode(profiler=None):
+    from speech import listen, speak, warm_up, heard_language, set_awake as set_stt_awake
+    from brain import process, warm_up as warm_up_brain
+    import tracing
 
-def run_voice_mode():
+    if profiler is not None:
+        listen = profiler.scoped("listen", listen)
+        process = profiler.scoped("process", process)
+
+    # Resolve the voice and import Whisper in the background while we greet.
+    warm_up(stt=True)
+    warm_up_brain()
     speak("Voice mode is running. Say 'hi riva' or 'hey riva' to wake me up.")
     while True:
-        command = listen()
-        if command:
-            # Voice mode: wake phrase is required, and once awake it stays awake until exit.
-            process(command, require_wake_word=True)
+        # One trace per utterance: capture, transcription, dispatch and replies.
+        with tracing.trace("utterance"):
+            command = listen()
+            if command:
+                # Voice mode: wake phrase is required, and once awake it stays awake until exit.
+                # The language Whisper settled on picks the command table.
+                language, confidence = heard_language()
+                intent = process(command, require_wake_word=True, language=language, confidence=confidence)
+                # While asleep only the small wake model stays loaded.
+                set_stt_awake(intent != "asleep")
+
+
+def run_text_mode(profiler=None):
+    from speech import speak, warm_up
+    from brain import process, warm_up as warm_up_brain
+    import tracing
 
+    if profiler is not None:
+        process = profiler.scoped("process", process)
 
-def run_text_mode():
+    warm_up()
+    warm_up_brain()
     speak("Hi! I'm Riva, your AI assistant created by MD. Rifat Islam Rizvi. How can I help you today?")
     print("Tip: type 'help' to see what I can do.")
     while True:
@@ -28,7 +52,24 @@ def run_text_mode():
             continue
 
         # In text mode, wake word is optional.
-        process(command.lower(), require_wake_word=False)
+        with tracing.trace("command"):
+            process(command.lower(), require_wake_word=False)
+
+
+def _profile_startup_imports() -> None:
+    """Import the runtime modules under the import profiler and print a report."""
+    from import_profile import ImportProfiler
+
+    profiler = ImportProfiler().install()
+    t0 = time.perf_counter()
+    try:
+        import speech  # noqa: F401
+        import brain  # noqa: F401
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        profiler.uninstall()
+    profiler.report()
+    print(f"[import-profile] speech + brain ready in {elapsed_ms:.1f} ms", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -36,13 +77,34 @@ if __name__ == "__main__":
     voice_mode = "--voice" in args or "-v" in args
     text_mode = "--text" in args or "-t" in args
 
-    if text_mode:
-        print("[mode] TEXT — type commands at 'You>'")
-        run_text_mode()
-    else:
-        # Default is voice mode, and you can also pass --voice explicitly.
-        if voice_mode:
-            print("[mode] VOICE")
+    if "--import-profile" in args:
+        _profile_startup_imports()
+
+    # --profile samples the whole run; --profile-process / --profile-listen
+    # only sample time spent inside process() / listen().
+    profiler = None
+    profile_scope = "process" if "--profile-process" in args else "listen" if "--profile-listen" in args else None
+    if "--profile" in args or profile_scope:
+        import profiler as _profiler
+
+        profiler = _profiler.create(scope=profile_scope).start()
+
+    try:
+        if "--serve" in args:
+            import server
+
+            print("[mode] SERVE — local HTTP/WebSocket API")
+            server.run()
+        elif text_mode:
+            print("[mode] TEXT — type commands at 'You>'")
+            run_text_mode(profiler)
         else:
-            print("[mode] VOICE — tip: python main.py --text  (text mode)")
-        run_voice_mode()
+            # Default is voice mode, and you can also pass --voice explicitly.
+            if voice_mode:
+                print("[mode] VOICE")
+            else:
+                print("[mode] VOICE — tip: python main.py --text  (text mode)")
+            run_voice_mode(profiler)
+    finally:
+        if profiler is not None:
+            _profiler.finish(profiler)
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+# Power-aware speech settings for laptops.
+#
+# A background thread samples psutil.sensors_battery() every
+# RIVA_POWER_SAMPLE_SEC and picks a profile:
+#   - performance (on AC, or no battery): the configured Whisper model, beam
+#     search, and the normal 7-second listen cycle;
+#   - power_saver (on battery, at or below RIVA_POWER_SAVER_BELOW percent): the
+#     tiny model, greedy decoding, a longer listen cycle (fewer captures and
+#     transcriptions per minute), and while asleep only the wake model runs:
+#     a command said with the wake phrase isn't transcribed a second time.
+# Every switch is logged and kept (see stats()). RIVA_POWER_PROFILE=performance
+# or power_saver pins one profile.
+
+_DEFAULT_SAMPLE_SEC = 60.0
+_DEFAULT_SAVER_BELOW = 100.0
+_MAX_TRANSITIONS = 50
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    model: str | None  # None: the configured (or tuned) command model
+    beam_size: int | None  # None: greedy decoding
+    capture_sec: float
+    wake_only_asleep: bool
+
+
+PERFORMANCE = Profile("performance", None, 5, 7.0, False)
+POWER_SAVER = Profile("power_saver", "tiny", None, 10.0, True)
+PROFILES = {p.name: p for p in (PERFORMANCE, POWER_SAVER)}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def _read_battery() -> Any:
+    if psutil is None:
+        return None
+    try:
+        return psutil.sensors_battery()
+    except Exception:
+        return None
+
+
+class PowerManager:
+    """Tracks AC/battery state and the speech profile that goes with it."""
+
+    def __init__(
+        self,
+        mode: str | None = None,
+        interval_sec: float | None = None,
+        saver_below: float | None = None,
+        sensors: Callable[[], Any] = _read_battery,
+        on_change: Callable[[Profile], None] | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        mode = (mode if mode is not None else os.environ.get("RIVA_POWER_PROFILE") or "auto").strip().lower()
+        self.mode = mode if mode in PROFILES else "auto"
+        self.interval_sec = _env_float("RIVA_POWER_SAMPLE_SEC", _DEFAULT_SAMPLE_SEC) if interval_sec is None else interval_sec
+        self.saver_below = _env_float("RIVA_POWER_SAVER_BELOW", _DEFAULT_SAVER_BELOW) if saver_below is None else saver_below
+        self.sensors = sensors
+        self.on_change = on_change
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._profile = PROFILES.get(self.mode, PERFORMANCE)
+        self.percent: float | None = None
+        self.plugged: bool | None = None
+        self.samples = 0
+        self.transitions: deque[dict[str, Any]] = deque(maxlen=_MAX_TRANSITIONS)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.sample()
+
+    def current(self) -> Profile:
+        return self._profile
+
+    def _choose(self) -> tuple[Profile, str]:
+        if self.mode in PROFILES:
+            return PROFILES[self.mode], f"RIVA_POWER_PROFILE={self.mode}"
+        if self.plugged is None:
+            return PERFORMANCE, "no battery"
+        if self.plugged:
+            return PERFORMANCE, "on AC power"
+        pct = f"{self.percent:.0f}%" if self.percent is not None else "unknown level"
+        if self.percent is None or self.percent <= self.saver_below:
+            return POWER_SAVER, f"on battery ({pct})"
+        return PERFORMANCE, f"on battery ({pct}, above {self.saver_below:.0f}%)"
+
+    def sample(self) -> Profile:
+        """Read the battery now and switch profiles if needed."""
+        battery = self.sensors() if self.mode == "auto" else None
+        with self._lock:
+            self.samples += 1
+            if battery is not None:
+                percent = getattr(battery, "percent", None)
+                self.percent = float(percent) if percent is not None else None
+                plugged = getattr(battery, "power_plugged", None)
+                self.plugged = None if plugged is None else bool(plugged)
+            else:
+                self.percent = self.plugged = None
+            profile, reason = self._choose()
+            old, self._profile = self._profile, profile
+            first = self.samples == 1
+            changed = profile != old
+            if changed and not first:
+                self.transitions.append({"at": self.clock(), "from": old.name, "to": profile.name, "reason": reason})
+        if first:
+            if profile != PERFORMANCE:
+                print(f"[power] using {profile.name}: {reason}")
+        elif changed:
+            print(f"[power] {old.name} -> {profile.name}: {reason}")
+            if self.on_change is not None:
+                try:
+                    self.on_change(profile)
+                except Exception as e:
+                    print(f"[power] applying {profile.name} failed: {e}")
+        return profile
+
+    def start(self) -> threading.Thread | None:
+        """Sample in the background (nothing to do when a profile is pinned)."""
+        if self.mode != "auto" or self.interval_sec <= 0:
+            return None
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+
+            def _run():
+                while not self._stop.wait(self.interval_sec):
+                    try:
+                        self.sample()
+                    except Exception as e:
+                        print(f"[power] sampling failed: {e}")
+
+            self._thread = threading.Thread(target=_run, name="riva-power", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "profile": self._profile.name,
+                "percent": self.percent,
+                "plugged": self.plugged,
+                "samples": self.samples,
+                "transitions": list(self.transitions),
+            }
+
+
+if __name__ == "__main__":
+    import json
+
+    # python power.py: the battery reading and the profile Riva would use.
+    manager = PowerManager()
+    print(json.dumps(manager.stats(), indent=2))
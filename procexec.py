@@ -0,0 +1,291 @@
+import contextvars
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+import tracing
+
+# Every shell-out (PowerShell, taskkill, tasklist, launchers, TTS) goes through
+# this module, so one hung child can't freeze the assistant:
+#   - each call has a deadline (per-tool default, RIVA_PROC_TIMEOUT_SEC overrides),
+#   - process() runs under a per-command budget (RIVA_COMMAND_BUDGET_SEC) that
+#     caps the sum of all calls it makes,
+#   - a child that overruns is killed together with its process tree,
+#   - at most RIVA_PROC_MAX_CONCURRENCY children run at once,
+#   - timing and exit status are recorded per tool (see stats()).
+
+_DEFAULT_TIMEOUTS_SEC = {
+    "powershell": 8.0,
+    "taskkill": 5.0,
+    "tasklist": 5.0,
+    "shutdown": 5.0,
+}
+_FALLBACK_TIMEOUT_SEC = 10.0
+_DEFAULT_COMMAND_BUDGET_SEC = 15.0
+_DEFAULT_MAX_CONCURRENCY = 4
+_SAMPLES_PER_TOOL = 512
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+_SEMAPHORE = threading.BoundedSemaphore(max(1, int(_env_float("RIVA_PROC_MAX_CONCURRENCY", _DEFAULT_MAX_CONCURRENCY))))
+
+# Absolute time.monotonic() deadline for the current command, if any.
+_DEADLINE: contextvars.ContextVar[float | None] = contextvars.ContextVar("riva_proc_deadline", default=None)
+
+
+class ProcTimeout(subprocess.SubprocessError):
+    """A call overran its deadline (or the command budget) and was killed or skipped."""
+
+
+@dataclass
+class ProcResult:
+    args: list[str]
+    returncode: int | None
+    stdout: Any
+    elapsed: float
+    timed_out: bool = False
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class _ToolStats:
+    __slots__ = ("calls", "failures", "timeouts", "skipped", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.latencies: deque[float] = deque(maxlen=_SAMPLES_PER_TOOL)
+
+
+_STATS: dict[str, _ToolStats] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _record(tool: str, result: ProcResult) -> None:
+    with _STATS_LOCK:
+        s = _STATS.get(tool)
+        if s is None:
+            s = _STATS[tool] = _ToolStats()
+        s.calls += 1
+        if result.error == "BUDGET":
+            s.skipped += 1
+        elif result.timed_out:
+            s.timeouts += 1
+        elif result.returncode != 0:
+            s.failures += 1
+        s.latencies.append(result.elapsed * 1000.0)
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Per-tool call counts, failures, timeouts and latency percentiles (ms)."""
+    from latency_stats import summarize
+
+    with _STATS_LOCK:
+        return {
+            tool: {
+                "calls": s.calls,
+                "failures": s.failures,
+                "timeouts": s.timeouts,
+                "skipped": s.skipped,
+                "latency_ms": summarize(list(s.latencies)),
+            }
+            for tool, s in sorted(_STATS.items())
+        }
+
+
+def tool_name(args: list[str]) -> str:
+    prog = os.path.basename(str(args[0]).replace("\\", "/")).lower() if args else ""
+    return prog[:-4] if prog.endswith(".exe") else prog
+
+
+def remaining_budget() -> float | None:
+    """Seconds left in the current command's budget (None when unbounded)."""
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def command_budget(seconds: float | None = None) -> Iterator[None]:
+    """Bound the total time shell-outs may take in this context (nests to the tighter one)."""
+    if seconds is None:
+        seconds = _env_float("RIVA_COMMAND_BUDGET_SEC", _DEFAULT_COMMAND_BUDGET_SEC)
+    deadline = time.monotonic() + max(0.0, seconds) if seconds > 0 else None
+    outer = _DEADLINE.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def _effective_timeout(tool: str, timeout: float | None, use_budget: bool) -> float | None:
+    if timeout is None:
+        override = _env_float("RIVA_PROC_TIMEOUT_SEC", 0.0)
+        timeout = override if override > 0 else _DEFAULT_TIMEOUTS_SEC.get(tool, _FALLBACK_TIMEOUT_SEC)
+    if use_budget:
+        left = remaining_budget()
+        if left is not None:
+            return min(timeout, left)
+    return timeout
+
+
+def _creation_flags() -> int:
+    return getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0) if os.name == "nt" else 0
+
+
+def kill_tree(proc: Any) -> None:
+    """Kill a child and everything it started."""
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=5.0,
+            )
+        else:
+            try:
+                os.killpg(proc.pid, getattr(signal, "SIGKILL", 9))
+            except Exception:
+                pass
+        proc.kill()
+    except Exception:
+        pass
+
+
+def run(
+    args: list[str],
+    *,
+    timeout: float | None = None,
+    text: bool = True,
+    capture: bool = True,
+    use_budget: bool = True,
+) -> ProcResult:
+    """Run a child to completion under its deadline; never raises for timeouts.
+
+    `use_budget=False` exempts the call from the command budget (it still has
+    its own timeout), for work whose length is known up front such as TTS.
+    """
+    args = [str(a) for a in args]
+    tool = tool_name(args)
+    started = time.monotonic()
+    limit = _effective_timeout(tool, timeout, use_budget)
+
+    with tracing.span(f"proc.{tool}") as sp:
+        if limit is not None and limit <= 0:
+            result = ProcResult(args, None, "" if text else b"", 0.0, timed_out=True, error="BUDGET")
+            _record(tool, result)
+            sp.set(skipped=True)
+            return result
+
+        if not _SEMAPHORE.acquire(timeout=limit):
+            result = ProcResult(args, None, "" if text else b"", time.monotonic() - started, timed_out=True, error="BUSY")
+            _record(tool, result)
+            sp.set(busy=True)
+            return result
+        try:
+            wait_left = None if limit is None else max(0.0, limit - (time.monotonic() - started))
+            try:
+                proc = subprocess.Popen(
+                    args,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    text=text,
+                    creationflags=_creation_flags(),
+                    start_new_session=os.name != "nt",
+                )
+            except Exception as e:
+                result = ProcResult(args, None, "" if text else b"", time.monotonic() - started, error=type(e).__name__)
+                _record(tool, result)
+                raise
+
+            try:
+                out, _ = proc.communicate(timeout=wait_left)
+                result = ProcResult(args, proc.returncode, out if out is not None else ("" if text else b""),
+                                    time.monotonic() - started)
+            except subprocess.TimeoutExpired:
+                kill_tree(proc)
+                try:
+                    proc.communicate(timeout=1.0)
+                except Exception:
+                    pass
+                result = ProcResult(args, proc.returncode, "" if text else b"", time.monotonic() - started,
+                                    timed_out=True, error="TIMEOUT")
+                print(f"[proc timeout] {tool} killed after {result.elapsed:.1f}s")
+        finally:
+            _SEMAPHORE.release()
+
+        _record(tool, result)
+        sp.set(returncode=result.returncode, timed_out=result.timed_out)
+        return result
+
+
+def check_output(args: list[str], *, timeout: float | None = None, text: bool = True, use_budget: bool = True) -> Any:
+    """Like subprocess.check_output, under the executor's deadlines.
+
+    Raises ProcTimeout on a timeout and CalledProcessError on a non-zero exit.
+    """
+    result = run(args, timeout=timeout, text=text, use_budget=use_budget)
+    if result.timed_out:
+        raise ProcTimeout(f"{tool_name(result.args)}: {result.error}")
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode or -1, result.args, result.stdout)
+    return result.stdout
+
+
+def spawn(args: list[str]) -> int:
+    """Start a detached program (launchers like chrome, explorer) without waiting.
+
+    Returns the child's pid; raises OSError like subprocess.Popen if it can't start.
+    """
+    args = [str(a) for a in args]
+    tool = tool_name(args)
+    started = time.monotonic()
+    with tracing.span(f"proc.spawn.{tool}"):
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            _record(tool, ProcResult(args, None, "", time.monotonic() - started, error=type(e).__name__))
+            raise
+    _record(tool, ProcResult(args, 0, "", time.monotonic() - started))
+    return proc.pid
+
+
+def shell(command: str, *, timeout: float | None = None) -> ProcResult:
+    """Run a cmd.exe command line (what os.system did) under the executor."""
+    return run(["cmd", "/c", command], timeout=timeout, capture=False)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # python procexec.py <command...>: run one command under the executor.
+    with command_budget():
+        r = run(sys.argv[1:] or ["python", "-c", "print('ok')"])
+    print(r.stdout if isinstance(r.stdout, str) else r.stdout.decode("utf-8", "replace"), end="")
+    print(json.dumps({"returncode": r.returncode, "elapsed": round(r.elapsed, 3), "timed_out": r.timed_out}))
+    print(json.dumps(stats(), indent=2))
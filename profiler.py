@@ -0,0 +1,274 @@
+import contextvars
+import functools
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable
+
+# A sampling profiler for the running assistant (python main.py --profile).
+#
+# A background thread snapshots every thread's stack with sys._current_frames()
+# at a fixed interval (RIVA_PROFILE_INTERVAL_MS, default 5 ms). Signal timers are
+# not available on Windows, so sampling from a thread is the portable option.
+# On interpreters without sys._current_frames, cProfile is used instead.
+#
+# Outputs (prefix RIVA_PROFILE_OUT, default "riva-profile"):
+#   <prefix>.collapsed  "frame;frame;frame count" lines for flamegraph.pl / speedscope
+#   <prefix>.pstats     loadable with pstats.Stats / snakeviz
+
+_DEFAULT_INTERVAL_MS = 5.0
+_MAX_DEPTH = 128
+
+FrameKey = tuple[str, int, str]
+
+# The profiler whose scope the current context is inside. scoped() sets it, and
+# work handed to other threads in a copy of the context (the action workers)
+# joins the scope through carry_scope().
+_ACTIVE: contextvars.ContextVar["SamplingProfiler | None"] = contextvars.ContextVar("riva_profile_scope", default=None)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def _frame_label(key: FrameKey) -> str:
+    filename, lineno, name = key
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler.
+
+    With `scope` set (e.g. "process" or "listen"), only threads currently inside
+    a function wrapped by scoped(scope, fn), or running work it handed off via
+    carry_scope(), are sampled; otherwise every thread is.
+    """
+
+    def __init__(self, interval_ms: float | None = None, scope: str | None = None):
+        if interval_ms is None:
+            interval_ms = _env_float("RIVA_PROFILE_INTERVAL_MS", _DEFAULT_INTERVAL_MS)
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self.scope = scope
+        self.samples: Counter[tuple[FrameKey, ...]] = Counter()
+        self.sample_ticks = 0
+        self._active: dict[int, int] = {}
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def scoped(self, scope: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap fn so its time is sampled when profiling that scope."""
+        if self.scope != scope:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _ACTIVE.set(self)
+            try:
+                return self._sampled(fn, *args, **kwargs)
+            finally:
+                _ACTIVE.reset(token)
+
+        return wrapper
+
+    def _sampled(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn with the calling thread counted as inside the scope."""
+        ident = threading.get_ident()
+        with self._active_lock:
+            self._active[ident] = self._active.get(ident, 0) + 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._active_lock:
+                n = self._active.get(ident, 1) - 1
+                if n:
+                    self._active[ident] = n
+                else:
+                    self._active.pop(ident, None)
+
+    def start(self) -> "SamplingProfiler":
+        if self._thread is None:
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="riva-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names: dict[int, str] = {}
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            next_tick += self.interval
+            if self.scope is not None:
+                with self._active_lock:
+                    wanted = set(self._active)
+            else:
+                wanted = None
+            if wanted is None or wanted:
+                frames = sys._current_frames()
+                if len(names) != len(frames):
+                    names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+                for ident, frame in frames.items():
+                    if ident == own or (wanted is not None and ident not in wanted):
+                        continue
+                    stack: list[FrameKey] = []
+                    f = frame
+                    while f is not None and len(stack) < _MAX_DEPTH:
+                        code = f.f_code
+                        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                        f = f.f_back
+                    stack.append(("<thread>", 0, names.get(ident, str(ident))))
+                    stack.reverse()
+                    self.samples[tuple(stack)] += 1
+                self.sample_ticks += 1
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(";".join(_frame_label(k) for k in stack) + f" {count}\n")
+
+    def write_pstats(self, path: str) -> None:
+        """Write the samples as a pstats file (sample counts stand in for call counts)."""
+        dt = self.interval
+        self_count: Counter[FrameKey] = Counter()
+        cum_count: Counter[FrameKey] = Counter()
+        edges: Counter[tuple[FrameKey, FrameKey]] = Counter()
+        for stack, count in self.samples.items():
+            frames = stack[1:]  # drop the synthetic thread root
+            if not frames:
+                continue
+            self_count[frames[-1]] += count
+            for key in set(frames):
+                cum_count[key] += count
+            for pair in set(zip(frames, frames[1:])):
+                edges[pair] += count
+
+        callers: dict[FrameKey, dict[FrameKey, tuple[int, int, float, float]]] = {}
+        for (caller, callee), count in edges.items():
+            callers.setdefault(callee, {})[caller] = (count, count, 0.0, count * dt)
+
+        stats = {
+            key: (cum, cum, self_count[key] * dt, cum * dt, callers.get(key, {}))
+            for key, cum in cum_count.items()
+        }
+        with open(path, "wb") as f:
+            marshal.dump(stats, f)
+
+    def save(self, prefix: str) -> list[str]:
+        collapsed, pstats_path = f"{prefix}.collapsed", f"{prefix}.pstats"
+        self.write_collapsed(collapsed)
+        self.write_pstats(pstats_path)
+        return [collapsed, pstats_path]
+
+
+def carry_scope(fn: Callable[..., Any], *args: Any) -> Any:
+    """fn(*args), sampled if the (copied) context it runs in is inside a profiled scope."""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return fn(*args)
+    return profiler._sampled(fn, *args)
+
+
+class CProfileProfiler:
+    """Deterministic fallback for interpreters without sys._current_frames.
+
+    Only the thread that enables it is profiled (the main loop, or the scoped
+    function, without the action worker threads), and only a pstats file is written.
+    """
+
+    def __init__(self, scope: str | None = None):
+        import cProfile
+
+        self.scope = scope
+        self.profile = cProfile.Profile()
+        self.elapsed = 0.0
+        self._started = 0.0
+        self._depth = threading.local()
+
+    def scoped(self, scope: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        if self.scope != scope:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            depth = getattr(self._depth, "n", 0)
+            self._depth.n = depth + 1
+            if depth == 0:
+                self.profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._depth.n = depth
+                if depth == 0:
+                    self.profile.disable()
+
+        return wrapper
+
+    def start(self) -> "CProfileProfiler":
+        self._started = time.perf_counter()
+        if self.scope is None:
+            self.profile.enable()
+        return self
+
+    def stop(self) -> None:
+        if self.scope is None:
+            self.profile.disable()
+        self.elapsed = time.perf_counter() - self._started
+
+    def save(self, prefix: str) -> list[str]:
+        path = f"{prefix}.pstats"
+        self.profile.dump_stats(path)
+        return [path]
+
+
+def create(scope: str | None = None) -> "SamplingProfiler | CProfileProfiler":
+    if hasattr(sys, "_current_frames"):
+        return SamplingProfiler(scope=scope)
+    return CProfileProfiler(scope=scope)
+
+
+def finish(profiler: "SamplingProfiler | CProfileProfiler", prefix: str | None = None) -> None:
+    """Stop the profiler, write its outputs and print where they went."""
+    profiler.stop()
+    prefix = prefix or (os.environ.get("RIVA_PROFILE_OUT") or "").strip() or "riva-profile"
+    try:
+        paths = profiler.save(prefix)
+    except Exception as e:
+        print(f"[profile] could not write output: {e}", file=sys.stderr)
+        return
+    scope = profiler.scope or "everything"
+    ticks = getattr(profiler, "sample_ticks", None)
+    detail = f", {ticks} sampling ticks" if ticks is not None else ""
+    print(f"[profile] {scope} over {profiler.elapsed:.1f}s{detail} -> {', '.join(paths)}", file=sys.stderr)
+
+
+def print_top(path: str, top: int = 25) -> None:
+    import pstats
+
+    pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+
+
+if __name__ == "__main__":
+    # python profiler.py riva-profile.pstats: show the hottest functions.
+    print_top(sys.argv[1] if len(sys.argv) > 1 else "riva-profile.pstats")
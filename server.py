@@ -0,0 +1,516 @@
+import asyncio
+import base64
+import contextvars
+import hashlib
+import json
+import os
+import struct
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+import brain
+import tracing
+from latency_stats import format_summary, summarize
+
+
+# Local-only by default: this drives apps on the host PC.
+# Override with RIVA_SERVE_HOST / RIVA_SERVE_PORT / RIVA_SERVE_WORKERS.
+_DEFAULT_HOST = "127.0.0.1"
+_DEFAULT_PORT = 8765
+_DEFAULT_WORKERS = 32
+
+# Forget sessions nobody has talked to for a while.
+_SESSION_IDLE_TTL_SEC = 30 * 60
+_SESSION_SWEEP_SEC = 60
+
+_MAX_BODY_BYTES = 64 * 1024
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return int(raw) if raw else default
+    except Exception:
+        return default
+
+
+class RivaServer:
+    """Local HTTP/WebSocket front end for `brain.process`.
+
+    - `POST /command` with `{"session": "...", "text": "...", "require_wake_word": false}`
+      streams replies back as NDJSON (`{"type": "say", ...}` lines, then `{"type": "done", ...}`).
+    - `GET /ws?session=...` upgrades to a WebSocket; each text frame is a command
+      (plain text or the same JSON), replies come back as JSON frames.
+    - `GET /health`, `GET /stats`.
+
+    Commands run on a worker pool. Each session has its own memory (wake window,
+    pending confirmations) and commands within one session run in order.
+    """
+
+    def __init__(self, host: str = _DEFAULT_HOST, port: int = _DEFAULT_PORT, workers: int = _DEFAULT_WORKERS):
+        self.host = host
+        self.port = port
+        self.sessions: dict[str, brain.Session] = {}
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="riva-serve")
+        self._server: asyncio.AbstractServer | None = None
+        self._sweeper: asyncio.Task | None = None
+        self.stats: dict[str, int] = {"commands": 0, "errors": 0, "in_flight": 0, "connections": 0}
+
+    # --- lifecycle -----------------------------------------------------------
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sock = (self._server.sockets or [None])[0]
+        if sock is not None:
+            self.port = int(sock.getsockname()[1])
+        self._sweeper = asyncio.create_task(self._sweep_sessions())
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"[serve] listening on http://{self.host}:{self.port} (POST /command, GET /ws)")
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _sweep_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(_SESSION_SWEEP_SEC)
+            cutoff = time.monotonic() - _SESSION_IDLE_TTL_SEC
+            for sid, session in list(self.sessions.items()):
+                lock = self._session_locks.get(sid)
+                if session.last_seen < cutoff and (lock is None or not lock.locked()):
+                    self.sessions.pop(sid, None)
+                    self._session_locks.pop(sid, None)
+
+    # --- command execution ----------------------------------------------------
+    def _get_session(self, session_id: str) -> tuple[brain.Session, asyncio.Lock]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = brain.Session(session_id)
+            self.sessions[session_id] = session
+            self._session_locks[session_id] = asyncio.Lock()
+        session.last_seen = time.monotonic()
+        return session, self._session_locks[session_id]
+
+    async def run_command(
+        self,
+        session_id: str,
+        text: str,
+        require_wake_word: bool,
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+    ) -> dict[str, Any]:
+        """Run one command for a session, streaming replies to `send` as they happen."""
+        session, lock = self._get_session(session_id)
+        loop = asyncio.get_running_loop()
+        async with lock:
+            replies: asyncio.Queue = asyncio.Queue()
+
+            def emit(reply: str) -> None:
+                loop.call_soon_threadsafe(replies.put_nowait, {"type": "say", "text": reply})
+
+            def work() -> tuple[str, bool]:
+                try:
+                    with tracing.trace("request", session=session_id), brain.session_scope(session):
+                        return brain.process(text, require_wake_word=require_wake_word), False
+                except SystemExit:
+                    # "now leave" ends this client's session, not the server.
+                    return "exit", True
+                except Exception as e:
+                    emit(f"Error: {e}")
+                    return "error", False
+                finally:
+                    loop.call_soon_threadsafe(replies.put_nowait, None)
+
+            session.emit = emit
+            self.stats["commands"] += 1
+            self.stats["in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                future = loop.run_in_executor(self._executor, contextvars.copy_context().run, work)
+                while True:
+                    item = await replies.get()
+                    if item is None:
+                        break
+                    await send(item)
+                intent, ended = await future
+            finally:
+                self.stats["in_flight"] -= 1
+                session.emit = None
+
+        if intent == "error":
+            self.stats["errors"] += 1
+        if ended:
+            self.sessions.pop(session_id, None)
+            self._session_locks.pop(session_id, None)
+        done = {
+            "type": "done",
+            "session": session_id,
+            "intent": intent,
+            "ended": ended,
+            "latency_ms": round((time.perf_counter() - started) * 1000.0, 3),
+        }
+        await send(done)
+        return done
+
+    # --- HTTP ---------------------------------------------------------------
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request = await _read_http_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._handle_websocket(reader, writer, headers, query)
+                    break
+
+                if url.path == "/command":
+                    if method != "POST":
+                        await _write_json(writer, 405, {"error": "use POST"}, keep_alive)
+                    elif body is None:
+                        await _write_json(writer, 413, {"error": "body too large"}, False)
+                        break
+                    else:
+                        await self._handle_command_http(writer, body, query, keep_alive)
+                elif url.path == "/health":
+                    await _write_json(writer, 200, {"ok": True}, keep_alive)
+                elif url.path == "/stats":
+                    await _write_json(writer, 200, {**self.stats, "sessions": len(self.sessions)}, keep_alive)
+                else:
+                    await _write_json(writer, 404, {"error": "not found"}, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _handle_command_http(
+        self,
+        writer: asyncio.StreamWriter,
+        body: bytes,
+        query: dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+        except Exception as e:
+            await _write_json(writer, 400, {"error": f"invalid JSON: {e}"}, keep_alive)
+            return
+
+        text = str(payload.get("text") or "")
+        session_id = str(payload.get("session") or query.get("session") or uuid.uuid4().hex)
+        require_wake_word = bool(payload.get("require_wake_word", False))
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            + (b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n")
+            + b"\r\n"
+        )
+
+        async def send(item: dict[str, Any]) -> None:
+            line = (json.dumps(item) + "\n").encode("utf-8")
+            writer.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            await writer.drain()
+
+        await self.run_command(session_id, text, require_wake_word, send)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    # --- WebSocket ------------------------------------------------------------
+    async def _handle_websocket(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        headers: dict[str, str],
+        query: dict[str, str],
+    ) -> None:
+        key = headers.get("sec-websocket-key", "")
+        if not key:
+            await _write_json(writer, 400, {"error": "missing Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            + f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+
+        session_id = query.get("session") or uuid.uuid4().hex
+
+        async def send(item: dict[str, Any]) -> None:
+            writer.write(_ws_frame(0x1, json.dumps(item).encode("utf-8")))
+            await writer.drain()
+
+        await send({"type": "session", "session": session_id})
+        while True:
+            frame = await _read_ws_message(reader, writer)
+            if frame is None:
+                break
+            raw = frame.decode("utf-8", errors="replace")
+            require_wake_word = query.get("require_wake_word", "") in ("1", "true", "yes")
+            text = raw
+            try:
+                payload = json.loads(raw)
+                if isinstance(payload, dict):
+                    text = str(payload.get("text") or "")
+                    require_wake_word = bool(payload.get("require_wake_word", require_wake_word))
+            except Exception:
+                pass
+            done = await self.run_command(session_id, text, require_wake_word, send)
+            if done.get("ended"):
+                writer.write(_ws_frame(0x8, struct.pack("!H", 1000)))
+                await writer.drain()
+                break
+
+
+async def _read_http_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, dict[str, str], bytes | None] | None:
+    """Read one HTTP/1.1 request. Returns None on EOF; body is None if too large."""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").strip().split()
+    if len(parts) < 2:
+        raise ValueError("bad request line")
+    method, target = parts[0].upper(), parts[1]
+
+    headers: dict[str, str] = {}
+    while True:
+        h = await reader.readline()
+        if not h or h in (b"\r\n", b"\n"):
+            break
+        name, _, value = h.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > _MAX_BODY_BYTES:
+        return method, target, headers, None
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, target, headers, body
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, 'OK')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("ascii")
+        + body
+    )
+    await writer.drain()
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """Encode a single unmasked (server-to-client) WebSocket frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < (1 << 16):
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+async def _read_ws_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bytes | None:
+    """Read one complete text/binary message, answering pings. None on close/EOF."""
+    chunks: list[bytes] = []
+    while True:
+        try:
+            b1, b2 = await reader.readexactly(2)
+        except asyncio.IncompleteReadError:
+            return None
+        fin = bool(b1 & 0x80)
+        opcode = b1 & 0x0F
+        masked = bool(b2 & 0x80)
+        n = b2 & 0x7F
+        if n == 126:
+            (n,) = struct.unpack("!H", await reader.readexactly(2))
+        elif n == 127:
+            (n,) = struct.unpack("!Q", await reader.readexactly(8))
+        if n > _MAX_BODY_BYTES:
+            return None
+        mask = await reader.readexactly(4) if masked else b""
+        payload = await reader.readexactly(n) if n else b""
+        if masked:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+        if opcode == 0x8:
+            writer.write(_ws_frame(0x8, payload[:2]))
+            await writer.drain()
+            return None
+        if opcode == 0x9:
+            writer.write(_ws_frame(0xA, payload))
+            await writer.drain()
+            continue
+        if opcode == 0xA:
+            continue
+
+        chunks.append(payload)
+        if fin:
+            return b"".join(chunks)
+
+
+def run(host: str | None = None, port: int | None = None) -> None:
+    """Entry point for `main.py --serve`."""
+    # As in voice/text mode: start the telemetry sampler and build the lookup indexes in the background.
+    brain.warm_up()
+    server = RivaServer(
+        host=host or (os.environ.get("RIVA_SERVE_HOST") or "").strip() or _DEFAULT_HOST,
+        port=port if port is not None else _env_int("RIVA_SERVE_PORT", _DEFAULT_PORT),
+        workers=_env_int("RIVA_SERVE_WORKERS", _DEFAULT_WORKERS),
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print()
+
+
+# --- load testing -------------------------------------------------------------
+
+# Harmless commands only: nothing here launches apps or shuts the PC down.
+_LOADTEST_SCRIPT = [
+    "hi riva",
+    "current time",
+    "who am i",
+    "shutdown",
+    "cancel",
+    "who are you",
+]
+
+
+async def _http_command(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, session: str, text: str) -> list[dict]:
+    body = json.dumps({"session": session, "text": text, "require_wake_word": True}).encode("utf-8")
+    writer.write(
+        b"POST /command HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+        + body
+    )
+    await writer.drain()
+
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"unexpected status: {status!r}")
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    items: list[dict] = []
+    while True:
+        size = int((await reader.readline()).strip() or b"0", 16)
+        if size == 0:
+            await reader.readline()
+            return items
+        items.append(json.loads(await reader.readexactly(size)))
+        await reader.readexactly(2)
+
+
+async def loadtest(host: str, port: int, sessions: int, commands: int) -> dict[str, Any]:
+    """Drive `sessions` concurrent keep-alive clients, each sending `commands` commands."""
+    latencies_ms: list[float] = []
+    errors = 0
+
+    async def client(i: int) -> None:
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for j in range(commands):
+                text = _LOADTEST_SCRIPT[j % len(_LOADTEST_SCRIPT)]
+                t0 = time.perf_counter()
+                try:
+                    items = await _http_command(reader, writer, f"load-{i}", text)
+                except Exception:
+                    errors += 1
+                    return
+                latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+                if not items or items[-1].get("type") != "done":
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(sessions)))
+    wall = time.perf_counter() - started
+    summary = summarize(latencies_ms)
+    return {
+        "sessions": sessions,
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "wall_sec": wall,
+        "throughput_rps": len(latencies_ms) / wall if wall > 0 else 0.0,
+        "latency_ms": summary,
+    }
+
+
+async def _loadtest_main(args) -> None:
+    server = None
+    host, port = args.host, args.port
+    if not args.external:
+        server = RivaServer(host="127.0.0.1", port=0, workers=args.workers)
+        await server.start()
+        host, port = server.host, server.port
+    try:
+        result = await loadtest(host, port, args.sessions, args.commands)
+    finally:
+        if server is not None:
+            await server.close()
+    print(
+        f"[loadtest] {result['sessions']} sessions, {result['requests']} requests, "
+        f"{result['errors']} errors, {result['wall_sec']:.2f}s, {result['throughput_rps']:.0f} req/s"
+    )
+    print(format_summary("[loadtest] latency", result["latency_ms"]))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Riva local server / load tester")
+    parser.add_argument("--loadtest", action="store_true", help="run a localhost load test instead of serving")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=6, help="commands per session")
+    parser.add_argument("--workers", type=int, default=_DEFAULT_WORKERS)
+    parser.add_argument("--external", action="store_true", help="target an already running server")
+    parser.add_argument("--host", default=_DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=_DEFAULT_PORT)
+    ns = parser.parse_args()
+
+    if ns.loadtest:
+        asyncio.run(_loadtest_main(ns))
+    else:
+        run(ns.host, ns.port)
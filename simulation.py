@@ -0,0 +1,1260 @@
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import shlex
+import subprocess as _real_subprocess
+import sys
+import tempfile
+import threading
+import time as _real_time
+import types
+import urllib.error
+import urllib.parse
+import urllib.request
+import wave
+from datetime import datetime as _real_datetime
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import brain
+import chrome_urls
+import launch_registry
+import procexec
+import speech
+import stt_tuning
+from app_index import AppIndex
+from chrome_urls import UIAutomationProvider
+from debounce import Debouncer
+from folder_index import FolderIndex
+from launch_registry import LaunchRegistry
+from latency_stats import format_summary, summarize
+from site_catalog import SiteCatalog
+from storage import MemoryStore
+from power import PowerManager
+from stt_language import LanguagePolicy
+from stt_models import ModelManager
+from telemetry import Telemetry
+
+# Deterministic end-to-end simulation of the voice loop on any OS.
+#
+# brain.py and speech.py keep running unmodified; the simulation swaps the
+# modules they reach the outside world through:
+#   - time          -> SimClock (virtual time; sleeps and modeled costs advance it)
+#   - subprocess    -> FakeSubprocess, under procexec (PowerShell, taskkill, tasklist,
+#                      cmd, explorer, chrome, code, shutdown, with seeded latency
+#                      models and optional hangs)
+#   - os / sys      -> proxies reporting Windows (os.name "nt", os.system intercepted)
+#   - psutil        -> the simulated process table (also under launch_registry)
+#   - sounddevice / whisper -> an AudioSource that plays scripted clips (or WAV
+#                      files) through speech.listen(), and a transcriber that returns
+#                      the clip's transcript after a modeled delay
+#
+# Latencies are reported in simulated seconds, so runs are reproducible for a seed.
+# Actions that ActionExecutor runs concurrently share the one clock, so their
+# modeled costs add up (an upper bound for multi-action responses).
+
+
+# --- clock --------------------------------------------------------------------
+
+class SimClock:
+    """Virtual time. Nothing advances it except sleep()/advance()."""
+
+    def __init__(self, epoch: float = 1_750_000_000.0):
+        self.epoch = epoch
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self.now += seconds
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(float(seconds))
+
+
+class _TimeModule(types.ModuleType):
+    """Drop-in for the `time` module backed by a SimClock."""
+
+    def __init__(self, clock: SimClock):
+        super().__init__("time")
+        self.time = clock.time
+        self.monotonic = clock.monotonic
+        self.perf_counter = clock.perf_counter
+        self.sleep = clock.sleep
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_real_time, name)
+
+
+def _datetime_for(clock: SimClock) -> type:
+    """`datetime` whose now() follows the simulated clock."""
+
+    class SimDatetime(_real_datetime):
+        @classmethod
+        def now(cls, tz: Any = None) -> Any:
+            return _real_datetime.fromtimestamp(clock.time(), tz)
+
+    return SimDatetime
+
+
+class _SimCondition(threading.Condition):
+    """Condition whose timed waits elapse on the simulated clock."""
+
+    def __init__(self, clock: SimClock):
+        super().__init__()
+        self._clock = clock
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if timeout is None:
+            return super().wait(0.0)
+        self._clock.sleep(timeout)
+        return True
+
+
+# --- desktop model --------------------------------------------------------------
+
+@dataclass
+class Tab:
+    url: str
+    title: str
+
+
+@dataclass
+class Window:
+    hwnd: int
+    pid: int
+    title: str
+    cls: str
+    tabs: list[Tab] = field(default_factory=list)
+    active_tab: int = 0
+
+
+@dataclass
+class Proc:
+    pid: int
+    image: str
+    parent: int = 0
+    created: float = 0.0
+
+
+_SITE_TITLES = {
+    "youtube.com": "YouTube",
+    "facebook.com": "Facebook",
+    "mail.google.com": "Inbox - Gmail",
+    "github.com": "GitHub",
+    "web.whatsapp.com": "WhatsApp",
+}
+
+
+def _title_for_url(url: str) -> str:
+    host = (urllib.parse.urlsplit(url).hostname or url).lower()
+    for domain, title in _SITE_TITLES.items():
+        if host == domain or host.endswith("." + domain):
+            return title
+    return host or "New Tab"
+
+
+class Desktop:
+    """Processes, top-level windows, Chrome tabs and the foreground window."""
+
+    def __init__(self, chrome_installed: bool = True, whatsapp_installed: bool = True, clock: SimClock | None = None):
+        self.clock = clock
+        self.chrome_installed = chrome_installed
+        self.whatsapp_installed = whatsapp_installed
+        self.reset()
+
+    def reset(self) -> None:
+        self.procs: dict[int, Proc] = {}
+        self.windows: dict[int, Window] = {}
+        self.foreground = 0
+        self.shutdown_requested = False
+        self._next_pid = 4000
+        self._next_hwnd = 0x10000
+
+    def _spawn(self, image: str, parent: int = 0) -> Proc:
+        self._next_pid += 4
+        p = Proc(self._next_pid, image, parent, self.clock.time() if self.clock else 0.0)
+        self.procs[p.pid] = p
+        return p
+
+    def _window(self, pid: int, title: str, cls: str) -> Window:
+        self._next_hwnd += 0x10
+        w = Window(self._next_hwnd, pid, title, cls)
+        self.windows[w.hwnd] = w
+        self.foreground = w.hwnd
+        return w
+
+    def running(self, image: str) -> list[Proc]:
+        image = image.lower()
+        return [p for p in self.procs.values() if p.image.lower() == image]
+
+    def process_name(self, pid: int) -> str:
+        p = self.procs.get(pid)
+        return os.path.splitext(p.image)[0] if p else ""
+
+    # Launchers
+
+    def open_chrome(self, url: str | None = None) -> None:
+        main = self.running("chrome.exe")
+        if not main:
+            root = self._spawn("chrome.exe")
+            for _ in range(3):
+                self._spawn("chrome.exe", parent=root.pid)
+            win = self._window(root.pid, "New Tab - Google Chrome", "Chrome_WidgetWin_1")
+            win.tabs.append(Tab("chrome://newtab/", "New Tab"))
+        else:
+            # A hand-off to the running browser still starts a renderer under it.
+            self._spawn("chrome.exe", parent=min(p.pid for p in main))
+        chrome_pids = {p.pid for p in self.running("chrome.exe")}
+        wins = [w for w in self.windows.values() if w.pid in chrome_pids]
+        win = wins[-1] if wins else self._window(min(chrome_pids), "New Tab - Google Chrome", "Chrome_WidgetWin_1")
+        if url:
+            win.tabs.append(Tab(url, _title_for_url(url)))
+            win.active_tab = len(win.tabs) - 1
+        if not win.tabs:
+            win.tabs.append(Tab("chrome://newtab/", "New Tab"))
+        win.title = f"{win.tabs[win.active_tab].title} - Google Chrome"
+        self.foreground = win.hwnd
+
+    def open_app(self, image: str, title: str, cls: str) -> None:
+        if not self.running(image):
+            p = self._spawn(image)
+            self._window(p.pid, title, cls)
+        else:
+            for w in self.windows.values():
+                if self.procs.get(w.pid) and self.procs[w.pid].image.lower() == image.lower():
+                    self.foreground = w.hwnd
+
+    def open_folder(self, path: str) -> None:
+        explorer = self.running("explorer.exe") or [self._spawn("explorer.exe")]
+        # Explorer titles a folder window with the folder's name ("." shows the current folder's).
+        self._window(explorer[0].pid, os.path.basename(os.path.abspath(path or ".")) or path or "File Explorer", "CabinetWClass")
+
+    # Closers
+
+    def close_window(self, hwnd: int) -> bool:
+        w = self.windows.pop(hwnd, None)
+        if w is None:
+            return False
+        if self.foreground == hwnd:
+            self.foreground = max(self.windows) if self.windows else 0
+        proc = self.procs.get(w.pid)
+        if proc and proc.image.lower() != "explorer.exe" and not any(x.pid == w.pid for x in self.windows.values()):
+            self.kill_tree(w.pid)
+        return True
+
+    def kill_tree(self, pid: int) -> None:
+        children = [p.pid for p in self.procs.values() if p.parent == pid]
+        for c in children:
+            self.kill_tree(c)
+        self.procs.pop(pid, None)
+        for hwnd in [h for h, w in self.windows.items() if w.pid == pid]:
+            self.windows.pop(hwnd, None)
+            if self.foreground == hwnd:
+                self.foreground = max(self.windows) if self.windows else 0
+
+    def kill_image(self, image: str) -> bool:
+        procs = self.running(image)
+        for p in procs:
+            self.kill_tree(p.pid)
+        return bool(procs)
+
+    def foreground_chrome(self) -> Window | None:
+        w = self.windows.get(self.foreground)
+        if w and self.process_name(w.pid).lower() == "chrome":
+            return w
+        return None
+
+    def close_active_tab(self) -> bool:
+        w = self.foreground_chrome()
+        if w is None or not w.tabs:
+            return False
+        w.tabs.pop(w.active_tab)
+        if not w.tabs:
+            self.close_window(w.hwnd)
+            return True
+        w.active_tab = min(w.active_tab, len(w.tabs) - 1)
+        w.title = f"{w.tabs[w.active_tab].title} - Google Chrome"
+        return True
+
+
+# --- subprocess double ----------------------------------------------------------
+
+# (mean ms, std-dev ms) per program; PowerShell dominates because of its cold start.
+DEFAULT_LATENCY_MS: dict[str, tuple[float, float]] = {
+    "powershell": (380.0, 90.0),
+    "powershell_sta": (40.0, 10.0),
+    "taskkill": (70.0, 20.0),
+    "tasklist": (110.0, 30.0),
+    "cmd": (90.0, 20.0),
+    "explorer": (160.0, 40.0),
+    "chrome": (45.0, 10.0),
+    "code": (60.0, 15.0),
+    "shutdown": (30.0, 5.0),
+    "psutil_scan": (8.0, 2.0),
+    "cdp": (2.0, 0.5),
+    "whisper_load": (1400.0, 150.0),
+    "whisper_load_tiny": (450.0, 60.0),
+    "whisper_fixed": (150.0, 30.0),
+    "whisper_detect": (120.0, 25.0),
+    "other": (50.0, 10.0),
+}
+# Transcription cost per second of audio, and TTS speaking rate.
+WHISPER_RTF = 0.30
+# How long a hung child would run if nobody killed it.
+HANG_SEC = 3600.0
+# Tools that start an app and return; everything else runs until it exits.
+_LAUNCHERS = {"chrome", "explorer", "code"}
+TTS_WORDS_PER_SEC = 2.6
+
+
+class FakeCompleted(_real_subprocess.CompletedProcess):
+    pass
+
+
+class FakePopen:
+    """A child whose modeled run time elapses when the caller waits on it."""
+
+    def __init__(self, sim: "FakeSubprocess", args: Any, returncode: int, stdout: Any, duration: float):
+        self.args = args
+        self.pid = sim.desktop._next_pid + 1
+        self._sim = sim
+        self._returncode = returncode
+        self._stdout = stdout
+        self._left = duration
+        self.returncode: int | None = None if duration > 0 else returncode
+
+    def poll(self) -> int | None:
+        return self.returncode
+
+    def _run_for(self, timeout: float | None) -> None:
+        if self.returncode is not None:
+            return
+        if timeout is not None and self._left > timeout:
+            self._sim.clock.advance(timeout)
+            self._left -= timeout
+            raise _real_subprocess.TimeoutExpired(self.args, timeout)
+        self._sim.clock.advance(self._left)
+        self._left = 0.0
+        self.returncode = self._returncode
+
+    def wait(self, timeout: float | None = None) -> int | None:
+        self._run_for(timeout)
+        return self.returncode
+
+    def communicate(self, input: Any = None, timeout: float | None = None) -> tuple[Any, Any]:
+        self._run_for(timeout)
+        return (self._stdout if self._returncode == self.returncode else None), None
+
+    def kill(self) -> None:
+        if self.returncode is None:
+            self._left = 0.0
+            self.returncode = -9
+
+    terminate = kill
+
+
+class FakeSubprocess(types.ModuleType):
+    """Stands in for the `subprocess` module: models each tool's effect and latency."""
+
+    def __init__(self, clock: SimClock, desktop: Desktop, rng: random.Random,
+                 latency_ms: dict[str, tuple[float, float]] | None = None):
+        super().__init__("subprocess")
+        self.clock = clock
+        self.desktop = desktop
+        self.rng = rng
+        self.latency_ms = dict(DEFAULT_LATENCY_MS, **(latency_ms or {}))
+        self.calls: dict[str, int] = {}
+        self.spent: dict[str, float] = {}
+        self.tts_log: list[tuple[float, str]] = []
+        # Probability per tool that a call hangs (never finishes on its own).
+        self.hang: dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._deferred: float | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_real_subprocess, name)
+
+    def cost(self, kind: str, extra_sec: float = 0.0) -> None:
+        mean, sd = self.latency_ms.get(kind, self.latency_ms["other"])
+        with self._lock:
+            sec = max(mean * 0.2, self.rng.gauss(mean, sd)) / 1000.0 + extra_sec
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.spent[kind] = self.spent.get(kind, 0.0) + sec
+        self.charge(sec)
+
+    def charge(self, sec: float) -> None:
+        """Time spent by the child being modeled (or by the caller, outside a child)."""
+        with self._lock:
+            if self._deferred is not None:
+                self._deferred += sec
+                return
+        self.clock.advance(sec)
+
+    def _blocking(self, args: Any, kw: dict[str, Any]) -> tuple[int, str]:
+        code, out, duration = self._exec(args)
+        timeout = kw.get("timeout")
+        if timeout is not None and duration > timeout:
+            self.clock.advance(timeout)
+            raise _real_subprocess.TimeoutExpired(args, timeout)
+        self.clock.advance(duration)
+        return code, out
+
+    # subprocess API
+
+    def run(self, args: Any, *a: Any, **kw: Any) -> FakeCompleted:
+        code, out = self._blocking(args, kw)
+        if kw.get("check") and code != 0:
+            raise _real_subprocess.CalledProcessError(code, args, out)
+        return FakeCompleted(args, code, self._encode(out, kw), None)
+
+    def check_output(self, args: Any, *a: Any, **kw: Any) -> Any:
+        code, out = self._blocking(args, kw)
+        if code != 0:
+            raise _real_subprocess.CalledProcessError(code, args, out)
+        return self._encode(out, kw)
+
+    def Popen(self, args: Any, *a: Any, **kw: Any) -> FakePopen:
+        code, out, duration = self._exec(args)
+        if self._prog(args) in _LAUNCHERS and duration < HANG_SEC:
+            # A launcher's modeled latency is the time to start the app, which the
+            # caller pays whether or not it waits.
+            self.clock.advance(duration)
+            duration = 0.0
+        return FakePopen(self, args, code, self._encode(out, kw), duration)
+
+    def call(self, args: Any, *a: Any, **kw: Any) -> int:
+        return self._blocking(args, kw)[0]
+
+    def system(self, command: str) -> int:
+        """os.system() replacement."""
+        return self._blocking(command, {})[0]
+
+    def startfile(self, target: str) -> None:
+        """os.startfile() replacement (default browser)."""
+        self._exec(["cmd", "/c", "start", "", target])
+
+    @staticmethod
+    def _encode(out: str, kw: dict[str, Any]) -> Any:
+        if kw.get("text") or kw.get("universal_newlines") or kw.get("encoding"):
+            return out
+        return out.encode("utf-8")
+
+    # Tool models
+
+    @staticmethod
+    def _argv(args: Any) -> list[str]:
+        argv = shlex.split(args, posix=False) if isinstance(args, str) else [str(a) for a in args]
+        return [a.strip('"') for a in argv]
+
+    def _prog(self, args: Any) -> str:
+        argv = self._argv(args)
+        prog = os.path.basename(argv[0].replace("\\", "/")).lower() if argv else ""
+        return prog[:-4] if prog.endswith(".exe") else prog
+
+    def _exec(self, args: Any) -> tuple[int, str, float]:
+        """Apply a command's effects; returns (exit code, stdout, modeled seconds)."""
+        argv = self._argv(args)
+        if not argv:
+            return 1, "", 0.0
+        prog = self._prog(argv)
+        with self._lock:
+            if self.hang.get(prog, 0.0) > 0 and self.rng.random() < self.hang[prog]:
+                self.calls["hang"] = self.calls.get("hang", 0) + 1
+                return 0, "", HANG_SEC
+            self._deferred = 0.0
+            try:
+                handler = getattr(self, f"_tool_{prog}", None)
+                if handler is None:
+                    self.cost("other")
+                    code, out = 1, ""
+                else:
+                    code, out = handler(argv)
+                return code, out, self._deferred
+            finally:
+                self._deferred = None
+
+    def _tool_powershell(self, argv: list[str]) -> tuple[int, str]:
+        script = argv[argv.index("-Command") + 1] if "-Command" in argv else ""
+        sleeps = sum(int(m) for m in re.findall(r"Start-Sleep -Milliseconds (\d+)", script)) / 1000.0
+        self.cost("powershell", sleeps)
+        if "-STA" in argv:
+            self.cost("powershell_sta")
+        return 0, PowerShellModel(self).run(script)
+
+    def _tool_taskkill(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("taskkill")
+        d = self.desktop
+        killed = False
+        upper = [a.upper() for a in argv]
+        for flag, value in zip(upper, argv[1:]):
+            if flag == "/IM":
+                killed = d.kill_image(value) or killed
+            elif flag == "/PID":
+                try:
+                    pid = int(value)
+                except ValueError:
+                    continue
+                if pid in d.procs:
+                    d.kill_tree(pid)
+                    killed = True
+        return (0 if killed else 128), ""
+
+    def _tool_tasklist(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("tasklist")
+        m = re.search(r"IMAGENAME eq (\S+)", " ".join(argv), re.IGNORECASE)
+        procs = self.desktop.running(m.group(1)) if m else list(self.desktop.procs.values())
+        if not procs:
+            return 0, "INFO: No tasks are running which match the specified criteria.\n"
+        return 0, "\n".join(f"{p.image:<25} {p.pid:>8} Console 1 10,000 K" for p in procs) + "\n"
+
+    def _tool_cmd(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("cmd")
+        target = argv[-1] if argv else ""
+        if target.lower().startswith("whatsapp:"):
+            if not self.desktop.whatsapp_installed:
+                return 1, ""
+            self.desktop.open_app("WhatsApp.exe", "WhatsApp", "ApplicationFrameWindow")
+        elif target.lower().startswith("http"):
+            self.desktop.open_chrome(target)
+        elif target.lower() == "code":
+            return self._tool_code(argv)
+        return 0, ""
+
+    def _tool_explorer(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("explorer")
+        target = argv[1] if len(argv) > 1 else "."
+        if "whatsapp" in target.lower():
+            if self.desktop.whatsapp_installed:
+                self.desktop.open_app("WhatsApp.exe", "WhatsApp", "ApplicationFrameWindow")
+        else:
+            self.desktop.open_folder(target)
+        return 0, ""
+
+    def _tool_chrome(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("chrome")
+        urls = [a for a in argv[1:] if not a.startswith("--")]
+        if not urls:
+            self.desktop.open_chrome(None)
+        for u in urls:
+            self.desktop.open_chrome(u)
+        return 0, ""
+
+    def _tool_code(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("code")
+        self.desktop.open_app("Code.exe", "Welcome - Visual Studio Code", "Chrome_WidgetWin_1")
+        return 0, ""
+
+    def _tool_shutdown(self, argv: list[str]) -> tuple[int, str]:
+        self.cost("shutdown")
+        self.desktop.shutdown_requested = True
+        return 0, ""
+
+
+class PowerShellModel:
+    """Recognizes the PowerShell snippets brain.py/speech.py send and applies them."""
+
+    def __init__(self, sim: FakeSubprocess):
+        self.sim = sim
+        self.d = sim.desktop
+
+    def run(self, script: str) -> str:
+        d = self.d
+        if "$s.Speak(" in script:
+            m = re.search(r"\$s\.Speak\('(.*)'\);", script, re.DOTALL)
+            text = (m.group(1) if m else "").replace("''", "'")
+            started = self.sim.clock.now + (self.sim._deferred or 0.0)
+            self.sim.tts_log.append((started, text))
+            self.sim.charge(len(text.split()) / TTS_WORDS_PER_SEC)
+            return ""
+        if "GetInstalledVoices" in script:
+            return "Microsoft David Desktop\nMicrosoft Zira Desktop\n"
+        if "RivaBatch" in script:
+            return self._close_batch(script)
+        if "UIAutomationClient" in script:
+            m = re.search(r"\$hwnds=@\(([\d,\s]*)\)", script)
+            wanted = {int(h) for h in (m.group(1).split(",") if m else []) if h.strip()}
+            return json.dumps([
+                {"hwnd": w.hwnd, "url": w.tabs[w.active_tab].url if w.tabs else ""}
+                for w in d.windows.values()
+                if d.process_name(w.pid).lower() == "chrome" and (not wanted or w.hwnd in wanted)
+            ])
+        if "EnumWindows" in script:
+            return json.dumps([
+                {"hwnd": w.hwnd, "pid": w.pid, "process": d.process_name(w.pid), "title": w.title, "class": w.cls}
+                for w in d.windows.values()
+            ])
+        if "Shell.Application" in script:
+            explorer_wins = [w for w in d.windows.values() if w.cls == "CabinetWClass"]
+            if "GetForegroundWindow" in script:
+                fg = d.windows.get(d.foreground)
+                if fg is not None and fg.cls == "CabinetWClass":
+                    d.close_window(fg.hwnd)
+                    return "CLOSED"
+                return "NOACTIVE"
+            for w in explorer_wins:
+                d.close_window(w.hwnd)
+            return ""
+
+        m = re.search(r"\$h=\[IntPtr\](\d+)", script)
+        if m and "SetForegroundWindow" in script:
+            hwnd = int(m.group(1))
+            if hwnd in d.windows:
+                d.foreground = hwnd
+            if "^w" in script:
+                d.close_active_tab()
+                return "CLOSED"
+            return ""
+
+        if "GetForegroundWindow" in script and "NOTMATCH" in script:
+            w = d.foreground_chrome()
+            if w is None:
+                return "NOTCHROME" if d.windows.get(d.foreground) else "ERROR"
+            url = w.tabs[w.active_tab].url.lower() if w.tabs else ""
+            if not url:
+                return "NOURL"
+            pm = re.search(r"\$patterns=@\((.*?)\);", script)
+            patterns = re.findall(r"'([^']*)'", pm.group(1)) if pm else []
+            if not any(p in url for p in patterns):
+                return "NOTMATCH"
+            d.close_active_tab()
+            return "CLOSED"
+        if "GetForegroundWindow" in script and "'URL:'" in script:
+            return self._active_url("NOTCHROME")
+        if "SendWait('^w')" in script:
+            d.close_active_tab()
+            return "CLOSED"
+        return ""
+
+    def _close_batch(self, script: str) -> str:
+        """brain._close_batch: WM_CLOSE, a grace period, then force-stop what is left."""
+        d = self.d
+
+        def values(name: str) -> list[str]:
+            m = re.search(r"\$" + name + r"=@\((.*?)\);", script)
+            raw = m.group(1) if m else ""
+            return [v.replace("''", "'") for v in re.findall(r"'((?:[^']|'')*)'", raw)] or \
+                [v.strip() for v in raw.split(",") if v.strip()]
+
+        m = re.search(r"\$graceMs=(\d+)", script)
+        grace = int(m.group(1)) / 1000.0 if m else 0.0
+        res: dict[str, str] = {}
+        procs: dict[str, list[Proc]] = {}
+        for name in values("images"):
+            procs[f"image:{name}"] = d.running(name)
+        for pid in values("procIds"):
+            procs[f"pid:{pid}"] = [d.procs[int(pid)]] if int(pid) in d.procs else []
+        owned = {p.pid for ps in procs.values() for p in ps}
+        hwnds = [int(h) for h in values("hwnds")]
+        titles = values("titles")
+        targets: list[int] = []
+        hits: set[str] = set()
+        for h in hwnds:
+            if h in d.windows:
+                targets.append(h)
+            else:
+                res[f"hwnd:{h}"] = "NOT_FOUND"
+        for w in list(d.windows.values()):
+            if w.pid in owned:
+                targets.append(w.hwnd)
+                continue
+            for n in titles:
+                if n.lower() in w.title.lower():
+                    targets.append(w.hwnd)
+                    hits.add(n)
+        for h in dict.fromkeys(targets):
+            d.close_window(h)
+        if targets and any(p.pid in d.procs for ps in procs.values() for p in ps):
+            self.sim.charge(grace)
+        for key, ps in procs.items():
+            left = [p for p in ps if p.pid in d.procs]
+            if not ps:
+                res[key] = "NOT_RUNNING"
+            elif not left:
+                res[key] = "CLOSED"
+            else:
+                for p in left:
+                    d.kill_tree(p.pid)
+                res[key] = "KILLED"
+        for h in hwnds:
+            res.setdefault(f"hwnd:{h}", "OPEN" if h in d.windows else "CLOSED")
+        for n in titles:
+            res[f"title:{n}"] = "CLOSED" if n in hits else "NOT_FOUND"
+        return json.dumps(res)
+
+    def _active_url(self, not_chrome: str) -> str:
+        w = self.d.foreground_chrome()
+        if w is None:
+            return not_chrome
+        return "URL:" + (w.tabs[w.active_tab].url if w.tabs else "")
+
+
+# --- os / sys / psutil / urllib proxies ----------------------------------------
+
+class _OsPath(types.ModuleType):
+    def __init__(self, desktop: Desktop):
+        super().__init__("os.path")
+        self._desktop = desktop
+
+    def exists(self, p: Any) -> bool:
+        s = str(p).replace("\\", "/").lower()
+        if s.endswith("/chrome/application/chrome.exe"):
+            return self._desktop.chrome_installed
+        return os.path.exists(p)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(os.path, name)
+
+
+class _OsModule(types.ModuleType):
+    """`os` as seen from Windows: name "nt", system()/startfile() go to the fakes."""
+
+    def __init__(self, sim: FakeSubprocess):
+        super().__init__("os")
+        self.name = "nt"
+        self.system = sim.system
+        self.startfile = sim.startfile
+        self.path = _OsPath(sim.desktop)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(os, name)
+
+
+class _SysModule(types.ModuleType):
+    def __init__(self):
+        super().__init__("sys")
+        self.platform = "win32"
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(sys, name)
+
+
+class _FakePsutilProcess:
+    def __init__(self, proc: Proc, desktop: Desktop):
+        self.pid = proc.pid
+        # Stable per-process load so telemetry's top lists don't depend on the host.
+        self.info = {
+            "name": proc.image,
+            "pid": proc.pid,
+            "create_time": proc.created,
+            "ppid": proc.parent,
+            "cpu_percent": float(proc.pid % 7) * 3.0,
+            "memory_info": types.SimpleNamespace(rss=(40 + proc.pid % 11 * 30) * 1024 * 1024),
+        }
+        self._desktop = desktop
+
+    def name(self) -> str:
+        return self.info["name"]
+
+    def create_time(self) -> float:
+        return self.info["create_time"]
+
+    def children(self, recursive: bool = False) -> list["_FakePsutilProcess"]:
+        d = self._desktop
+        out = [_FakePsutilProcess(p, d) for p in d.procs.values() if p.parent == self.pid]
+        if recursive:
+            for c in list(out):
+                out.extend(c.children(recursive=True))
+        return out
+
+    def terminate(self) -> None:
+        self._desktop.kill_tree(self.pid)
+
+    kill = terminate
+
+
+class FakePsutil(types.ModuleType):
+    def __init__(self, sim: FakeSubprocess, battery: tuple[float, bool] | None = (76.0, False)):
+        super().__init__("psutil")
+        self._sim = sim
+        self._battery = battery
+
+    class NoSuchProcess(Exception):
+        pass
+
+    def process_iter(self, attrs: Any = None) -> Iterable[_FakePsutilProcess]:
+        self._sim.cost("psutil_scan")
+        d = self._sim.desktop
+        return iter([_FakePsutilProcess(p, d) for p in list(d.procs.values())])
+
+    def Process(self, pid: int) -> _FakePsutilProcess:
+        p = self._sim.desktop.procs.get(int(pid))
+        if p is None:
+            raise FakePsutil.NoSuchProcess(pid)
+        return _FakePsutilProcess(p, self._sim.desktop)
+
+    def pid_exists(self, pid: int) -> bool:
+        return int(pid) in self._sim.desktop.procs
+
+    def wait_procs(self, procs: Any, timeout: float | None = None) -> tuple[list[Any], list[Any]]:
+        alive = [p for p in procs if p.pid in self._sim.desktop.procs]
+        return [p for p in procs if p not in alive], alive
+
+    def boot_time(self) -> float:
+        return self._sim.clock.epoch - 3600.0
+
+    def sensors_battery(self) -> Any:
+        if self._battery is None:
+            return None
+        percent, plugged = self._battery
+        return types.SimpleNamespace(percent=percent, power_plugged=plugged, secsleft=3600 * 3)
+
+    def cpu_count(self, logical: bool = True) -> int:
+        return 8
+
+    def cpu_percent(self, interval: float | None = None) -> float:
+        return 18.0
+
+    def virtual_memory(self) -> Any:
+        total = 16 * 1024 ** 3
+        return types.SimpleNamespace(total=total, available=total * 0.45, percent=55.0)
+
+    def disk_usage(self, path: str) -> Any:
+        total = 512 * 1024 ** 3
+        return types.SimpleNamespace(total=total, free=total * 0.3, percent=70.0)
+
+
+def _fake_urllib(sim: FakeSubprocess) -> types.SimpleNamespace:
+    """urllib with DevTools (127.0.0.1:9222) refused, as when Chrome runs without debugging."""
+
+    def urlopen(url: Any, *a: Any, **kw: Any) -> Any:
+        sim.cost("cdp")
+        raise urllib.error.URLError("connection refused (simulated)")
+
+    request = types.SimpleNamespace(urlopen=urlopen, Request=urllib.request.Request)
+    return types.SimpleNamespace(request=request, error=urllib.error, parse=urllib.parse)
+
+
+# --- audio ----------------------------------------------------------------------
+
+@dataclass
+class Clip:
+    transcript: str
+    samples: Any  # int16 numpy array at 16 kHz
+
+
+class AudioSource:
+    """Queue of clips that FakeSoundDevice plays into speech.listen()."""
+
+    def __init__(self, np_mod: Any, rng: random.Random, rate: int = 16000):
+        self.np = np_mod
+        self.rng = rng
+        self.rate = rate
+        self.queue: list[Clip] = []
+        self.current: Clip | None = None
+
+    def synth(self, transcript: str) -> Clip:
+        """Tone-burst stand-in for speech: ~0.35 s per word at a speech-like level."""
+        np = self.np
+        seconds = max(0.6, 0.35 * len(transcript.split()))
+        t = np.arange(int(seconds * self.rate), dtype=np.float32) / self.rate
+        wave_ = 0.2 * np.sin(2 * np.pi * 180.0 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3.0 * t))
+        return Clip(transcript, (wave_ * 32767).astype(np.int16))
+
+    def from_wav(self, path: str, transcript: str) -> Clip:
+        np = self.np
+        with wave.open(path, "rb") as w:
+            rate, width, channels = w.getframerate(), w.getsampwidth(), w.getnchannels()
+            raw = w.readframes(w.getnframes())
+        if width != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        data = np.frombuffer(raw, dtype=np.int16)
+        if channels > 1:
+            data = data.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        if rate != self.rate:
+            n = int(len(data) * self.rate / rate)
+            data = np.interp(np.linspace(0, len(data) - 1, n), np.arange(len(data)), data).astype(np.int16)
+        return Clip(transcript, data)
+
+    def push(self, clip: Clip) -> None:
+        self.queue.append(clip)
+
+
+class FakeSoundDevice(types.ModuleType):
+    def __init__(self, source: AudioSource, clock: SimClock):
+        super().__init__("sounddevice")
+        self.source = source
+        self.clock = clock
+        self._pending = 0.0
+        self.capture_end = 0.0
+
+    def rec(self, frames: int, samplerate: int = 16000, channels: int = 1, dtype: str = "int16") -> Any:
+        np = self.source.np
+        out = np.zeros((frames, channels), dtype=np.int16)
+        noise = np.array([self.source.rng.randint(-40, 40) for _ in range(64)], dtype=np.int16)
+        out[:, 0] = np.resize(noise, frames)
+        clip = self.source.queue.pop(0) if self.source.queue else None
+        self.source.current = clip
+        if clip is not None:
+            start = int(0.3 * samplerate)
+            n = max(0, min(len(clip.samples), frames - start))
+            out[start:start + n, 0] = clip.samples[:n]
+        self._pending = frames / float(samplerate)
+        return out
+
+    def wait(self) -> None:
+        self.clock.advance(self._pending)
+        self._pending = 0.0
+        self.capture_end = self.clock.now
+
+
+class _FakeWhisperModel:
+    def __init__(self, source: AudioSource, sim: FakeSubprocess, name: str = "base"):
+        self.source = source
+        self.sim = sim
+        self.name = name
+
+    device = "cpu"
+
+    def detect_language(self, mel: Any) -> tuple[Any, dict[str, float]]:
+        self.sim.cost("whisper_detect")
+        return None, {"en": 0.97, "bn": 0.02, "hi": 0.01}
+
+    def transcribe(self, audio: Any, **kw: Any) -> dict[str, Any]:
+        if not kw.get("language"):
+            self.sim.cost("whisper_detect")  # Whisper's own language ID pass
+        # tiny runs ~2.5x faster than base; greedy decoding ~40% less than a 5-wide beam.
+        rtf = WHISPER_RTF * (0.4 if self.name.startswith("tiny") else 1.0) * (1.0 if kw.get("beam_size") else 0.6)
+        self.sim.cost("whisper_fixed", extra_sec=rtf * len(audio) / self.source.rate)
+        clip = self.source.current
+        return {"text": f" {clip.transcript}." if clip else "", "language": kw.get("language") or "en"}
+
+
+class FakeWhisper(types.ModuleType):
+    def __init__(self, source: AudioSource, sim: FakeSubprocess):
+        super().__init__("whisper")
+        self.source = source
+        self.sim = sim
+
+    def pad_or_trim(self, audio: Any, *a: Any, **kw: Any) -> Any:
+        return audio
+
+    def log_mel_spectrogram(self, audio: Any, *a: Any, **kw: Any) -> Any:
+        return types.SimpleNamespace(to=lambda device: audio)
+
+    def load_model(self, name: str, *a: Any, **kw: Any) -> _FakeWhisperModel:
+        self.sim.cost("whisper_load_tiny" if name.startswith("tiny") else "whisper_load")
+        return _FakeWhisperModel(self.source, self.sim, name)
+
+
+# --- scripted sessions ------------------------------------------------------------
+
+@dataclass
+class Turn:
+    say: str
+    wav: str | None = None
+    pause: float = 1.5
+
+
+DEFAULT_SCRIPTS: list[list[str]] = [
+    ["hi riva", "open chrome", "open youtube", "close youtube", "close chrome"],
+    ["hey riva open vscode", "what time is it", "battery", "close vscode"],
+    ["hi riva open whatsapp", "close whatsapp", "open folder", "close folder"],
+    ["hey riva open gmail", "open facebook", "close facebook", "close gmail", "close chrome"],
+    ["hi riva", "open crome", "yes", "who are you", "help"],
+    ["open chrome", "hey riva what's the time", "shutdown", "no"],
+    ["hey riva open chrome and youtube and check battery", "close youtube and chrome"],
+    # Overlapping captures: the same command heard twice.
+    ["hi riva", "open gmail", "open gmail", "close gmail", "close chrome"],
+]
+
+
+def load_scripts(path: str) -> list[list[Turn]]:
+    """JSON list of sessions; each turn is a string or {"say", "wav", "pause"}."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, dict):
+        raw = raw.get("sessions", [])
+    base = os.path.dirname(os.path.abspath(path))
+    sessions: list[list[Turn]] = []
+    for session in raw:
+        turns: list[Turn] = []
+        for t in session:
+            if isinstance(t, str):
+                turns.append(Turn(t))
+            else:
+                wav = t.get("wav")
+                turns.append(Turn(str(t["say"]), os.path.join(base, wav) if wav else None, float(t.get("pause", 1.5))))
+        sessions.append(turns)
+    return sessions
+
+
+@dataclass
+class TurnResult:
+    session: int
+    say: str
+    intent: str
+    capture_sec: float
+    stt_sec: float
+    reply_sec: float
+    total_sec: float
+
+
+class Simulation:
+    """Installs the fakes into brain/speech for the duration of a `with` block."""
+
+    def __init__(self, seed: int = 0, latency_ms: dict[str, tuple[float, float]] | None = None,
+                 audio: bool = True, hang: dict[str, float] | None = None, power_mode: str = "performance"):
+        self.seed = seed
+        self.power_mode = power_mode
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+        self.desktop = Desktop(clock=self.clock)
+        self.sim = FakeSubprocess(self.clock, self.desktop, self.rng, latency_ms)
+        self.sim.hang = dict(hang or {})
+        np_mod = speech._optional_import("numpy")
+        self.audio = audio and np_mod is not None
+        self.source = AudioSource(np_mod, self.rng) if self.audio else None
+        self._saved: list[tuple[Any, str, Any]] = []
+        self._tmp: tempfile.TemporaryDirectory | None = None
+        self.results: list[TurnResult] = []
+
+    def _patch(self, obj: Any, name: str, value: Any) -> None:
+        self._saved.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def __enter__(self) -> "Simulation":
+        random.seed(self.seed)
+        time_mod = _TimeModule(self.clock)
+        for mod in (brain, speech, procexec, launch_registry):
+            self._patch(mod, "time", time_mod)
+        self._patch(procexec, "subprocess", self.sim)
+        self._patch(brain, "datetime", _datetime_for(self.clock))
+        self._patch(brain, "os", _OsModule(self.sim))
+        self._patch(procexec, "os", _OsModule(self.sim))
+        self._patch(chrome_urls, "os", _OsModule(self.sim))
+        psutil_mod = FakePsutil(self.sim)
+        self._patch(brain, "psutil", psutil_mod)
+        self._patch(launch_registry, "psutil", psutil_mod)
+        self._patch(brain, "urllib", _fake_urllib(self.sim))
+        self._patch(speech, "sys", _SysModule())
+
+        duplex = speech.AudioDuplex()
+        duplex._cond = _SimCondition(self.clock)
+        self._patch(speech, "_DUPLEX", duplex)
+        self._patch(speech, "_VOICE_RESOLVED", True)
+        self._patch(speech, "_WINDOWS_VOICE_NAME", "Microsoft Zira Desktop")
+        # "auto" follows the simulated battery (76%, unplugged).
+        self.power = PowerManager(mode=self.power_mode, interval_sec=0.0, sensors=psutil_mod.sensors_battery,
+                                  clock=self.clock.time)
+        self._patch(speech, "_POWER", self.power)
+        # Untuned CPU setup, and no clips stored for the auto-tuner.
+        self._patch(speech, "_STT_SETUP", stt_tuning.Setup("base"))
+        self._patch(speech, "_stt_tuner", lambda: None)
+        self._patch(speech, "_stt_worker", lambda: None)
+        self.stt_models = ModelManager(
+            speech._load_whisper_model, model=self.power.current().model or "base", wake_model="tiny",
+            idle_sec=900.0, budget_mb=0.0, clock=self.clock.monotonic, footprint_cache=None,
+        )
+        self._patch(speech, "_WHISPER_MODELS", self.stt_models)
+        self.language_policy = LanguagePolicy(clock=self.clock.monotonic)
+        self._patch(speech, "_LANGUAGE_POLICY", self.language_policy)
+        if self.audio:
+            assert self.source is not None
+            modules = dict(speech._OPTIONAL_MODULES)
+            modules["sounddevice"] = FakeSoundDevice(self.source, self.clock)
+            modules["whisper"] = FakeWhisper(self.source, self.sim)
+            self._patch(speech, "_OPTIONAL_MODULES", modules)
+
+        # Keep simulated history out of the real memory.db.
+        self._tmp = tempfile.TemporaryDirectory(prefix="riva-sim-")
+        self._patch(brain, "_MEMORY_STORE", MemoryStore(os.path.join(self._tmp.name, "sim.db")))
+        # Host bookmarks and installed apps would make runs machine-dependent.
+        self._patch(brain, "_SITE_CATALOG", SiteCatalog(builtin=brain._SITE_TARGETS, cache_file=None))
+        self._patch(brain, "_APP_INDEX", AppIndex(roots=[]))
+        self._patch(brain, "_FOLDER_INDEX", FolderIndex(roots=[], cache_file=None))
+        self._patch(brain, "_LAUNCHES", LaunchRegistry(cache_file=None))
+        self._patch(brain, "_CHROME_URLS", UIAutomationProvider())
+        # Not started: each status command samples the fake psutil on the spot.
+        self._patch(brain, "_TELEMETRY", Telemetry(psutil_mod=psutil_mod, clock=self.clock.time))
+        self.debouncer = Debouncer(brain._IDEMPOTENT_ACTIONS, clock=self.clock.monotonic, resource=brain._DEBOUNCER.resource,
+                                  repeatable=brain._DEBOUNCER.repeatable)
+        self._patch(brain, "_DEBOUNCER", self.debouncer)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        store = brain._MEMORY_STORE
+        for obj, name, value in reversed(self._saved):
+            setattr(obj, name, value)
+        self._saved.clear()
+        try:
+            if store is not None:
+                store.close()
+        except Exception:
+            pass
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def run_session(self, index: int, turns: list[Turn]) -> list[TurnResult]:
+        """Play one scripted session through listen() + process()."""
+        self.desktop.reset()
+        session = brain.Session(f"sim-{index}")
+        results: list[TurnResult] = []
+        sd = speech._OPTIONAL_MODULES.get("sounddevice") if self.audio else None
+        with brain.session_scope(session):
+            for turn in turns:
+                self.clock.advance(turn.pause)
+                start = self.clock.now
+                tts_before = len(self.sim.tts_log)
+                if self.audio:
+                    assert self.source is not None
+                    clip = self.source.from_wav(turn.wav, turn.say) if turn.wav else self.source.synth(turn.say)
+                    self.source.push(clip)
+                    command = speech.listen(verbose=False)
+                    capture_end = sd.capture_end
+                else:
+                    command = turn.say
+                    capture_end = start
+                stt_done = self.clock.now
+                intent = ""
+                ended = False
+                try:
+                    if command:
+                        language, confidence = speech.heard_language() if self.audio else ("", 0.0)
+                        intent = brain.process(command, require_wake_word=True, language=language, confidence=confidence)
+                        speech.set_awake(intent != "asleep")
+                except SystemExit:
+                    intent, ended = "exit", True
+                done = self.clock.now
+                replies = self.sim.tts_log[tts_before:]
+                first_reply = replies[0][0] if replies else done
+                results.append(TurnResult(
+                    session=index,
+                    say=turn.say,
+                    intent=intent or "(silence)",
+                    capture_sec=capture_end - start,
+                    stt_sec=stt_done - capture_end,
+                    reply_sec=first_reply - capture_end,
+                    total_sec=done - capture_end,
+                ))
+                if ended:
+                    break
+        self.results.extend(results)
+        return results
+
+
+def report(results: list[TurnResult]) -> dict[str, Any]:
+    """Latency distributions (ms) overall and per intent."""
+    out: dict[str, Any] = {"turns": len(results), "metrics": {}, "intents": {}}
+    for metric in ("stt_sec", "reply_sec", "total_sec"):
+        out["metrics"][metric] = summarize([getattr(r, metric) * 1000.0 for r in results])
+    by_intent: dict[str, list[float]] = {}
+    for r in results:
+        by_intent.setdefault(r.intent, []).append(r.total_sec * 1000.0)
+    out["intents"] = {k: summarize(v) for k, v in sorted(by_intent.items())}
+    return out
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float = 0.10) -> list[str]:
+    """Regressions where p50 or p95 grew by more than `tolerance`."""
+    problems: list[str] = []
+    for section in ("metrics", "intents"):
+        for name, base in (baseline.get(section) or {}).items():
+            cur = (current.get(section) or {}).get(name)
+            if not cur:
+                continue
+            for q in ("p50", "p95"):
+                b, c = float(base.get(q, 0.0)), float(cur.get(q, 0.0))
+                if b > 0 and c > b * (1.0 + tolerance):
+                    problems.append(f"{section}.{name}.{q}: {b:.1f} -> {c:.1f} ms (+{(c / b - 1) * 100:.0f}%)")
+    return problems
+
+
+def run(sessions: int = 200, seed: int = 0, scripts: list[list[Turn]] | None = None,
+        audio: bool = True, quiet: bool = True, hang: dict[str, float] | None = None,
+        power_mode: str = "performance") -> tuple[dict[str, Any], Simulation]:
+    scripts = scripts or [[Turn(t) for t in s] for s in DEFAULT_SCRIPTS]
+    sim = Simulation(seed=seed, audio=audio, hang=hang, power_mode=power_mode)
+    sink = io.StringIO()
+    with sim, (contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext()):
+        for i in range(sessions):
+            sim.run_session(i, scripts[sim.rng.randrange(len(scripts))])
+            if quiet:
+                sink.seek(0)
+                sink.truncate()
+    return report(sim.results), sim
+
+
+def _main(argv: list[str]) -> int:
+    """python simulation.py [--sessions N] [--seed S] [--scripts F] [--text]
+    [--hang powershell=0.02,taskkill=0.01] [--power performance|power_saver|auto]
+    [--save F] [--baseline F] [--tolerance 0.10]"""
+    opts: dict[str, str] = {}
+    flags: set[str] = set()
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in ("--sessions", "--seed", "--scripts", "--hang", "--power", "--save", "--baseline", "--tolerance") \
+                and i + 1 < len(argv):
+            opts[a] = argv[i + 1]
+            i += 2
+        else:
+            flags.add(a)
+            i += 1
+
+    scripts = load_scripts(opts["--scripts"]) if "--scripts" in opts else None
+    hang = {}
+    for item in (opts.get("--hang") or "").split(","):
+        if "=" in item:
+            tool, prob = item.split("=", 1)
+            hang[tool.strip().lower()] = float(prob)
+    wall = _real_time.perf_counter()
+    summary, sim = run(
+        sessions=int(opts.get("--sessions", 200)),
+        seed=int(opts.get("--seed", 0)),
+        scripts=scripts,
+        audio="--text" not in flags,
+        quiet="--verbose" not in flags,
+        hang=hang,
+        power_mode=opts.get("--power", "performance"),
+    )
+    wall = _real_time.perf_counter() - wall
+
+    mode = "voice (simulated audio)" if sim.audio else "text"
+    print(f"[sim] {summary['turns']} turns, {mode}, seed {sim.seed}, simulated {sim.clock.now:.0f}s in {wall:.1f}s wall")
+    for metric, s in summary["metrics"].items():
+        print(format_summary(f"[sim] {metric[:-4]}", s))
+    for intent, s in summary["intents"].items():
+        print(format_summary(f"[sim]   {intent}", s))
+    calls = ", ".join(f"{k}={v}" for k, v in sorted(sim.sim.calls.items()))
+    print(f"[sim] modeled calls: {calls}")
+    stt = sim.stt_models.stats()
+    print(f"[sim] whisper models ({sim.power.current().name}): loads={stt['loads']}, unloads={stt['unloads']}")
+    lang = sim.language_policy.stats()
+    print(f"[sim] language: {lang['language']} ({lang['confidence']:.2f}), detections={lang['detections']}, "
+          f"expired={lang['expired']}, dropped={lang['dropped']}")
+    debounce = sim.debouncer.stats()
+    print(f"[sim] debounced: commands={debounce['suppressed_commands']}, merged actions={debounce['merged_actions']}, "
+          f"reused results={debounce['reused_results']}")
+
+    if "--save" in opts:
+        with open(opts["--save"], "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if "--baseline" in opts:
+        with open(opts["--baseline"], "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(summary, baseline, float(opts.get("--tolerance", 0.10)))
+        for p in problems:
+            print(f"[sim] REGRESSION {p}")
+        if problems:
+            return 1
+        print("[sim] no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,372 @@
+import bisect
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+import cache
+
+
+# Sites Riva can open by name: built-in targets, a user site file, and the
+# resolved Chrome profile's Bookmarks and most-visited History.
+#
+# The catalog is compiled into a prefix index (every token of every site name,
+# alias and domain, kept sorted so a prefix is a bisect range) and cached on
+# disk, keyed by the static sources' mtimes. Chrome rewrites History constantly
+# while it runs, so History is keyed by a _HISTORY_REFRESH_SEC time slot
+# instead: the most-visited list is re-read at most once per slot.
+
+_INDEX_VERSION = 1
+_CACHE_FILE = "sites.json"
+_HISTORY_LIMIT = 1000
+_RECHECK_SEC = 5.0
+_HISTORY_REFRESH_SEC = 3600.0
+_MIN_PREFIX = 2
+
+# Source priority, used to rank otherwise equal matches.
+RANK_BUILTIN = 3.0
+RANK_USER = 3.0
+RANK_BOOKMARK = 2.0
+RANK_HISTORY = 1.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_GENERIC_TLDS = {"com", "org", "net", "io", "co", "edu", "gov", "dev", "app", "www", "uk", "bd", "in"}
+_FILLER = {"the", "my", "a", "website", "site", "page", "bookmark", "tab", "in", "chrome", "please", "for", "me"}
+_QUERY_PREFIX_RE = re.compile(r"^(?:open|new tab|open tab|go to|launch)\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower().replace("'", ""))
+
+
+def domain_tokens(url: str) -> list[str]:
+    """"https://mail.google.com/x" -> ["mail", "google"]."""
+    host = (urlsplit(url).hostname or "").lower()
+    return [p for p in host.split(".") if p and p not in _GENERIC_TLDS]
+
+
+def query_phrase(command: str) -> str:
+    """The site part of "open my github bookmark" -> "github"."""
+    text = _QUERY_PREFIX_RE.sub("", (command or "").lower().strip())
+    return " ".join(t for t in tokenize(text) if t not in _FILLER)
+
+
+@dataclass(frozen=True)
+class Site:
+    name: str
+    url: str
+    rank: float
+    tokens: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class SiteMatch:
+    name: str
+    url: str
+    score: float
+
+
+class SiteIndex:
+    """Sorted-token prefix index over a list of sites."""
+
+    def __init__(self, sites: list[Site]):
+        self.sites = sites
+        postings: dict[str, list[int]] = {}
+        for sid, site in enumerate(sites):
+            for tok in set(site.tokens):
+                postings.setdefault(tok, []).append(sid)
+        self.tokens = sorted(postings)
+        self.postings = [postings[t] for t in self.tokens]
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _matches(self, qtok: str) -> dict[int, float]:
+        """site id -> quality of the best token matching `qtok` (exact 1.0, prefix less)."""
+        out: dict[int, float] = {}
+        if len(qtok) < _MIN_PREFIX:
+            lo = bisect.bisect_left(self.tokens, qtok)
+            hi = lo + 1 if lo < len(self.tokens) and self.tokens[lo] == qtok else lo
+        else:
+            lo, hi = self._prefix_range(qtok)
+        for i in range(lo, hi):
+            tok = self.tokens[i]
+            quality = 1.0 if tok == qtok else 0.4 + 0.5 * len(qtok) / len(tok)
+            for sid in self.postings[i]:
+                if quality > out.get(sid, 0.0):
+                    out[sid] = quality
+        return out
+
+    def search(self, phrase: str, limit: int = 3) -> list[SiteMatch]:
+        qtoks = tokenize(phrase)
+        if not qtoks or not self.tokens:
+            return []
+        # Narrowest query token first, so the candidate set starts small.
+        per_token = sorted((self._matches(t) for t in dict.fromkeys(qtoks)), key=len)
+        candidates = per_token[0]
+        if not candidates:
+            return []
+        scored: list[tuple[float, int]] = []
+        for sid, q0 in candidates.items():
+            total = q0
+            for m in per_token[1:]:
+                q = m.get(sid)
+                if q is None:
+                    break
+                total += q
+            else:
+                site = self.sites[sid]
+                coverage = len(per_token) / max(len(site.tokens), 1)
+                score = total / len(per_token) + 0.15 * min(1.0, coverage) + 0.05 * site.rank
+                scored.append((score, sid))
+        scored.sort(key=lambda x: (-x[0], len(self.sites[x[1]].name)))
+        return [SiteMatch(self.sites[sid].name, self.sites[sid].url, round(score, 4)) for score, sid in scored[:limit]]
+
+    def to_json(self) -> list[list[Any]]:
+        return [[s.name, s.url, s.rank, list(s.tokens)] for s in self.sites]
+
+    @classmethod
+    def from_json(cls, rows: list[list[Any]]) -> "SiteIndex":
+        return cls([Site(str(r[0]), str(r[1]), float(r[2]), tuple(r[3])) for r in rows])
+
+
+def make_site(name: str, url: str, rank: float, aliases: Iterable[str] = ()) -> Site | None:
+    name = re.sub(r"\s+", " ", (name or "").strip())[:80]
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return None
+    tokens = tokenize(name) + domain_tokens(url)
+    for alias in aliases:
+        tokens += tokenize(alias)
+    if not tokens:
+        return None
+    return Site(name or (urlsplit(url).hostname or url), url, rank, tuple(dict.fromkeys(tokens)))
+
+
+# --- sources ---------------------------------------------------------------------
+
+def read_bookmarks(path: str) -> list[Site]:
+    """Every URL in Chrome's Bookmarks JSON (bookmark bar, other, mobile)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    sites: list[Site] = []
+    stack = list(((data or {}).get("roots") or {}).values())
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if node.get("type") == "url":
+            site = make_site(node.get("name") or "", node.get("url") or "", RANK_BOOKMARK)
+            if site is not None:
+                sites.append(site)
+        stack.extend(node.get("children") or [])
+    return sites
+
+
+def read_history(path: str, limit: int = _HISTORY_LIMIT) -> list[Site]:
+    """Most-visited pages from Chrome's History DB (copied first; Chrome keeps it locked)."""
+    with tempfile.TemporaryDirectory(prefix="riva-history-") as tmp:
+        copy = os.path.join(tmp, "History")
+        shutil.copyfile(path, copy)
+        conn = sqlite3.connect(copy)
+        try:
+            rows = conn.execute(
+                "SELECT url, title, visit_count FROM urls WHERE hidden = 0 "
+                "ORDER BY visit_count DESC LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+        finally:
+            conn.close()
+    sites: list[Site] = []
+    for url, title, visits in rows:
+        rank = RANK_HISTORY + min(0.9, math.log10(1 + int(visits or 0)) / 4)
+        site = make_site(title or "", url or "", rank)
+        if site is not None:
+            sites.append(site)
+    return sites
+
+
+def read_user_sites(path: str) -> list[Site]:
+    """User site file: {"name": "url"} or [{"name", "url", "aliases": [...]}, ...]."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data.items() if isinstance(data, dict) else ((e.get("name"), e) for e in data if isinstance(e, dict))
+    sites: list[Site] = []
+    for name, entry in entries:
+        if isinstance(entry, str):
+            site = make_site(str(name), entry, RANK_USER)
+        else:
+            site = make_site(str(name or ""), str(entry.get("url") or ""), RANK_USER, entry.get("aliases") or ())
+        if site is not None:
+            sites.append(site)
+    return sites
+
+
+def _stat(path: str | None) -> list[Any]:
+    if not path:
+        return [None, None]
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [None, None]
+
+
+class SiteCatalog:
+    """Lazily built, disk-cached site index that refreshes when its sources change."""
+
+    def __init__(
+        self,
+        builtin: Iterable[tuple[str, str, Iterable[str]]] = (),
+        bookmarks_path: str | None = None,
+        history_path: str | None = None,
+        user_sites_path: str | None = None,
+        cache_file: str | None = _CACHE_FILE,
+    ):
+        self.builtin = [(n, u, tuple(a)) for n, u, a in builtin]
+        self.bookmarks_path = bookmarks_path
+        self.history_path = history_path
+        self.user_sites_path = user_sites_path
+        # None keeps the index in memory only.
+        self.cache_file = cache_file
+        self._index: SiteIndex | None = None
+        self._key: str | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def _history_slot(self) -> int | None:
+        if not self.history_path or not os.path.exists(self.history_path):
+            return None
+        return int(time.time() // _HISTORY_REFRESH_SEC)
+
+    def _source_key(self) -> str:
+        return cache.make_key(
+            "sites", _INDEX_VERSION, self.builtin,
+            self.bookmarks_path, _stat(self.bookmarks_path),
+            self.history_path, self._history_slot(),
+            self.user_sites_path, _stat(self.user_sites_path),
+        )
+
+    def build(self) -> SiteIndex:
+        sites = [s for s in (make_site(n, u, RANK_BUILTIN, a) for n, u, a in self.builtin) if s is not None]
+        for reader, path in (
+            (read_user_sites, self.user_sites_path),
+            (read_bookmarks, self.bookmarks_path),
+            (read_history, self.history_path),
+        ):
+            if path and os.path.exists(path):
+                try:
+                    sites.extend(reader(path))
+                except Exception as e:
+                    print(f"[sites] skipped {os.path.basename(path)}: {e}")
+        # One entry per URL, keeping the highest-ranked name.
+        by_url: dict[str, Site] = {}
+        for s in sites:
+            key = s.url.rstrip("/").lower()
+            if key not in by_url or s.rank > by_url[key].rank:
+                by_url[key] = s
+        return SiteIndex(list(by_url.values()))
+
+    def _load_or_build(self, key: str) -> SiteIndex:
+        if self.cache_file is None:
+            return self.build()
+        rows = cache.load_json(self.cache_file, key=key)
+        if isinstance(rows, list):
+            try:
+                return SiteIndex.from_json(rows)
+            except Exception:
+                pass
+        index = self.build()
+        cache.save_json(self.cache_file, index.to_json(), key=key)
+        return index
+
+    def _rebuild_in_background(self, key: str) -> None:
+        def _run():
+            try:
+                index = self._load_or_build(key)
+                with self._lock:
+                    self._index, self._key = index, key
+            finally:
+                self._rebuilding = False
+
+        self._rebuilding = True
+        threading.Thread(target=_run, name="riva-site-catalog", daemon=True).start()
+
+    def index(self) -> SiteIndex:
+        """Current index; stale sources are re-read in the background."""
+        now = time.monotonic()
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._key = self._source_key()
+                    self._index = self._load_or_build(self._key)
+                    self._checked = now
+            return self._index
+        if now - self._checked >= _RECHECK_SEC and not self._rebuilding:
+            self._checked = now
+            key = self._source_key()
+            if key != self._key:
+                self._rebuild_in_background(key)
+        return self._index
+
+    def lookup(self, command: str) -> SiteMatch | None:
+        phrase = query_phrase(command)
+        if not phrase:
+            return None
+        matches = self.index().search(phrase, limit=1)
+        return matches[0] if matches else None
+
+
+def _bench(n_sites: int = 30000, queries: int = 5000) -> None:
+    """python site_catalog.py --bench [N]: index N synthetic bookmarks and time lookups."""
+    import random
+
+    from latency_stats import format_summary, summarize
+
+    rng = random.Random(3)
+    words = ["".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+             for _ in range(4000)]
+    sites = []
+    for i in range(n_sites):
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(2, 6)))
+        s = make_site(name, f"https://{rng.choice(words)}{i}.com/{rng.choice(words)}", RANK_BOOKMARK)
+        if s is not None:
+            sites.append(s)
+    t0 = time.perf_counter()
+    index = SiteIndex(sites)
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    samples: list[float] = []
+    hits = 0
+    for _ in range(queries):
+        target = rng.choice(sites)
+        toks = list(target.tokens[:2])
+        q = " ".join(t[: max(3, len(t) - rng.randint(0, 2))] for t in toks)
+        t = time.perf_counter()
+        res = index.search(q, limit=1)
+        samples.append((time.perf_counter() - t) * 1_000_000.0)
+        hits += bool(res)
+    print(f"[sites] {len(sites)} sites, {len(index.tokens)} tokens indexed in {build_ms:.0f} ms; {hits / queries:.1%} queries matched")
+    print(format_summary("[sites] lookup", summarize(samples), unit="us"))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 30000)
+    else:
+        import brain
+
+        match = brain._site_catalog().lookup("open " + " ".join(sys.argv[1:]))
+        print(json.dumps(match.__dict__ if match else None))
@@ -1,60 +1,145 @@
-try:
-    import pyttsx3  # type: ignore
-except Exception:  # pragma: no cover
-    pyttsx3 = None
-
-try:
-    import sounddevice as sd  # type: ignore
-except Exception:  # pragma: no cover
-    sd = None
-
-try:
-    import numpy as np  # type: ignore
-except Exception:  # pragma: no cover
-    np = None
-
-try:
-    import whisper  # type: ignore
-except Exception:  # pragma: no cover
-    whisper = None
 import sys
-import subprocess
 import os
+import importlib
 import unicodedata
 import re
 import threading
 import time
-from typing import Optional
+from typing import Any, Optional
+
+import cache
+import procexec
+import power
+import tracing
+import stt_language
+import stt_tuning
+from stt_models import ModelManager
+from stt_worker import SttWorker
+from tracing import traced
+
+
+# Heavy optional dependencies (pyttsx3, sounddevice, numpy, whisper) are imported
+# on first use instead of at import time, so `main.py` can start talking quickly.
+_OPTIONAL_MODULES: dict[str, Any] = {}
+
+
+def _optional_import(name: str) -> Any:
+    """Import an optional dependency once; returns None if it isn't available."""
+    if name in _OPTIONAL_MODULES:
+        return _OPTIONAL_MODULES[name]
+    try:
+        mod = importlib.import_module(name)
+    except Exception:
+        mod = None
+    _OPTIONAL_MODULES[name] = mod
+    return mod
 
 
 _ALLOWED_PUNCTUATION = set(".,?!:;।-—()[]{}'\"/\\")
 
 
-_SPEAKING = threading.Event()
 _AUDIO_IO_LOCK = threading.Lock()
-_LAST_SPEAK_END_MONO = 0.0
+
+# SAPI deadline: PowerShell start-up plus a generous per-word speaking time.
+_TTS_BASE_TIMEOUT_SEC = 8.0
+_TTS_SEC_PER_WORD = 1.0
 
 # Small delay to avoid the mic capturing the tail end of the speaker output.
 _POST_SPEAK_COOLDOWN_SEC = 0.45
 
 
+class AudioDuplex:
+    """Half-duplex coordinator between TTS output and mic capture.
+
+    Owns the "speaking" state and the post-speak cooldown. Listeners block on a
+    condition variable and are woken exactly when speaking ends, then sleep only
+    until the cooldown deadline instead of polling.
+    """
+
+    def __init__(self, cooldown_sec: float = _POST_SPEAK_COOLDOWN_SEC):
+        self.cooldown_sec = float(cooldown_sec)
+        self._cond = threading.Condition()
+        self._speaking = 0
+        self._last_speak_end = 0.0
+        # Counters: how long capture had to wait on TTS.
+        self._waits = 0
+        self._blocked_waits = 0
+        self._wait_total_sec = 0.0
+        self._wait_max_sec = 0.0
+
+    def is_speaking(self) -> bool:
+        return self._speaking > 0
+
+    def begin_speaking(self) -> None:
+        with self._cond:
+            self._speaking += 1
+
+    def end_speaking(self) -> None:
+        with self._cond:
+            self._speaking = max(0, self._speaking - 1)
+            self._last_speak_end = time.monotonic()
+            self._cond.notify_all()
+
+    def wait_until_safe(self, timeout: Optional[float] = None) -> bool:
+        """Block until not speaking and the cooldown has passed.
+
+        Returns False if `timeout` expired first.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ok = True
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._speaking:
+                    wait_for = None
+                else:
+                    wait_for = self._last_speak_end + self.cooldown_sec - now
+                    if wait_for <= 0:
+                        break
+                if deadline is not None:
+                    left = deadline - now
+                    if left <= 0:
+                        ok = False
+                        break
+                    wait_for = left if wait_for is None else min(wait_for, left)
+                self._cond.wait(wait_for)
+
+            waited = time.monotonic() - start
+            self._waits += 1
+            if waited > 0.001:
+                self._blocked_waits += 1
+            self._wait_total_sec += waited
+            self._wait_max_sec = max(self._wait_max_sec, waited)
+        return ok
+
+    def stats(self) -> dict[str, float]:
+        with self._cond:
+            return {
+                "waits": self._waits,
+                "blocked_waits": self._blocked_waits,
+                "wait_total_sec": self._wait_total_sec,
+                "wait_max_sec": self._wait_max_sec,
+                "wait_avg_sec": (self._wait_total_sec / self._waits) if self._waits else 0.0,
+            }
+
+
+_DUPLEX = AudioDuplex()
+
+
 def is_speaking() -> bool:
     """True while the assistant is actively speaking via TTS."""
-    return _SPEAKING.is_set()
+    return _DUPLEX.is_speaking()
+
+
+def duplex_stats() -> dict[str, float]:
+    """Counters for how long mic capture waited on TTS."""
+    return _DUPLEX.stats()
 
 
 def _wait_for_safe_listen_window():
     """Block until it's safe to record audio (not speaking + cooldown passed)."""
-    # Wait while speaking
-    while is_speaking():
-        time.sleep(0.05)
-
-    # And wait a tiny bit after speaking ends to reduce echo pickup.
-    while True:
-        since = time.monotonic() - _LAST_SPEAK_END_MONO
-        if since >= _POST_SPEAK_COOLDOWN_SEC:
-            return
-        time.sleep(0.05)
+    _DUPLEX.wait_until_safe()
 
 
 def _sanitize_for_speech(text: str) -> str:
@@ -106,6 +191,7 @@ def _sanitize_for_speech(text: str) -> str:
 
 def _init_tts_engine():
     """Initialize TTS engine with sensible defaults (Windows-friendly)."""
+    pyttsx3 = _optional_import("pyttsx3")
     if pyttsx3 is None:
         return None
     try:
@@ -115,16 +201,109 @@ def _init_tts_engine():
         return pyttsx3.init()
     except Exception:
         # Fallback to default init if a driver isn't available.
-        return pyttsx3.init()
+        try:
+            return pyttsx3.init()
+        except Exception:
+            return None
+
+
+_ENGINE_LOCK = threading.Lock()
+_ENGINE_READY = False
+engine = None
+
+
+def _get_tts_engine():
+    """Return the pyttsx3 engine, creating and configuring it on first use."""
+    global engine, _ENGINE_READY
+    with _ENGINE_LOCK:
+        if _ENGINE_READY:
+            return engine
+        engine = _init_tts_engine()
+        _ENGINE_READY = True
+        if engine is None:
+            return None
+
+        try:
+            engine.setProperty("rate", 170)
+            engine.setProperty("volume", 1.0)
+        except Exception:
+            pass
+
+        # Pick a default voice if available (prevents "silent" engine on some setups)
+        try:
+            voices = engine.getProperty("voices")
+            if voices:
+                # Try to align pyttsx3 voice with our Windows preference.
+                chosen = None
+                preferred_name = _get_windows_voice_name()
+                if preferred_name:
+                    pref = preferred_name.lower()
+                    for v in voices:
+                        name = (getattr(v, "name", "") or "").lower()
+                        vid = (getattr(v, "id", "") or "").lower()
+                        if pref in name or pref in vid:
+                            chosen = v
+                            break
+
+                # Otherwise, try to pick a "female" voice if the engine exposes it.
+                if chosen is None:
+                    for v in voices:
+                        meta = (getattr(v, "name", "") or "") + " " + (getattr(v, "id", "") or "")
+                        if "zira" in meta.lower() or "female" in meta.lower():
+                            chosen = v
+                            break
+
+                engine.setProperty("voice", (chosen or voices[0]).id)
+        except Exception:
+            pass
+        return engine
+
+
+@traced("speech.list_voices")
+def _list_windows_voices() -> list[str]:
+    """List installed System.Speech voices (slow: spawns PowerShell)."""
+    out = procexec.check_output(
+        [
+            "powershell",
+            "-NoProfile",
+            "-Command",
+            "Add-Type -AssemblyName System.Speech; "
+            "$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; "
+            "$s.GetInstalledVoices() | ForEach-Object { $_.VoiceInfo.Name }",
+        ],
+        use_budget=False,
+    )
+    return [v.strip() for v in out.splitlines() if v.strip()]
+
 
+def _installed_voice_tokens() -> list[str]:
+    """Cheap fingerprint of installed voices, read from the registry.
 
-engine = _init_tts_engine()
-if engine is not None:
+    Used as the invalidation key for the on-disk voice cache, so installing or
+    removing a voice pack triggers a fresh (slow) PowerShell discovery.
+    """
     try:
-        engine.setProperty("rate", 170)
-        engine.setProperty("volume", 1.0)
+        import winreg  # type: ignore
     except Exception:
-        pass
+        return []
+
+    tokens: list[str] = []
+    for path in (
+        r"SOFTWARE\Microsoft\Speech\Voices\Tokens",
+        r"SOFTWARE\Microsoft\Speech_OneCore\Voices\Tokens",
+    ):
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path) as key:
+                i = 0
+                while True:
+                    try:
+                        tokens.append(winreg.EnumKey(key, i))
+                    except OSError:
+                        break
+                    i += 1
+        except Exception:
+            continue
+    return sorted(tokens)
 
 
 def _pick_preferred_windows_voice_name() -> Optional[str]:
@@ -151,19 +330,7 @@ def _pick_preferred_windows_voice_name() -> Optional[str]:
     ]
 
     try:
-        out = subprocess.check_output(
-            [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                "Add-Type -AssemblyName System.Speech; "
-                "$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; "
-                "$s.GetInstalledVoices() | ForEach-Object { $_.VoiceInfo.Name }",
-            ],
-            stderr=subprocess.DEVNULL,
-            text=True,
-        )
-        voices = [v.strip() for v in out.splitlines() if v.strip()]
+        voices = _list_windows_voices()
         if not voices:
             return None
 
@@ -184,48 +351,265 @@ def _pick_preferred_windows_voice_name() -> Optional[str]:
         return None
 
 
-_WINDOWS_VOICE_NAME: Optional[str] = _pick_preferred_windows_voice_name()
-
-# Pick a default voice if available (prevents "silent" engine on some setups)
-try:
-    if engine is not None:
-        voices = engine.getProperty("voices")
-        if voices:
-            # Try to align pyttsx3 voice with our Windows preference.
-            chosen = None
-            if _WINDOWS_VOICE_NAME:
-                pref = _WINDOWS_VOICE_NAME.lower()
-                for v in voices:
-                    name = (getattr(v, "name", "") or "").lower()
-                    vid = (getattr(v, "id", "") or "").lower()
-                    if pref in name or pref in vid:
-                        chosen = v
-                        break
+_VOICE_CACHE_FILE = "voice.json"
+_VOICE_LOCK = threading.Lock()
+_VOICE_RESOLVED = False
+_WINDOWS_VOICE_NAME: Optional[str] = None
 
-            # Otherwise, try to pick a "female" voice if the engine exposes it.
-            if chosen is None:
-                for v in voices:
-                    meta = (getattr(v, "name", "") or "") + " " + (getattr(v, "id", "") or "")
-                    if "zira" in meta.lower() or "female" in meta.lower():
-                        chosen = v
-                        break
 
-            engine.setProperty("voice", (chosen or voices[0]).id)
-except Exception:
-    pass
+def _get_windows_voice_name() -> Optional[str]:
+    """Return the preferred Windows voice, using the on-disk cache when valid."""
+    global _VOICE_RESOLVED, _WINDOWS_VOICE_NAME
+    with _VOICE_LOCK:
+        if _VOICE_RESOLVED:
+            return _WINDOWS_VOICE_NAME
+
+        if not sys.platform.startswith("win"):
+            name = None
+        elif (os.environ.get("RIVA_VOICE") or "").strip():
+            name = _pick_preferred_windows_voice_name()
+        else:
+            key = cache.make_key("voice", 1, sys.platform, _installed_voice_tokens())
+            cached = cache.load_json(_VOICE_CACHE_FILE, key=key)
+            if isinstance(cached, dict) and "name" in cached:
+                name = cached.get("name") or None
+            else:
+                name = _pick_preferred_windows_voice_name()
+                cache.save_json(_VOICE_CACHE_FILE, {"name": name}, key=key)
+
+        _WINDOWS_VOICE_NAME = name
+        _VOICE_RESOLVED = True
+        return name
+
+
+def warm_up(stt: bool = False) -> threading.Thread:
+    """Resolve the TTS voice (and optionally import Whisper) in the background.
+
+    The pyttsx3 engine itself is still created lazily on the thread that first
+    speaks, because SAPI/COM objects don't like being shared across threads.
+    """
+    def _run():
+        _get_windows_voice_name()
+        if stt:
+            for name in ("numpy", "sounddevice", "whisper"):
+                _optional_import(name)
+            tuner = _stt_tuner()
+            if tuner is not None and _optional_import("whisper") is not None:
+                tuner.start()
+            _power().start()
+            worker = _stt_worker()
+            if worker is not None:
+                worker.start()  # the worker loads its model while Riva greets
+
+    t = threading.Thread(target=_run, name="riva-warm-up", daemon=True)
+    t.start()
+    return t
+
+
+def _load_base_whisper_model(name: str):
+    """Load a Whisper model as shipped (float32, current thread count)."""
+    whisper = _optional_import("whisper")
+    if whisper is None:
+        raise RuntimeError("Whisper is not available. Please install the 'openai-whisper' package.")
+    with tracing.span("listen.model_load", model=name):
+        return whisper.load_model(name)
+
+
+def _load_whisper_model(name: str):
+    """Load a Whisper model with the tuned CPU setup (threads, int8); see stt_tuning.py."""
+    setup = _stt_setup()
+    stt_tuning.apply_threads(setup.threads)
+    model = _load_base_whisper_model(name)
+    if setup.int8 and name == setup.model:
+        with tracing.span("listen.model_quantize", model=name):
+            model = stt_tuning.quantize_int8(model)
+    return model
+
+
+_STT_SETUP: Optional[stt_tuning.Setup] = None
+_STT_SETUP_LOCK = threading.Lock()
+
+
+def _stt_setup() -> stt_tuning.Setup:
+    global _STT_SETUP
+    if _STT_SETUP is None:
+        with _STT_SETUP_LOCK:
+            if _STT_SETUP is None:
+                _STT_SETUP = stt_tuning.current_setup()
+    return _STT_SETUP
+
+
+def _on_tuned() -> None:
+    global _STT_SETUP
+    with _STT_SETUP_LOCK:
+        _STT_SETUP = stt_tuning.current_setup()
+    # Drop the command model loaded with the old setup; the next use loads the
+    # tuned model (which may be smaller) with the tuned threads and int8.
+    _whisper_models().set_model(_profile_model(_power().current()), reload=True)
+
+
+_AUTO_TUNER: Optional[stt_tuning.AutoTuner] = None
+_AUTO_TUNER_LOCK = threading.Lock()
+
+
+def _stt_tuner() -> Optional[stt_tuning.AutoTuner]:
+    """The background CPU auto-tuner, or None when RIVA_STT_AUTOTUNE=0."""
+    global _AUTO_TUNER
+    if not stt_tuning.autotune_enabled():
+        return None
+    if _AUTO_TUNER is None:
+        with _AUTO_TUNER_LOCK:
+            if _AUTO_TUNER is None:
+                # Benchmarks only while asleep: the command model is released then.
+                _AUTO_TUNER = stt_tuning.AutoTuner(_load_base_whisper_model, _transcribe_kwargs, on_done=_on_tuned,
+                                                   idle=lambda: not _whisper_models().awake)
+    return _AUTO_TUNER
+
+
+# Loaded Whisper models (loading is very slow, so they are shared), released when
+# idle or asleep; see stt_models.py.
+_WHISPER_MODELS: Optional[ModelManager] = None
+_WHISPER_MODELS_LOCK = threading.Lock()
+
+_WAKE_PHRASE_RE = re.compile(r"^\s*(hi|hey)\s+riva\b[\s,!.:-]*", re.IGNORECASE)
 
-# Cache Whisper model (loading it every time is very slow)
-_WHISPER_MODEL = None
+
+def _whisper_models() -> ModelManager:
+    global _WHISPER_MODELS
+    if _WHISPER_MODELS is None:
+        with _WHISPER_MODELS_LOCK:
+            if _WHISPER_MODELS is None:
+                _WHISPER_MODELS = ModelManager(_load_whisper_model, model=_profile_model(_power().current()))
+    return _WHISPER_MODELS
 
 
 def _get_whisper_model():
-    global _WHISPER_MODEL
-    if _WHISPER_MODEL is None:
-        if whisper is None:
-            raise RuntimeError("Whisper is not available. Please install the 'openai-whisper' package.")
-        _WHISPER_MODEL = whisper.load_model("base")
-    return _WHISPER_MODEL
+    return _whisper_models().get()
+
+
+_STT_WORKER: Optional[SttWorker] = None
+_STT_WORKER_LOCK = threading.Lock()
+_STT_WORKER_FAILED = False
+
+
+def _stt_worker() -> Optional[SttWorker]:
+    """The out-of-process transcriber when RIVA_STT_WORKER=1 (None otherwise); see stt_worker.py."""
+    global _STT_WORKER, _STT_WORKER_FAILED
+    if _STT_WORKER is None and not _STT_WORKER_FAILED:
+        if (os.environ.get("RIVA_STT_WORKER") or "").strip().lower() not in ("1", "true", "yes", "on"):
+            return None
+        with _STT_WORKER_LOCK:
+            if _STT_WORKER is None and not _STT_WORKER_FAILED:
+                try:
+                    _STT_WORKER = SttWorker(_load_whisper_model)
+                except Exception as e:
+                    _STT_WORKER_FAILED = True
+                    print(f"[stt] worker unavailable, transcribing in-process: {e}")
+    return _STT_WORKER
+
+
+_POWER: Optional[power.PowerManager] = None
+_POWER_LOCK = threading.Lock()
+
+
+def _power() -> power.PowerManager:
+    """Battery-driven speech profile (see power.py); sampled in the background once started."""
+    global _POWER
+    if _POWER is None:
+        with _POWER_LOCK:
+            if _POWER is None:
+                _POWER = power.PowerManager(on_change=_on_power_profile)
+    return _POWER
+
+
+def _profile_model(profile: power.Profile) -> str:
+    return profile.model or _stt_setup().model
 
+
+def _on_power_profile(profile: power.Profile) -> None:
+    # The STT worker switches models itself (the profile travels with each utterance).
+    _whisper_models().set_model(_profile_model(profile))
+
+
+def power_stats() -> dict[str, Any]:
+    """The current power profile, battery reading, and the switches made so far."""
+    return _power().stats()
+
+
+_LANGUAGE_POLICY: Optional[stt_language.LanguagePolicy] = None
+_LANGUAGE_POLICY_LOCK = threading.Lock()
+# (language, confidence) of the last utterance listen() returned.
+_LAST_LANGUAGE: tuple[str, float] = ("", 0.0)
+
+
+def _language_policy() -> stt_language.LanguagePolicy:
+    global _LANGUAGE_POLICY
+    if _LANGUAGE_POLICY is None:
+        with _LANGUAGE_POLICY_LOCK:
+            if _LANGUAGE_POLICY is None:
+                _LANGUAGE_POLICY = stt_language.LanguagePolicy()
+    return _LANGUAGE_POLICY
+
+
+def heard_language() -> tuple[str, float]:
+    """Language code (e.g. "en", "bn"; "" if unknown) and confidence of the last utterance heard."""
+    return _LAST_LANGUAGE
+
+
+def set_awake(awake: bool) -> None:
+    """Tell the STT layer whether Riva is awake (asleep: only the wake model stays loaded)."""
+    _whisper_models().set_awake(awake)
+    if not awake:
+        _language_policy().reset()  # the next session detects its language again
+    tuner = _stt_tuner()
+    if tuner is not None:
+        if awake:
+            tuner.pause()
+        else:
+            tuner.start()
+    worker = _stt_worker()
+    if worker is not None:
+        worker.awake = awake
+
+
+def stt_stats() -> dict[str, Any]:
+    """Loaded models, load/unload counts, current/peak RSS, and the CPU setup."""
+    stats = _whisper_models().stats()
+    stats["setup"] = _stt_setup().to_row()
+    stats["language"] = _language_policy().stats()
+    stats["power"] = _power().current().name
+    worker = _stt_worker()
+    if worker is not None:
+        stats["worker"] = worker.stats()
+    return stats
+
+
+def _transcribe_kwargs() -> dict[str, Any]:
+    """Decoding options for listen() (and the tuner, so it measures the same work)."""
+    # Let Whisper auto-detect language (helps Bangla/English mixed commands).
+    # You can force a language via env var if you want (e.g., RIVA_STT_LANG=en or bn).
+    forced_lang = (os.environ.get("RIVA_STT_LANG") or "").strip() or None
+    initial_prompt = (
+        "You are a voice assistant named Riva. "
+        "Wake phrases: hi riva, hey riva. "
+        "Common commands: open chrome, open youtube, open facebook, open folder, battery, shutdown, time, exit, open whatsapp, open repo."
+    )
+
+    beam = _power().current().beam_size
+    kwargs: dict[str, Any] = dict(
+        fp16=False,
+        temperature=0.0,
+        # No beam: greedy decoding (power saver).
+        best_of=beam,
+        beam_size=beam,
+        condition_on_previous_text=False,
+        initial_prompt=initial_prompt,
+    )
+    if forced_lang:
+        kwargs["language"] = forced_lang
+    return kwargs
+
+@traced("speak")
 def speak(text):
     cleaned = _sanitize_for_speech(str(text))
     print("AI:", cleaned)
@@ -235,7 +619,7 @@ def speak(text):
 
     # Ensure we never talk while the mic is actively recording.
     with _AUDIO_IO_LOCK:
-        _SPEAKING.set()
+        _DUPLEX.begin_speaking()
 
         # On Windows, System.Speech (SAPI) is often more reliable than pyttsx3 output.
         # We try it first; if it fails, we fall back to pyttsx3.
@@ -243,42 +627,50 @@ def speak(text):
             if sys.platform.startswith("win"):
                 try:
                     ps_text = cleaned.replace("'", "''")
-                    ps_voice = (_WINDOWS_VOICE_NAME or "").replace("'", "''")
+                    ps_voice = (_get_windows_voice_name() or "").replace("'", "''")
                     # If a preferred voice is known, select it (ignore failures).
                     select_voice = ""
                     if ps_voice:
                         select_voice = f"try {{ $s.SelectVoice('{ps_voice}'); }} catch {{ }}; "
-                    subprocess.run(
-                        [
-                            "powershell",
-                            "-NoProfile",
-                            "-Command",
-                            "Add-Type -AssemblyName System.Speech; "
-                            "$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; "
-                            "$s.Volume=100; $s.Rate=0; "
-                            + select_voice +
-                            f"$s.Speak('{ps_text}');",
-                        ],
-                        check=False,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                    )
+                    with tracing.span("speak.sapi", chars=len(cleaned)):
+                        # Speaking takes as long as the text, so the deadline scales with it
+                        # rather than coming out of the command budget.
+                        procexec.run(
+                            [
+                                "powershell",
+                                "-NoProfile",
+                                "-Command",
+                                "Add-Type -AssemblyName System.Speech; "
+                                "$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; "
+                                "$s.Volume=100; $s.Rate=0; "
+                                + select_voice +
+                                f"$s.Speak('{ps_text}');",
+                            ],
+                            timeout=_TTS_BASE_TIMEOUT_SEC + len(cleaned.split()) * _TTS_SEC_PER_WORD,
+                            capture=False,
+                            use_budget=False,
+                        )
                     return
                 except Exception as e:
                     print(f"[tts windows fallback error] {e}")
 
-            if engine is not None:
+            tts = _get_tts_engine()
+            if tts is not None:
                 try:
-                    engine.say(cleaned)
-                    engine.runAndWait()
+                    with tracing.span("speak.pyttsx3", chars=len(cleaned)):
+                        tts.say(cleaned)
+                        tts.runAndWait()
                 except Exception as e:
                     print(f"[tts error] {e}")
         finally:
-            global _LAST_SPEAK_END_MONO
-            _LAST_SPEAK_END_MONO = time.monotonic()
-            _SPEAKING.clear()
+            _DUPLEX.end_speaking()
 
+@traced("listen")
 def listen(verbose: bool = True):
+    global _LAST_LANGUAGE
+    sd = _optional_import("sounddevice")
+    np = _optional_import("numpy")
+    whisper = _optional_import("whisper")
     if sd is None or np is None or whisper is None:
         # Keep the process alive even if audio deps aren't installed.
         if verbose:
@@ -290,65 +682,141 @@ def listen(verbose: bool = True):
             print(f"[listen unavailable] Missing dependencies: {', '.join(missing)}")
         return ""
 
-    _wait_for_safe_listen_window()
+    models = _whisper_models()
+    worker = _stt_worker()
+    if worker is None and models.release_idle():
+        print("[stt] released the idle Whisper model")
+
+    with tracing.span("listen.wait_safe"):
+        _wait_for_safe_listen_window()
     if verbose:
         print("Listening...")
     fs = 16000  # Sample rate
-    duration = 7  # seconds (a bit longer helps reduce cut-off words)
+    profile = _power().current()
+    # Seconds per capture (a bit longer helps reduce cut-off words); the power
+    # saver listens longer per cycle so it captures and transcribes less often.
+    duration = profile.capture_sec
     if verbose:
         print("Say something...")
 
-    # Ensure we never record while TTS is speaking.
-    with _AUDIO_IO_LOCK:
-        _wait_for_safe_listen_window()
-        audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-        sd.wait()
+    # With the STT worker, record straight into a shared-memory slot it can read.
+    slot = worker.ring.reserve(int(duration * fs)) if worker is not None else None
+    try:
+        # Ensure we never record while TTS is speaking.
+        with _AUDIO_IO_LOCK:
+            _wait_for_safe_listen_window()
+            with tracing.span("listen.capture", seconds=duration):
+                if slot is not None:
+                    audio = sd.rec(samplerate=fs, out=slot[1].reshape(-1, 1))
+                else:
+                    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
+                sd.wait()
+
+        audio = np.squeeze(audio)
+
+        # Trim leading/trailing silence to reduce misreads.
+        with tracing.span("listen.trim"):
+            start, end = _speech_bounds(np, audio, fs)
+
+        if end - start < int(0.25 * fs):
+            return ""
+
+        kwargs = _transcribe_kwargs()
+        heard = None
+        if slot is not None:
+            with tracing.span("listen.worker", samples=end - start):
+                heard = worker.transcribe(worker.ring.slice(slot[0], start, end - start), kwargs, profile.name)
+        if heard is None:
+            # Convert to float32 for whisper
+            heard = _transcribe(models, audio[start:end].astype(np.float32) / 32768.0, kwargs, fs,
+                                wake_only=profile.wake_only_asleep)
+    finally:
+        if slot is not None:
+            worker.ring.release(slot[0])
+    command, language, confidence = heard
+    _LAST_LANGUAGE = (language, confidence)
+    if command:
+        if verbose:
+            print("You:", command)
+        return command.lower()
+    return ""
 
-    audio = np.squeeze(audio)
-    # Convert to float32 for whisper
-    audio = audio.astype(np.float32) / 32768.0
 
-    # Trim leading/trailing silence to reduce misreads.
+def _speech_bounds(np: Any, audio: Any, fs: int) -> tuple[int, int]:
+    """[start, end) of the speech in int16 `audio`, with a little margin (all of it if unsure)."""
     try:
-        energy = np.abs(audio)
+        energy = np.abs(audio.astype(np.float32)) / 32768.0
         thr = max(0.012, float(np.percentile(energy, 85)) * 0.35)
         idx = np.where(energy > thr)[0]
         if idx.size > 0:
             start = max(0, int(idx[0] - 0.10 * fs))
             end = min(audio.shape[0], int(idx[-1] + 0.15 * fs))
-            audio = audio[start:end]
+            return start, end
     except Exception:
         pass
+    return 0, int(audio.shape[0])
 
-    if audio.size < int(0.25 * fs):
-        return ""
 
-    model = _get_whisper_model()
-
-    # Let Whisper auto-detect language (helps Bangla/English mixed commands).
-    # You can force a language via env var if you want (e.g., RIVA_STT_LANG=en or bn).
-    forced_lang = (os.environ.get("RIVA_STT_LANG") or "").strip() or None
-    initial_prompt = (
-        "You are a voice assistant named Riva. "
-        "Wake phrases: hi riva, hey riva. "
-        "Common commands: open chrome, open youtube, open facebook, open folder, battery, shutdown, time, exit, open whatsapp, open repo."
-    )
+def _transcribe(models: ModelManager, audio: Any, kwargs: dict[str, Any], fs: int = 16000,
+                wake_only: bool = False) -> tuple[str, str, float]:
+    """Transcribe float32 audio with the model `models` picks; shared with the STT worker.
 
-    kwargs = dict(
-        fp16=False,
-        temperature=0.0,
-        best_of=5,
-        beam_size=5,
-        condition_on_previous_text=False,
-        initial_prompt=initial_prompt,
-    )
-    if forced_lang:
-        kwargs["language"] = forced_lang
+    With `wake_only`, a command said with the wake phrase keeps the wake model's
+    transcript instead of being transcribed again. Returns (text, language,
+    language confidence).
+    """
+    model = models.get()
 
-    result = model.transcribe(audio, **kwargs)
+    result, language, confidence = _decode(model, audio, kwargs)
     command = result.get('text', '').strip()
-    if command:
-        if verbose:
-            print("You:", command)
-        return command.lower()
-    return ""
+    if models.is_wake_model(model) and _WAKE_PHRASE_RE.match(command):
+        # Woken while asleep: bring the command model back. If a command followed
+        # the wake phrase, transcribe the clip again with it for accuracy.
+        models.set_awake(True)
+        tuner = _stt_tuner()
+        if tuner is not None:
+            tuner.pause()  # the command model is back; benchmarking would slow it down
+        if not wake_only and _WAKE_PHRASE_RE.sub("", command).strip(" .,!?"):
+            result, language, confidence = _decode(models.command_model(), audio, kwargs, retry=True)
+            command = result.get('text', '').strip()
+    elif command and not models.is_wake_model(model):
+        # The first utterances are kept (locally) for the one-time CPU auto-tuner.
+        tuner = _stt_tuner()
+        if tuner is not None:
+            tuner.collect(audio, fs)
+    return command, language, confidence
+
+
+def _decode(model: Any, audio: Any, kwargs: dict[str, Any], retry: bool = False) -> tuple[dict[str, Any], str, float]:
+    """model.transcribe() in the session's language, detecting (and pinning) it when needed."""
+    samples = int(audio.size)
+    if kwargs.get("language"):  # RIVA_STT_LANG
+        with tracing.span("listen.transcribe", samples=samples, retry=retry):
+            return model.transcribe(audio, **kwargs), str(kwargs["language"]), 1.0
+
+    policy = _language_policy()
+    pinned = policy.pinned()
+    result = None
+    if pinned is not None:
+        with tracing.span("listen.transcribe", samples=samples, retry=retry, language=pinned):
+            result = model.transcribe(audio, **kwargs, language=pinned)
+        if stt_language.reliable(result):
+            return result, pinned, policy.confidence
+        policy.unreliable()
+
+    try:
+        with tracing.span("listen.detect_language", samples=samples):
+            language, confidence = stt_language.detect_language(_optional_import("whisper"), model, audio)
+    except Exception:
+        # No separate language ID here: let transcribe() detect, and don't pin its guess.
+        with tracing.span("listen.transcribe", samples=samples, retry=retry):
+            result = model.transcribe(audio, **kwargs)
+        language = str(result.get("language") or "")
+        policy.detected(language, 0.0)
+        return result, language, 0.0
+    policy.detected(language, confidence)
+    if result is not None and language == pinned:
+        return result, language, confidence  # same language, just a hard utterance
+    with tracing.span("listen.transcribe", samples=samples, retry=retry, language=language):
+        result = model.transcribe(audio, **kwargs, language=language)
+    return result, language, confidence
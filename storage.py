@@ -0,0 +1,269 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any
+
+
+# Bump when the schema changes; see MemoryStore._migrate_schema().
+_SCHEMA_VERSION = 1
+
+# History rows are written by a background thread in small batches so logging
+# never blocks command dispatch.
+_HISTORY_BATCH_SIZE = 64
+_HISTORY_FLUSH_SEC = 0.5
+
+
+class MemoryStore:
+    """SQLite-backed assistant memory (WAL mode).
+
+    - `kv`: small key/value state (pending actions, wake window, ...). Values are
+      stored JSON-encoded, so `load()`/`save()` keep the old dict-shaped API.
+    - `command_history`: append-only log of every command, indexed by time and
+      by intent for "what did I ask earlier" and usage queries.
+
+    On first use, an existing `memory.json` is imported and renamed to
+    `memory.json.migrated`.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: str | None = None):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._migrate_schema()
+        self._snapshot: dict[str, str] = {}
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+
+        self._queue: "queue.Queue[tuple | None]" = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._closed = False
+        atexit.register(self.close)
+
+    # --- connection / schema -------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        return conn
+
+    def _migrate_schema(self) -> None:
+        with self._lock:
+            version = int(self._conn.execute("PRAGMA user_version").fetchone()[0])
+            if version >= _SCHEMA_VERSION:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                if version < 1:
+                    self._conn.execute(
+                        "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                    )
+                    self._conn.execute(
+                        "CREATE TABLE IF NOT EXISTS command_history ("
+                        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                        " ts REAL NOT NULL,"
+                        " raw TEXT,"
+                        " command TEXT,"
+                        " intent TEXT,"
+                        " latency_ms REAL"
+                        ")"
+                    )
+                    self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_ts ON command_history(ts)")
+                    self._conn.execute(
+                        "CREATE INDEX IF NOT EXISTS idx_history_intent_ts ON command_history(intent, ts)"
+                    )
+                self._conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _migrate_from_json(self, json_path: str) -> None:
+        """Import a legacy memory.json once (only into an empty kv table)."""
+        if not os.path.exists(json_path):
+            return
+        with self._lock:
+            has_rows = self._conn.execute("SELECT 1 FROM kv LIMIT 1").fetchone() is not None
+        if has_rows:
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if isinstance(data, dict):
+            self.save(data)
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except Exception:
+            pass
+
+    # --- key/value state -------------------------------------------------
+    def load(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM kv").fetchall()
+        self._snapshot = {k: v for k, v in rows}
+        data: dict[str, Any] = {}
+        for k, v in rows:
+            try:
+                data[k] = json.loads(v)
+            except Exception:
+                continue
+        return data
+
+    def save(self, data: dict[str, Any]) -> None:
+        """Persist `data`, writing only keys that changed since the last load/save."""
+        encoded = {str(k): json.dumps(v) for k, v in (data or {}).items()}
+        changed = [(k, v) for k, v in encoded.items() if self._snapshot.get(k) != v]
+        removed = [(k,) for k in self._snapshot if k not in encoded]
+        if not changed and not removed:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if changed:
+                    self._conn.executemany(
+                        "INSERT INTO kv(key, value) VALUES(?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                        changed,
+                    )
+                if removed:
+                    self._conn.executemany("DELETE FROM kv WHERE key=?", removed)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._snapshot = encoded
+
+    # --- command history ---------------------------------------------------
+    def log_command(
+        self,
+        raw: str,
+        command: str,
+        intent: str | None,
+        latency_ms: float | None,
+        ts: float | None = None,
+    ) -> None:
+        """Queue a history row; written in batches by a background thread."""
+        if self._closed:
+            return
+        self._ensure_writer()
+        self._queue.put((time.time() if ts is None else ts, raw, command, intent, latency_ms))
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="riva-history-writer", daemon=True)
+                self._writer.start()
+
+    def _writer_loop(self) -> None:
+        conn = self._connect()
+        try:
+            stop = False
+            while not stop:
+                batch: list[tuple] = []
+                try:
+                    item = self._queue.get(timeout=_HISTORY_FLUSH_SEC)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + _HISTORY_FLUSH_SEC
+                while True:
+                    if item is None:
+                        stop = True
+                    else:
+                        batch.append(item)
+                    if stop or len(batch) >= _HISTORY_BATCH_SIZE:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    try:
+                        conn.execute("BEGIN")
+                        conn.executemany(
+                            "INSERT INTO command_history(ts, raw, command, intent, latency_ms) VALUES(?, ?, ?, ?, ?)",
+                            batch,
+                        )
+                        conn.execute("COMMIT")
+                    except Exception as e:
+                        try:
+                            conn.execute("ROLLBACK")
+                        except Exception:
+                            pass
+                        print(f"[history write error] {e}")
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+    def flush(self) -> None:
+        """Block until all queued history rows are written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def history(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        intent: str | None = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Most recent history rows first, optionally filtered by time range/intent."""
+        self.flush()
+        where: list[str] = []
+        params: list[Any] = []
+        if intent:
+            where.append("intent = ?")
+            params.append(intent)
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(float(since))
+        if until is not None:
+            where.append("ts < ?")
+            params.append(float(until))
+        sql = "SELECT ts, raw, command, intent, latency_ms FROM command_history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"ts": r[0], "raw": r[1], "command": r[2], "intent": r[3], "latency_ms": r[4]}
+            for r in rows
+        ]
+
+    def intent_counts(self, since: float | None = None) -> dict[str, int]:
+        self.flush()
+        sql = "SELECT intent, COUNT(*) FROM command_history"
+        params: list[Any] = []
+        if since is not None:
+            sql += " WHERE ts >= ?"
+            params.append(float(since))
+        sql += " GROUP BY intent ORDER BY COUNT(*) DESC"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {str(r[0]): int(r[1]) for r in rows}
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5.0)
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
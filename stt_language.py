@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from typing import Any, Callable
+
+
+# Sticky spoken-language choice for Whisper.
+#
+# Without a language, Whisper runs a detection pass on every utterance, and in a
+# mixed Bangla/English session an accented English command is sometimes decoded
+# as Bangla (or the other way round). So the language is detected once, pinned
+# for the session (until Riva goes to sleep), and detected again only when:
+#   - the pin is older than RIVA_STT_LANG_WINDOW_SEC, or
+#   - a transcription with the pinned language looks unreliable (Whisper's own
+#     fallback signals: low average log-probability or a high compression ratio).
+# A detection below RIVA_STT_LANG_MIN_CONFIDENCE is used for that utterance but
+# not pinned. RIVA_STT_LANG still forces one language and skips all of this.
+
+_DEFAULT_WINDOW_SEC = 600.0
+_DEFAULT_MIN_CONFIDENCE = 0.6
+# Whisper's transcribe() thresholds for "this decode probably failed".
+_MIN_AVG_LOGPROB = -1.0
+_MAX_COMPRESSION_RATIO = 2.4
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def reliable(result: dict[str, Any]) -> bool:
+    """False if a transcribe() result looks like a failed decode (wrong language, noise)."""
+    segments = [s for s in result.get("segments") or () if isinstance(s, dict)]
+    if not segments:
+        return True
+    logprob = sum(float(s.get("avg_logprob", 0.0)) for s in segments) / len(segments)
+    ratio = max(float(s.get("compression_ratio", 0.0)) for s in segments)
+    return logprob >= _MIN_AVG_LOGPROB and ratio <= _MAX_COMPRESSION_RATIO
+
+
+class LanguagePolicy:
+    """Decides when to detect the language and remembers the pinned one."""
+
+    def __init__(
+        self,
+        window_sec: float | None = None,
+        min_confidence: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_sec = _env_float("RIVA_STT_LANG_WINDOW_SEC", _DEFAULT_WINDOW_SEC) if window_sec is None else window_sec
+        self.min_confidence = (
+            _env_float("RIVA_STT_LANG_MIN_CONFIDENCE", _DEFAULT_MIN_CONFIDENCE) if min_confidence is None else min_confidence
+        )
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.language = ""
+        self.confidence = 0.0
+        self._pinned_at: float | None = None
+        self.detections = 0
+        self.expired = 0
+        self.dropped = 0
+
+    def pinned(self) -> str | None:
+        """The language to decode with, or None when it should be detected."""
+        with self._lock:
+            if self._pinned_at is None:
+                return None
+            if self.window_sec > 0 and self.clock() - self._pinned_at >= self.window_sec:
+                self._pinned_at = None
+                self.expired += 1
+                return None
+            return self.language
+
+    def detected(self, language: str, confidence: float) -> None:
+        """Record a detection; pinned if confident enough."""
+        with self._lock:
+            self.detections += 1
+            self.language, self.confidence = language, confidence
+            self._pinned_at = self.clock() if language and confidence >= self.min_confidence else None
+
+    def unreliable(self) -> None:
+        """The pinned language produced a bad transcription: detect again."""
+        with self._lock:
+            if self._pinned_at is not None:
+                self._pinned_at = None
+                self.dropped += 1
+
+    def reset(self) -> None:
+        """A new session (Riva went to sleep): forget the pin."""
+        with self._lock:
+            self._pinned_at = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "language": self.language,
+                "confidence": round(self.confidence, 3),
+                "pinned": self._pinned_at is not None,
+                "detections": self.detections,
+                "expired": self.expired,
+                "dropped": self.dropped,
+            }
+
+
+def detect_language(whisper: Any, model: Any, audio: Any) -> tuple[str, float]:
+    """Whisper's language identification on the first 30 s of float32 `audio`: (code, probability)."""
+    n_mels = getattr(getattr(model, "dims", None), "n_mels", 80)
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    if isinstance(probs, list):
+        probs = probs[0]
+    language = max(probs, key=probs.get)
+    return str(language), float(probs[language])
@@ -0,0 +1,274 @@
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable
+
+import cache
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+# Whisper model lifecycle: which model is resident, and when to drop it.
+#
+#   - awake: the command model (RIVA_WHISPER_MODEL, default "base") transcribes;
+#   - asleep: only wake phrases matter, so the command model is released and a
+#     small wake model (RIVA_WAKE_MODEL, default "tiny") listens instead. When it
+#     hears "hi riva", the command model is reloaded in the background;
+#   - idle: a command model unused for RIVA_STT_IDLE_UNLOAD_SEC is released and
+#     loaded again on the next utterance.
+#
+# RIVA_STT_MEMORY_MB caps the command model: the largest size not above the
+# requested one whose footprint fits is used. Footprints start as estimates and
+# are replaced by the RSS growth measured when a model loads (cached on disk).
+# Current and peak RSS are sampled around loads and unloads (see stats()).
+
+_DEFAULT_MODEL = "base"
+_DEFAULT_WAKE_MODEL = "tiny"
+_DEFAULT_IDLE_UNLOAD_SEC = 900.0
+_FOOTPRINT_CACHE = "stt_footprints.json"
+
+# Smallest to largest; approximate resident MB of a float32 model on CPU.
+_MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+_ESTIMATED_MB = {"tiny": 150.0, "base": 290.0, "small": 800.0, "medium": 2100.0, "large": 4200.0}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def _size_of(name: str) -> str:
+    """"base.en" -> "base", "large-v3" -> "large"."""
+    base = name.split(".", 1)[0].split("-", 1)[0]
+    return base if base in _MODEL_SIZES else ""
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB (0 if unknown)."""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception:
+            pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory the OS has seen for this process, in MB (0 if unknown)."""
+    if psutil is not None:
+        try:
+            info = psutil.Process().memory_info()
+            peak = getattr(info, "peak_wset", None)  # Windows
+            if peak:
+                return peak / (1024 * 1024)
+        except Exception:
+            pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KB on Linux
+    except Exception:
+        return 0.0
+
+
+class ModelManager:
+    """Loads, shares and releases the Whisper models listen() uses."""
+
+    def __init__(
+        self,
+        load: Callable[[str], Any],
+        model: str | None = None,
+        wake_model: str | None = None,
+        idle_sec: float | None = None,
+        budget_mb: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        footprint_cache: str | None = _FOOTPRINT_CACHE,
+    ):
+        self._loader = load
+        self.clock = clock
+        self.footprint_cache = footprint_cache
+        self.requested = model or (os.environ.get("RIVA_WHISPER_MODEL") or "").strip() or _DEFAULT_MODEL
+        if wake_model is None:
+            wake_model = os.environ.get("RIVA_WAKE_MODEL", _DEFAULT_WAKE_MODEL)
+        wake = wake_model.strip()
+        # "none" (or the command model itself) keeps the command model for wake phrases too.
+        self._wake_configured = "" if wake.lower() in ("", "none", "off") else wake
+        self.wake_name = self._wake_configured
+        self.idle_sec = _env_float("RIVA_STT_IDLE_UNLOAD_SEC", _DEFAULT_IDLE_UNLOAD_SEC) if idle_sec is None else idle_sec
+        self.budget_mb = _env_float("RIVA_STT_MEMORY_MB", 0.0) if budget_mb is None else budget_mb
+        self._footprints: dict[str, float] = {}
+        if footprint_cache is not None:
+            data = cache.load_json(footprint_cache)
+            if isinstance(data, dict):
+                self._footprints = {str(k): float(v) for k, v in data.items() if isinstance(v, (int, float))}
+        self.name = self._pick(self.requested)
+        if self.wake_name == self.name:
+            self.wake_name = ""
+        self._models: dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._awake = True
+        self._last_used = clock()
+        self._prefetch: threading.Thread | None = None
+        self.loads: dict[str, int] = {}
+        self.unloads: dict[str, int] = {}
+        self.peak_rss = 0.0
+        self._sample()
+
+    # --- sizing
+
+    def footprint_mb(self, name: str) -> float:
+        if name in self._footprints:
+            return self._footprints[name]
+        return _ESTIMATED_MB.get(_size_of(name), 0.0)
+
+    def _pick(self, requested: str) -> str:
+        size = _size_of(requested)
+        if self.budget_mb <= 0 or not size or self.footprint_mb(requested) <= self.budget_mb:
+            return requested
+        suffix = requested[len(size):] if requested.endswith(".en") else ""
+        for smaller in reversed(_MODEL_SIZES[:_MODEL_SIZES.index(size)]):
+            name = smaller + suffix
+            if self.footprint_mb(name) <= self.budget_mb:
+                print(f"[stt] {requested} needs ~{self.footprint_mb(requested):.0f} MB; "
+                      f"using {name} to stay within RIVA_STT_MEMORY_MB={self.budget_mb:.0f}")
+                return name
+        print(f"[stt] no Whisper model fits RIVA_STT_MEMORY_MB={self.budget_mb:.0f}; using tiny{suffix}")
+        return "tiny" + suffix
+
+    def _sample(self) -> float:
+        now = rss_mb()
+        self.peak_rss = max(self.peak_rss, now, peak_rss_mb())
+        return now
+
+    # --- loading
+
+    def _load(self, name: str) -> Any:
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            before = self._sample()
+            model = self._loader(name)
+            after = self._sample()
+            self._models[name] = model
+            self.loads[name] = self.loads.get(name, 0) + 1
+            grown = after - before
+            if grown > 1.0 and self.footprint_cache is not None and abs(grown - self._footprints.get(name, 0.0)) > 10.0:
+                self._footprints[name] = round(grown, 1)
+                cache.save_json(self.footprint_cache, self._footprints)
+            return model
+
+    def _release(self, name: str) -> bool:
+        with self._lock:
+            if self._models.pop(name, None) is None:
+                return False
+            self.unloads[name] = self.unloads.get(name, 0) + 1
+        gc.collect()
+        self._sample()
+        return True
+
+    @property
+    def awake(self) -> bool:
+        return self._awake
+
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return list(self._models)
+
+    def is_wake_model(self, model: Any) -> bool:
+        with self._lock:
+            return bool(self.wake_name) and self._models.get(self.wake_name) is model
+
+    def get(self) -> Any:
+        """The model to transcribe with now (loading it if needed)."""
+        self._last_used = self.clock()
+        if self._awake or not self.wake_name:
+            return self._load(self.name)
+        with self._lock:
+            ready = self._models.get(self.name)
+        # A command model that is already back (prefetched) is always the better choice.
+        return ready if ready is not None else self._load(self.wake_name)
+
+    def command_model(self) -> Any:
+        """The command model, waiting for a background reload if one is running."""
+        self._last_used = self.clock()
+        return self._load(self.name)
+
+    def set_model(self, name: str, reload: bool = False) -> None:
+        """Switch the command model (say, for a power profile); the old one is released.
+
+        With reload, a loaded copy is released even when the name is unchanged,
+        so the next use loads it again (say, with a newly tuned CPU setup).
+        """
+        with self._lock:
+            picked = self._pick(name)
+            if picked == self.name:
+                if reload:
+                    self._release(picked)
+                return
+            old, self.name = self.name, picked
+            self.wake_name = "" if self._wake_configured == picked else self._wake_configured
+        self._release(old)
+
+    # --- lifecycle
+
+    def set_awake(self, awake: bool) -> None:
+        if awake == self._awake:
+            return
+        self._awake = awake
+        if awake:
+            self.prefetch()
+            return
+        if self.wake_name:
+            self._release(self.name)
+
+    def prefetch(self) -> threading.Thread | None:
+        """Load the command model in the background (after a wake phrase)."""
+        with self._lock:
+            if self.name in self._models or (self._prefetch is not None and self._prefetch.is_alive()):
+                return None
+
+            def _run():
+                try:
+                    self._load(self.name)
+                    if self._awake and self.wake_name:
+                        self._release(self.wake_name)
+                except Exception as e:
+                    print(f"[stt] background model load failed: {e}")
+
+            self._prefetch = threading.Thread(target=_run, name="riva-stt-prefetch", daemon=True)
+            self._prefetch.start()
+            return self._prefetch
+
+    def release_idle(self) -> bool:
+        """Release the command model if unused for idle_sec; True if it was."""
+        if self.idle_sec <= 0 or self.clock() - self._last_used < self.idle_sec:
+            return False
+        return self._release(self.name)
+
+    def stats(self) -> dict[str, Any]:
+        current = self._sample()
+        return {
+            "model": self.name,
+            "requested": self.requested,
+            "wake_model": self.wake_name,
+            "awake": self._awake,
+            "loaded": self.loaded(),
+            "loads": dict(self.loads),
+            "unloads": dict(self.unloads),
+            "rss_mb": round(current, 1),
+            "peak_rss_mb": round(self.peak_rss, 1),
+            "budget_mb": self.budget_mb,
+            "footprint_mb": {n: round(self.footprint_mb(n), 1) for n in {self.name, self.wake_name} if n},
+        }
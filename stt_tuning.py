@@ -0,0 +1,460 @@
+import multiprocessing
+import os
+import platform
+import re
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import cache
+from stt_models import _DEFAULT_MODEL, _MODEL_SIZES, _size_of
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+# CPU inference settings for Whisper, and an auto-tuner that picks them.
+#
+# Three knobs matter on a CPU-only laptop:
+#   - intra-op threads (torch.set_num_threads): PyTorch's default of one thread
+#     per logical core is often slower than one per physical core;
+#   - dynamic int8 quantization of the Linear layers (most of Whisper's compute),
+#     typically ~2x faster on CPU with a small accuracy cost;
+#   - model size: the next smaller model may be accurate enough for short commands.
+#
+# The tuner transcribes a few stored clips (WAV files in the stt_clips cache
+# folder; the first utterances heard are saved there until there are enough,
+# and deleted once tuning is done) with every candidate setup, scores each against a reference transcript, and
+# persists the fastest setup whose word accuracy meets RIVA_STT_ACCURACY_FLOOR.
+# The reference is a clip's .txt file when one sits next to it, otherwise what
+# the requested model at full precision hears. The setup is keyed on the
+# requested model and the CPU, and applied whenever a model loads.
+# RIVA_STT_THREADS / RIVA_STT_INT8 override the tuned values.
+#
+# The background tuner runs in a child process, and only while Riva is asleep
+# (the command model is released then): benchmarking next to listen() would
+# change the live model's torch threads, keep extra model copies resident, and
+# skew the timings. Waking up stops it; it starts over at the next sleep.
+
+_TUNING_VERSION = 1
+_TUNING_CACHE = "stt_tuning.json"
+_CLIP_DIR = "stt_clips"
+_CLIPS_NEEDED = 5
+_MAX_CLIP_SEC = 8.0
+_DEFAULT_ACCURACY_FLOOR = 0.9
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def _env_flag(name: str) -> bool | None:
+    raw = (os.environ.get(name) or "").strip().lower()
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    return None
+
+
+def autotune_enabled() -> bool:
+    return _env_flag("RIVA_STT_AUTOTUNE") is not False
+
+
+def requested_model() -> str:
+    return (os.environ.get("RIVA_WHISPER_MODEL") or "").strip() or _DEFAULT_MODEL
+
+
+@dataclass(frozen=True)
+class Setup:
+    model: str
+    threads: int = 0  # 0: PyTorch's default
+    int8: bool = False
+
+    def label(self) -> str:
+        return f"{self.model}/{self.threads or 'default'} threads/{'int8' if self.int8 else 'fp32'}"
+
+    def to_row(self) -> dict[str, Any]:
+        return {"model": self.model, "threads": self.threads, "int8": self.int8}
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "Setup":
+        return cls(str(row["model"]), int(row.get("threads") or 0), bool(row.get("int8")))
+
+
+def _torch() -> Any:
+    try:
+        import torch  # type: ignore
+
+        return torch
+    except Exception:
+        return None
+
+
+def _cpu_counts() -> tuple[int, int]:
+    """(physical, logical) cores; physical falls back to logical."""
+    logical = os.cpu_count() or 1
+    physical = 0
+    if psutil is not None:
+        try:
+            physical = int(psutil.cpu_count(logical=False) or 0)
+        except Exception:
+            physical = 0
+    return (physical or logical), logical
+
+
+def _key(requested: str) -> str:
+    return cache.make_key("stt-tuning", _TUNING_VERSION, requested, _cpu_counts(), platform.machine())
+
+
+def load_tuned(requested: str) -> dict[str, Any] | None:
+    """The persisted tuning result for `requested` on this CPU ({"setup", "results", ...})."""
+    data = cache.load_json(_TUNING_CACHE, key=_key(requested))
+    if isinstance(data, dict) and isinstance(data.get("setup"), dict):
+        return data
+    return None
+
+
+def current_setup(requested: str | None = None) -> Setup:
+    """The setup to load with: tuned (if any), then RIVA_STT_THREADS / RIVA_STT_INT8 on top."""
+    requested = requested or requested_model()
+    setup = Setup(requested)
+    tuned = load_tuned(requested) if autotune_enabled() else None
+    if tuned is not None:
+        try:
+            setup = Setup.from_row(tuned["setup"])
+        except Exception:
+            pass
+    threads = int(_env_float("RIVA_STT_THREADS", 0.0))
+    int8 = _env_flag("RIVA_STT_INT8")
+    return Setup(
+        setup.model,
+        threads if threads > 0 else setup.threads,
+        setup.int8 if int8 is None else int8,
+    )
+
+
+def apply_threads(threads: int) -> None:
+    torch = _torch()
+    if torch is None or threads <= 0:
+        return
+    try:
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+    except Exception as e:
+        print(f"[stt] could not set {threads} threads: {e}")
+
+
+def quantize_int8(model: Any) -> Any:
+    """A copy of `model` with its Linear layers dynamically quantized to int8.
+
+    Whisper uses its own Linear subclass, which quantize_dynamic would skip, so
+    every Linear type found in the model is mapped explicitly.
+    """
+    torch = _torch()
+    if torch is None:
+        return model
+    try:
+        from torch.ao.nn.quantized.dynamic import Linear as QuantizedLinear  # type: ignore
+
+        linear_types = {type(m) for m in model.modules() if isinstance(m, torch.nn.Linear)}
+        return torch.ao.quantization.quantize_dynamic(
+            model,
+            qconfig_spec=linear_types,
+            dtype=torch.qint8,
+            mapping={t: QuantizedLinear for t in linear_types},
+        )
+    except Exception as e:
+        print(f"[stt] int8 quantization failed, using float32: {e}")
+        return model
+
+
+def candidates(requested: str) -> list[Setup]:
+    """The requested model and the next smaller size, each at 1-2 thread counts, fp32 and int8."""
+    size = _size_of(requested)
+    models = [requested]
+    if size and _MODEL_SIZES.index(size) > 0:
+        suffix = requested[len(size):] if requested.endswith(".en") else ""
+        models.append(_MODEL_SIZES[_MODEL_SIZES.index(size) - 1] + suffix)
+    physical, logical = _cpu_counts()
+    threads = sorted({physical, logical})
+    return [Setup(m, t, q) for m in models for t in threads for q in (False, True)]
+
+
+# --- clips
+
+
+class ClipStore:
+    """WAV clips (16 kHz mono int16) the tuner benchmarks on; optional .txt references."""
+
+    def __init__(self, directory: str | None = None, needed: int = _CLIPS_NEEDED):
+        self.directory = directory or cache.cache_path(_CLIP_DIR)
+        self.needed = needed
+
+    def paths(self) -> list[str]:
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.lower().endswith(".wav"))
+        except Exception:
+            return []
+        return [os.path.join(self.directory, n) for n in names]
+
+    def ready(self) -> bool:
+        return len(self.paths()) >= self.needed
+
+    def wanted(self) -> bool:
+        return not self.ready()
+
+    def save(self, samples: Any, rate: int = 16000) -> str | None:
+        """Store float32 samples in [-1, 1] as the next clip (capped at _MAX_CLIP_SEC)."""
+        try:
+            import numpy as np
+
+            pcm = (np.clip(samples[: int(_MAX_CLIP_SEC * rate)], -1.0, 1.0) * 32767).astype(np.int16)
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"clip-{int(time.time() * 1000)}.wav")
+            with wave.open(path, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(rate)
+                w.writeframes(pcm.tobytes())
+            return path
+        except Exception as e:
+            print(f"[stt] could not store a tuning clip: {e}")
+            return None
+
+    def clear(self) -> int:
+        """Delete the stored clips (and their .txt references); returns how many clips were removed."""
+        removed = 0
+        for path in self.paths():
+            for p in (path, os.path.splitext(path)[0] + ".txt"):
+                try:
+                    os.remove(p)
+                    removed += p == path
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"[stt] could not delete {p}: {e}")
+        return removed
+
+    def load(self) -> list[tuple[Any, str | None]]:
+        """(float32 samples, reference text or None) per clip."""
+        import numpy as np
+
+        out: list[tuple[Any, str | None]] = []
+        for path in self.paths():
+            try:
+                with wave.open(path, "rb") as w:
+                    if w.getsampwidth() != 2 or w.getnchannels() != 1:
+                        continue
+                    pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+            except Exception:
+                continue
+            ref = None
+            txt = os.path.splitext(path)[0] + ".txt"
+            if os.path.isfile(txt):
+                with open(txt, "r", encoding="utf-8") as f:
+                    ref = f.read().strip()
+            out.append((pcm.astype(np.float32) / 32768.0, ref))
+        return out
+
+
+def word_accuracy(reference: str, hypothesis: str) -> float:
+    """1 - word error rate, floored at 0 (1.0 when both are empty)."""
+    ref = _WORD_RE.findall((reference or "").lower())
+    hyp = _WORD_RE.findall((hypothesis or "").lower())
+    if not ref:
+        return 0.0 if hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i]
+        for j, h in enumerate(hyp, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = cur
+    return max(0.0, 1.0 - prev[-1] / len(ref))
+
+
+# --- tuning
+
+
+def autotune(
+    load: Callable[[str], Any],
+    clips: list[tuple[Any, str | None]],
+    requested: str | None = None,
+    transcribe_kwargs: dict[str, Any] | None = None,
+    floor: float | None = None,
+    persist: bool = True,
+) -> dict[str, Any]:
+    """Benchmark candidates() on `clips` and return (and persist) the fastest accurate setup.
+
+    `load(name)` returns a float32 model; int8 candidates quantize a copy of it.
+    """
+    requested = requested or requested_model()
+    floor = _env_float("RIVA_STT_ACCURACY_FLOOR", _DEFAULT_ACCURACY_FLOOR) if floor is None else floor
+    kwargs = dict(transcribe_kwargs or {})
+    torch = _torch()
+    default_threads = torch.get_num_threads() if torch is not None else 0
+    audio_sec = sum(len(a) for a, _ in clips) / 16000.0 or 1.0
+
+    base: dict[str, Any] = {}
+    refs = [ref for _, ref in clips]
+    results: list[dict[str, Any]] = []
+    try:
+        for setup in candidates(requested):
+            if setup.model not in base:
+                base = {setup.model: load(setup.model)}  # one float32 model resident at a time
+            model = quantize_int8(base[setup.model]) if setup.int8 else base[setup.model]
+            apply_threads(setup.threads)
+            model.transcribe(clips[0][0][:16000], **kwargs)  # warm-up
+            texts: list[str] = []
+            t0 = time.perf_counter()
+            for audio, _ in clips:
+                texts.append(str(model.transcribe(audio, **kwargs).get("text") or "").strip())
+            elapsed = time.perf_counter() - t0
+            if not results:  # the requested model at full precision: reference for unlabeled clips
+                refs = [ref if ref is not None else text for ref, text in zip(refs, texts)]
+            accuracy = sum(word_accuracy(r or "", t) for r, t in zip(refs, texts)) / len(clips)
+            results.append({**setup.to_row(), "rtf": round(elapsed / audio_sec, 4), "accuracy": round(accuracy, 3)})
+            print(f"[stt-tune] {setup.label()}: {elapsed / audio_sec:.3f} x real time, accuracy {accuracy:.2f}")
+    finally:
+        base.clear()
+        apply_threads(default_threads)
+
+    ok = [r for r in results if r["accuracy"] >= floor] or results[:1]
+    best = min(ok, key=lambda r: r["rtf"])
+    data = {
+        "setup": Setup.from_row(best).to_row(),
+        "floor": floor,
+        "clips": len(clips),
+        "tuned_at": time.time(),
+        "results": results,
+    }
+    if persist:
+        cache.save_json(_TUNING_CACHE, data, key=_key(requested))
+    return data
+
+
+def _tune_process(load: Callable[[str], Any], directory: str, requested: str, transcribe_kwargs: dict[str, Any]) -> None:
+    """Child process entry point: benchmark the stored clips and persist the result."""
+    clips = ClipStore(directory).load()
+    if not clips:
+        raise SystemExit(1)
+    autotune(load, clips, requested, transcribe_kwargs)
+
+
+class AutoTuner:
+    """Runs autotune() once, in a child process while idle(), when clips are ready and nothing is tuned yet.
+
+    `load` must be picklable (a module-level function): the child process calls it.
+    """
+
+    def __init__(self, load: Callable[[str], Any], transcribe_kwargs: Callable[[], dict[str, Any]],
+                 store: ClipStore | None = None, on_done: Callable[[], None] | None = None,
+                 idle: Callable[[], bool] = lambda: True):
+        self._loader = load
+        self._kwargs = transcribe_kwargs
+        self.store = store or ClipStore()
+        self.on_done = on_done
+        self.idle = idle
+        self._thread: threading.Thread | None = None
+        self._proc: Any = None
+        self._tuned = False
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def pending(self) -> bool:
+        if not self._tuned:
+            self._tuned = not autotune_enabled() or load_tuned(requested_model()) is not None
+        return not self._tuned
+
+    def collect(self, samples: Any, rate: int = 16000) -> None:
+        """Keep an utterance for tuning while there are too few; tuning starts once there are enough and Riva is idle."""
+        if not self.pending():
+            return
+        if self.store.wanted():
+            self.store.save(samples, rate)
+        self.start()
+
+    def start(self) -> threading.Thread | None:
+        """Start tuning if it is due and idle() allows it; a no-op otherwise."""
+        with self._lock:
+            if self._thread is not None or self._failed or not self.pending() or not self.store.ready() or not self.idle():
+                return None
+            requested = requested_model()
+            try:
+                proc = multiprocessing.get_context("spawn").Process(
+                    target=_tune_process,
+                    args=(self._loader, self.store.directory, requested, self._kwargs()),
+                    name="riva-stt-tune",
+                    daemon=True,
+                )
+                proc.start()
+            except Exception as e:
+                self._failed = True
+                print(f"[stt] could not start tuning: {e}")
+                return None
+            self._proc = proc
+            print("[stt] tuning CPU inference on stored clips while idle (runs once)...")
+
+            def _wait():
+                proc.join()
+                with self._lock:
+                    self._thread = None
+                    self._proc = None
+                    stopped = proc.exitcode is not None and proc.exitcode < 0  # terminated by pause()
+                    tuned = load_tuned(requested)
+                    if tuned is None and not stopped:
+                        self._failed = True  # not retried this run
+                        print(f"[stt] tuning failed (exit code {proc.exitcode})")
+                    if tuned is not None or not stopped:
+                        # Recordings of the user's voice are kept only until the result is persisted.
+                        self.store.clear()
+                if tuned is None:
+                    return
+                self._tuned = True
+                print(f"[stt] tuned: {Setup.from_row(tuned['setup']).label()}")
+                if self.on_done is not None:
+                    try:
+                        self.on_done()
+                    except Exception as e:
+                        print(f"[stt] could not apply the tuned setup: {e}")
+
+            self._thread = threading.Thread(target=_wait, name="riva-stt-tune", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def pause(self) -> None:
+        """Stop a running benchmark (Riva woke up); start() runs it again from scratch."""
+        with self._lock:
+            proc = self._proc
+        if proc is not None and proc.is_alive():
+            proc.terminate()
+            print("[stt] tuning paused until Riva is idle again")
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # python stt_tuning.py: show the current setup; --tune [clips dir]: run the tuner now.
+    requested = requested_model()
+    if "--tune" in sys.argv:
+        import speech
+
+        i = sys.argv.index("--tune")
+        folder = sys.argv[i + 1] if len(sys.argv) > i + 1 else None
+        clips = ClipStore(folder).load()
+        if not clips:
+            sys.exit(f"[stt-tune] no WAV clips in {ClipStore(folder).directory}")
+        data = autotune(speech._load_base_whisper_model, clips, requested, speech._transcribe_kwargs())
+        print(json.dumps(data, indent=2))
+    print(f"[stt-tune] requested {requested}; loading with {current_setup(requested).label()}")
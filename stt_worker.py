@@ -0,0 +1,301 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+
+# Out-of-process transcription (RIVA_STT_WORKER=1), so Whisper's Python-side
+# decoding doesn't hold the GIL that capture, dispatch and TTS need.
+#
+# Audio never goes through a pickled queue. listen() records straight into a
+# slot of an int16 ring in shared memory (AudioRing); only a small descriptor
+# (sequence number, offset, length) is sent to the worker, which transcribes a
+# NumPy view of that slice. A slot stays reserved until its result (or a worker
+# crash) comes back, so the capture side never overwrites audio being read.
+#
+# Cleanup: the owner unlinks the segment at exit. If it dies without doing so,
+# the worker notices within a second and exits, after which the multiprocessing
+# resource tracker (POSIX) or the OS (Windows, once the last handle closes)
+# frees it; new rings also sweep segments left by dead processes.
+# A worker that dies is restarted on the next utterance, and the utterance it
+# was holding is transcribed in-process instead.
+
+_RING_SEC = 60.0
+_SEGMENT_PREFIX = "riva-stt"
+_RESULT_TIMEOUT_SEC = 120.0
+_MAX_RESTARTS = 3
+
+
+@dataclass(frozen=True)
+class Slice:
+    """What crosses the process boundary for one utterance."""
+
+    seq: int
+    offset: int
+    length: int
+
+
+def sweep_stale(prefix: str = _SEGMENT_PREFIX) -> int:
+    """Unlink ring segments whose owning process is gone (POSIX /dev/shm only)."""
+    root = "/dev/shm"
+    if os.name == "nt" or not os.path.isdir(root):
+        return 0
+    removed = 0
+    for name in os.listdir(root):
+        if not name.startswith(prefix + "-"):
+            continue
+        try:
+            pid = int(name[len(prefix) + 1:].split("-", 1)[0])
+        except ValueError:
+            continue
+        if pid == os.getpid() or _pid_alive(pid):
+            continue
+        try:
+            os.unlink(os.path.join(root, name))
+            removed += 1
+        except Exception:
+            pass
+    return removed
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except Exception:
+        return True
+    return True
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Only the owner should unlink; Python 3.13+ can keep an attach out of the resource tracker.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class AudioRing:
+    """16 kHz mono int16 samples in shared memory; one writer, slots reserved per utterance."""
+
+    def __init__(self, seconds: float = _RING_SEC, rate: int = 16000, name: str | None = None):
+        import numpy as np
+
+        self.rate = rate
+        self.frames = int(seconds * rate)
+        self.owner = name is None
+        if self.owner:
+            sweep_stale()
+            name = f"{_SEGMENT_PREFIX}-{os.getpid()}-{secrets.token_hex(4)}"
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.frames * 2)
+        else:
+            self.shm = _attach(name)
+        self.name = self.shm.name
+        self.samples = np.ndarray((self.frames,), dtype=np.int16, buffer=self.shm.buf)
+        self._pos = 0
+        self._seq = 0
+        # seq -> (offset, frames) of slots not yet handed back
+        self._busy: dict[int, tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, name: str, frames: int, rate: int = 16000) -> "AudioRing":
+        return cls(frames / float(rate), rate, name=name)
+
+    def reserve(self, frames: int) -> tuple[int, Any] | None:
+        """A contiguous free slot of `frames` samples as (seq, writable view); None if full."""
+        if frames <= 0 or frames > self.frames:
+            return None
+        with self._lock:
+            start = self._pos if self._pos + frames <= self.frames else 0
+            end = start + frames
+            for off, n in self._busy.values():
+                if start < off + n and off < end:
+                    return None
+            self._seq += 1
+            self._busy[self._seq] = (start, frames)
+            self._pos = end % self.frames
+            return self._seq, self.samples[start:end]
+
+    def slice(self, seq: int, start: int = 0, length: int | None = None) -> Slice:
+        """Descriptor for part of a reserved slot."""
+        off, n = self._busy[seq]
+        length = n - start if length is None else length
+        return Slice(seq, off + start, max(0, min(length, n - start)))
+
+    def view(self, s: Slice) -> Any:
+        return self.samples[s.offset:s.offset + s.length]
+
+    def release(self, seq: int) -> None:
+        with self._lock:
+            self._busy.pop(seq, None)
+
+    def release_all(self) -> None:
+        with self._lock:
+            self._busy.clear()
+
+    def close(self) -> None:
+        self.samples = None
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except Exception:
+                pass
+
+
+def _worker_main(ring_name: str, frames: int, rate: int, requests: Any, results: Any, load: Callable[[str], Any]) -> None:
+    # Runs in the STT process: owns the Whisper models and reads audio from the ring.
+    import numpy as np
+
+    import power
+    import speech
+    from stt_models import ModelManager
+
+    ring = AudioRing.attach(ring_name, frames, rate)
+    models = ModelManager(load, model=speech._stt_setup().model)
+    try:
+        models.get()  # load while the first utterance is being captured
+    except Exception as e:
+        print(f"[stt-worker] model load failed: {e}")
+    parent = multiprocessing.parent_process()
+    try:
+        while True:
+            try:
+                msg = requests.get(timeout=1.0)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    break  # orphaned: let the segment go with us
+                continue
+            if msg is None:
+                break
+            s, kwargs, awake, profile_name = msg
+            profile = power.PROFILES.get(profile_name, power.PERFORMANCE)
+            try:
+                models.set_model(speech._profile_model(profile))
+                models.set_awake(awake)
+                models.release_idle()
+                if not awake:
+                    speech._language_policy().reset()
+                # The only copy of the audio: int16 -> float32, inside this process.
+                audio = ring.view(s).astype(np.float32) / 32768.0
+                heard = speech._transcribe(models, audio, kwargs, rate, wake_only=profile.wake_only_asleep)
+                results.put((s.seq, heard, "", models.awake))
+            except Exception as e:
+                results.put((s.seq, None, str(e), awake))
+    finally:
+        ring.close()
+
+
+class SttWorker:
+    """Owns the ring and a worker process; transcribes ring slices there."""
+
+    def __init__(self, load: Callable[[str], Any], ring_sec: float = _RING_SEC, rate: int = 16000):
+        self._loader = load
+        self.ring = AudioRing(ring_sec, rate)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc: Any = None
+        self._requests: Any = None
+        self._results: Any = None
+        self._lock = threading.Lock()
+        self.awake = True
+        self.handled = 0
+        self.restarts = 0
+        self.failures = 0
+        atexit.register(self.close)
+
+    def _ensure(self) -> bool:
+        if self._proc is not None and self._proc.is_alive():
+            return True
+        if self._proc is not None:
+            if self.restarts >= _MAX_RESTARTS:
+                return False
+            print(f"[stt-worker] worker exited (code {self._proc.exitcode}); restarting")
+            self.ring.release_all()
+            self.restarts += 1
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.ring.frames, self.ring.rate, self._requests, self._results, self._loader),
+            name="riva-stt-worker",
+            daemon=True,
+        )
+        self._proc.start()
+        return True
+
+    def start(self) -> bool:
+        with self._lock:
+            return self._ensure()
+
+    def transcribe(self, s: Slice, kwargs: dict[str, Any], profile: str = "performance",
+                   timeout: float = _RESULT_TIMEOUT_SEC) -> tuple[str, str, float] | None:
+        """(text, language, confidence) for a ring slice, or None if the worker failed (transcribe in-process then)."""
+        with self._lock:
+            try:
+                if not self._ensure():
+                    return None
+                self._requests.put((s, kwargs, self.awake, profile))
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    try:
+                        seq, heard, error, awake = self._results.get(timeout=0.5)
+                    except queue.Empty:
+                        if not self._proc.is_alive():
+                            self.failures += 1
+                            return None
+                        continue
+                    if seq != s.seq:
+                        continue  # a late answer to an utterance that already timed out
+                    if error:
+                        print(f"[stt-worker] {error}")
+                        self.failures += 1
+                        return None
+                    self.awake = awake
+                    self.handled += 1
+                    return heard
+                self.failures += 1
+                self._stop(kill=True)  # stuck: start a fresh worker next time
+                return None
+            finally:
+                self.ring.release(s.seq)
+
+    def _stop(self, kill: bool = False) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if not kill and proc.is_alive():
+                self._requests.put(None)
+                proc.join(2.0)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(2.0)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+            if self.ring.samples is not None:
+                self.ring.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pid": self._proc.pid if self._proc is not None else 0,
+            "alive": bool(self._proc is not None and self._proc.is_alive()),
+            "ring": self.ring.name,
+            "handled": self.handled,
+            "restarts": self.restarts,
+            "failures": self.failures,
+        }
@@ -0,0 +1,270 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+# System readings (battery, CPU, memory, disk, busiest processes) sampled in the
+# background into a fixed-size ring, so "battery", "system status", "what's
+# using my CPU" and "memory usage" answer from memory instead of calling psutil
+# on the dispatch path.
+#
+# A sample runs every RIVA_TELEMETRY_SEC (default 10 s); the ring keeps
+# RIVA_TELEMETRY_SIZE readings (default 60, ten minutes), which is also the
+# window trends are computed over. CPU (total and per process) is measured
+# between two readings, so the counters are primed when the sampler is created
+# and that reading is discarded; the first sample then waits until at least
+# _MIN_CPU_WINDOW_SEC has passed, since shorter windows mostly measure clock
+# granularity. Without the sampler (RIVA_TELEMETRY_SEC=0, or before warm_up()),
+# each query samples on the spot, with CPU averaged since the previous query.
+
+_DEFAULT_INTERVAL_SEC = 10.0
+_DEFAULT_SIZE = 60
+_TOP_N = 3
+_MIN_CPU_WINDOW_SEC = 1.0
+# Changes smaller than this (percentage points) count as "steady".
+_TREND_EPSILON = 5.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return float(raw) if raw else default
+    except Exception:
+        return default
+
+
+def _system_drive() -> str:
+    if os.name == "nt":
+        return (os.environ.get("SystemDrive") or "C:") + "\\"
+    return "/"
+
+
+@dataclass(frozen=True)
+class Reading:
+    at: float
+    cpu_percent: float | None = None
+    memory_percent: float | None = None
+    memory_used_gb: float | None = None
+    memory_total_gb: float | None = None
+    disk_percent: float | None = None
+    disk_free_gb: float | None = None
+    battery_percent: float | None = None
+    plugged: bool | None = None
+    battery_secs_left: float | None = None
+    # (process name, percent of all CPUs) / (process name, resident MB), busiest first
+    top_cpu: tuple[tuple[str, float], ...] = ()
+    top_memory: tuple[tuple[str, float], ...] = ()
+
+
+class Telemetry:
+    """Background sampler with a ring of recent readings."""
+
+    def __init__(
+        self,
+        interval_sec: float | None = None,
+        size: int | None = None,
+        psutil_mod: Any = None,
+        clock: Callable[[], float] = time.time,
+        top_n: int = _TOP_N,
+    ):
+        self.interval_sec = _env_float("RIVA_TELEMETRY_SEC", _DEFAULT_INTERVAL_SEC) if interval_sec is None else interval_sec
+        size = int(_env_float("RIVA_TELEMETRY_SIZE", _DEFAULT_SIZE)) if size is None else size
+        self.psutil = psutil_mod if psutil_mod is not None else psutil
+        self.clock = clock
+        self.top_n = top_n
+        self._ring: deque[Reading] = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.samples = 0
+        self.sample_ms = 0.0
+        # time.monotonic() of the last CPU reading (the priming one, then each sample)
+        self._cpu_at = 0.0
+        self._prime()
+
+    @property
+    def available(self) -> bool:
+        return self.psutil is not None
+
+    # --- sampling
+
+    def _prime(self) -> None:
+        """Start the CPU counters; their first readings are always 0 and are dropped."""
+        ps = self.psutil
+        if ps is None:
+            return
+        try:
+            ps.cpu_percent(interval=None)
+            for _ in ps.process_iter(["cpu_percent"]):
+                pass
+        except Exception:
+            pass
+        self._cpu_at = time.monotonic()
+
+    def _processes(self, ps: Any) -> tuple[tuple[tuple[str, float], ...], tuple[tuple[str, float], ...]]:
+        cpus = 1
+        try:
+            cpus = int(ps.cpu_count() or 1)
+        except Exception:
+            pass
+        cpu: dict[str, float] = {}
+        rss: dict[str, float] = {}
+        try:
+            # psutil remembers these Process objects, so cpu_percent covers the time since the last sample.
+            for p in ps.process_iter(["name", "cpu_percent", "memory_info"]):
+                info = p.info
+                name = os.path.splitext(info.get("name") or "")[0] or "?"
+                if info.get("cpu_percent"):
+                    # psutil reports up to 100% per CPU; a share of the whole machine is at most 100.
+                    cpu[name] = min(100.0, cpu.get(name, 0.0) + float(info["cpu_percent"]) / cpus)
+                mem = info.get("memory_info")
+                if mem is not None:
+                    rss[name] = rss.get(name, 0.0) + float(mem.rss) / (1024 * 1024)
+        except Exception:
+            pass
+        # Processes of one app are summed: "chrome" rather than twenty chrome.exe.
+        top_cpu = tuple(sorted(((n, round(v, 1)) for n, v in cpu.items() if n.lower() != "system idle process"),
+                               key=lambda x: -x[1])[:self.top_n])
+        top_mem = tuple(sorted(((n, round(v)) for n, v in rss.items()), key=lambda x: -x[1])[:self.top_n])
+        return top_cpu, top_mem
+
+    def sample(self) -> Reading | None:
+        """Take one reading now and add it to the ring."""
+        ps = self.psutil
+        if ps is None:
+            return None
+        with self._sample_lock:
+            t0 = time.perf_counter()
+            values: dict[str, Any] = {}
+            try:
+                values["cpu_percent"] = float(ps.cpu_percent(interval=None))
+            except Exception:
+                pass
+            try:
+                vm = ps.virtual_memory()
+                values.update(memory_percent=float(vm.percent), memory_used_gb=round((vm.total - vm.available) / 1024 ** 3, 1),
+                              memory_total_gb=round(vm.total / 1024 ** 3, 1))
+            except Exception:
+                pass
+            try:
+                du = ps.disk_usage(_system_drive())
+                values.update(disk_percent=float(du.percent), disk_free_gb=round(du.free / 1024 ** 3, 1))
+            except Exception:
+                pass
+            try:
+                battery = ps.sensors_battery()
+            except Exception:
+                battery = None
+            if battery is not None:
+                secs = getattr(battery, "secsleft", None)
+                values.update(
+                    battery_percent=float(battery.percent),
+                    plugged=None if battery.power_plugged is None else bool(battery.power_plugged),
+                    battery_secs_left=float(secs) if isinstance(secs, (int, float)) and secs >= 0 else None,
+                )
+            values["top_cpu"], values["top_memory"] = self._processes(ps)
+            self._cpu_at = time.monotonic()
+            reading = Reading(at=self.clock(), **values)
+            with self._lock:
+                self._ring.append(reading)
+                self.samples += 1
+                self.sample_ms = (time.perf_counter() - t0) * 1000.0
+            return reading
+
+    def start(self) -> threading.Thread | None:
+        if self.psutil is None or self.interval_sec <= 0:
+            return None
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+
+            def _run():
+                # Let the primed counters cover a real window before the first reading.
+                if self._stop.wait(max(0.0, _MIN_CPU_WINDOW_SEC - (time.monotonic() - self._cpu_at))):
+                    return
+                while True:
+                    try:
+                        self.sample()
+                    except Exception as e:
+                        print(f"[telemetry] sampling failed: {e}")
+                    if self._stop.wait(self.interval_sec):
+                        return
+
+            self._thread = threading.Thread(target=_run, name="riva-telemetry", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # --- queries
+
+    def latest(self) -> Reading | None:
+        """The newest reading; sampled on the spot when the background sampler isn't running."""
+        with self._lock:
+            if self._ring and self._thread is not None and self._thread.is_alive():
+                return self._ring[-1]
+        return self.sample()
+
+    def readings(self) -> list[Reading]:
+        with self._lock:
+            return list(self._ring)
+
+    def trend(self, field: str) -> tuple[float, float] | None:
+        """(change, seconds) of `field` over the ring's window (size x interval), oldest to newest."""
+        with self._lock:
+            if not self._ring:
+                return None
+            since = self._ring[-1].at - self._ring.maxlen * self.interval_sec
+            points = [(r.at, getattr(r, field)) for r in self._ring if r.at >= since and getattr(r, field) is not None]
+        if len(points) < 2:
+            return None
+        (t0, v0), (t1, v1) = points[0], points[-1]
+        return float(v1) - float(v0), t1 - t0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "interval_sec": self.interval_sec,
+                "readings": len(self._ring),
+                "capacity": self._ring.maxlen,
+                "samples": self.samples,
+                "last_sample_ms": round(self.sample_ms, 1),
+            }
+
+
+def describe_trend(change: tuple[float, float] | None, unit: str = "percent") -> str:
+    """', up 12 percent over the last 5 minutes', ', steady over ...', or '' without enough history."""
+    if change is None:
+        return ""
+    delta, secs = change
+    if secs < 60:
+        return ""
+    span = f"{round(secs / 60)} minute{'s' if round(secs / 60) != 1 else ''}"
+    if abs(delta) < _TREND_EPSILON:
+        return f", steady over the last {span}"
+    return f", {'up' if delta > 0 else 'down'} {abs(delta):.0f} {unit} over the last {span}"
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from dataclasses import asdict
+
+    # python telemetry.py [seconds]: sample for a while and print the readings.
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    t = Telemetry(interval_sec=1.0)
+    t.start()
+    time.sleep(seconds)
+    t.stop()
+    print(json.dumps([asdict(r) for r in t.readings()], indent=2))
+    print(f"[telemetry] {t.stats()}")
@@ -0,0 +1,278 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, TypeVar
+
+import cache
+
+
+# Tracing is off unless RIVA_TRACE is set ("1" or a file path). When off,
+# span()/traced() cost one global check.
+# RIVA_TRACE_MAX_BYTES / RIVA_TRACE_BACKUPS control rotation.
+_DEFAULT_TRACE_FILE = "trace.jsonl"
+_DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+_DEFAULT_BACKUPS = 3
+
+_ENABLED = False
+_TRACE_PATH = ""
+
+_TRACE_ID: contextvars.ContextVar[str | None] = contextvars.ContextVar("riva_trace_id", default=None)
+_SPAN_ID: contextvars.ContextVar[str | None] = contextvars.ContextVar("riva_span_id", default=None)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        raw = (os.environ.get(name) or "").strip()
+        return int(raw) if raw else default
+    except Exception:
+        return default
+
+
+class _JsonlWriter:
+    """Append-only JSONL file with size-based rotation (trace.jsonl.1, .2, ...)."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max(1024, max_bytes)
+        self.backups = max(0, backups)
+        self._lock = threading.Lock()
+        self._fh = None
+        self._size = 0
+
+    def _open(self) -> None:
+        self._fh = open(self.path, "a", encoding="utf-8")
+        try:
+            self._size = os.path.getsize(self.path)
+        except OSError:
+            self._size = 0
+
+    def _rotate(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._fh is None:
+                    self._open()
+                if self._size + len(line) > self.max_bytes and self._size > 0:
+                    self._rotate()
+                    self._open()
+                assert self._fh is not None
+                self._fh.write(line)
+                self._fh.flush()
+                self._size += len(line)
+            except Exception:
+                pass
+
+
+_WRITER: _JsonlWriter | None = None
+
+
+def configure(enabled: bool | None = None, path: str | None = None) -> None:
+    """(Re)configure tracing; by default from RIVA_TRACE."""
+    global _ENABLED, _TRACE_PATH, _WRITER
+    raw = (os.environ.get("RIVA_TRACE") or "").strip()
+    if enabled is None:
+        enabled = raw.lower() not in ("", "0", "false", "no", "off")
+    if path is None and enabled:
+        # Only resolved when on: cache_path() creates the cache folder.
+        path = raw if raw and raw.lower() not in ("1", "true", "yes", "on") else cache.cache_path(_DEFAULT_TRACE_FILE)
+    _TRACE_PATH = path or ""
+    _WRITER = _JsonlWriter(
+        path,
+        _env_int("RIVA_TRACE_MAX_BYTES", _DEFAULT_MAX_BYTES),
+        _env_int("RIVA_TRACE_BACKUPS", _DEFAULT_BACKUPS),
+    ) if enabled else None
+    _ENABLED = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def trace_path() -> str:
+    return _TRACE_PATH
+
+
+def current_trace_id() -> str | None:
+    return _TRACE_ID.get()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "span_id", "parent_id", "trace_id", "start", "_t0", "_tokens", "_root")
+
+    def __init__(self, name: str, attrs: dict[str, Any], root: bool):
+        self.name = name
+        self.attrs = attrs
+        self._root = root
+        self._tokens: tuple = ()
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        trace_id = None if self._root else _TRACE_ID.get()
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.parent_id = None if self._root else _SPAN_ID.get()
+        self.span_id = uuid.uuid4().hex[:12]
+        self._tokens = (_TRACE_ID.set(self.trace_id), _SPAN_ID.set(self.span_id))
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        dur_ms = (time.perf_counter() - self._t0) * 1000.0
+        _SPAN_ID.reset(self._tokens[1])
+        _TRACE_ID.reset(self._tokens[0])
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "ts": round(self.start, 6),
+            "dur_ms": round(dur_ms, 3),
+            "thread": threading.current_thread().name,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.attrs:
+            record["attrs"] = self.attrs
+        writer = _WRITER
+        if writer is not None:
+            writer.write(record)
+        return False
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing one stage, nested under the current span."""
+    if not _ENABLED:
+        return _NOOP
+    return Span(name, attrs, root=False)
+
+
+def trace(name: str, **attrs: Any):
+    """Start a new trace (e.g. one utterance); spans inside share its trace id."""
+    if not _ENABLED:
+        return _NOOP
+    return Span(name, attrs, root=True)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of span()."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            with Span(name, {}, root=False):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+# --- summary tool -------------------------------------------------------------
+
+def load_records(path: str) -> list[dict[str, Any]]:
+    """Read a trace file plus its rotated backups (oldest first)."""
+    files = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        files.append(f"{path}.{i}")
+        i += 1
+    files = list(reversed(files))
+    if os.path.exists(path):
+        files.append(path)
+
+    records: list[dict[str, Any]] = []
+    for p in files:
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except Exception:
+                    continue
+    return records
+
+
+def summarize_records(records: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """Latency summary per stage path (e.g. "utterance/listen/listen.transcribe")."""
+    from latency_stats import summarize
+
+    by_span = {r.get("span"): r for r in records}
+    paths: dict[str, str] = {}
+
+    def path_of(rec: dict[str, Any]) -> str:
+        sid = rec.get("span")
+        if sid in paths:
+            return paths[sid]
+        parent = by_span.get(rec.get("parent"))
+        p = rec.get("name", "?") if parent is None else f"{path_of(parent)}/{rec.get('name', '?')}"
+        paths[sid] = p
+        return p
+
+    grouped: dict[str, list[float]] = {}
+    for rec in records:
+        grouped.setdefault(path_of(rec), []).append(float(rec.get("dur_ms") or 0.0))
+    return {p: summarize(v) for p, v in grouped.items()}
+
+
+def print_summary(path: str | None = None) -> None:
+    path = path or _TRACE_PATH or cache.cache_path(_DEFAULT_TRACE_FILE)
+    records = load_records(path)
+    if not records:
+        print(f"[trace] no spans in {path}")
+        return
+    summary = summarize_records(records)
+    traces = len({r.get("trace") for r in records})
+    print(f"[trace] {len(records)} spans in {traces} traces from {path}")
+    print(f"{'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}  stage")
+    for stage in sorted(summary, key=lambda p: p.split("/")):
+        s = summary[stage]
+        depth = stage.count("/")
+        label = "  " * depth + stage.rsplit("/", 1)[-1]
+        print(f"{int(s['count']):>7} {s['p50']:>10.2f} {s['p95']:>10.2f} {s['max']:>10.2f}  {label}")
+
+
+configure()
+
+
+if __name__ == "__main__":
+    import sys
+
+    print_summary(sys.argv[1] if len(sys.argv) > 1 else None)